@@ -0,0 +1,32 @@
+"""pytest-benchmark entry points for the recommendation methods.
+
+Run from the project root with ``pytest benchmarks`` (needs pytest-benchmark;
+the Django test runner does not collect this directory). Catalogue sizes
+come from BENCHMARK_SIZES, e.g. ``BENCHMARK_SIZES=1000,10000``, and results
+can be saved and compared across commits with ``--benchmark-autosave`` /
+``--benchmark-compare``. ``manage.py benchmark_recommendations`` measures
+the same methods and writes the full quality report.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def pytest_configure(config):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'jobox.settings')
+    import django
+    django.setup()
+
+
+def benchmark_sizes():
+    return [int(size) for size in os.environ.get('BENCHMARK_SIZES', '1000').split(',')]
+
+
+@pytest.fixture(scope='module', params=benchmark_sizes(), ids=lambda size: f'{size}jobs')
+def corpus(request):
+    from ml_service.benchmark import SyntheticCorpus
+
+    return SyntheticCorpus.generate(request.param, int(os.environ.get('BENCHMARK_RESUMES', '50')))
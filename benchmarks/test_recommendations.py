@@ -0,0 +1,59 @@
+"""Index build time, query latency and ranking quality per recommendation method"""
+import pytest
+
+from ml_service.benchmark import (
+    HashingEncoder, benchmark_database, build_system, insert_corpus_jobs, query_runner, ranking_quality,
+)
+
+pytest.importorskip('pytest_benchmark')
+
+K = 20
+
+
+@pytest.fixture(scope='module')
+def system(corpus):
+    return build_system(corpus, HashingEncoder())
+
+
+@pytest.fixture(scope='module')
+def simple_catalogue(corpus):
+    """{Job pk: synthetic pk} of the corpus inserted into a throwaway test database"""
+    from ml_service.skill_index import job_skill_index
+
+    try:
+        with benchmark_database():
+            yield insert_corpus_jobs(corpus)
+    finally:
+        job_skill_index.reload()
+
+
+def test_index_build(benchmark, corpus):
+    system = benchmark.pedantic(build_system, args=(corpus, HashingEncoder()), rounds=1, iterations=1)
+    assert len(system) == len(corpus.jobs)
+
+
+@pytest.mark.parametrize('method', ['tfidf', 'semantic', 'hybrid'])
+def test_query(benchmark, corpus, system, method):
+    rankings = benchmark(query_runner(system, method, corpus.resume_texts, K))
+    benchmark.extra_info.update(queries=len(corpus.resume_texts), **ranking_quality(corpus, rankings, K))
+    assert len(rankings) == len(corpus.resume_texts)
+
+
+def test_batch_query(benchmark, corpus, system):
+    rankings = benchmark(system.recommend_many, corpus.resume_texts, 'hybrid', K)
+    benchmark.extra_info.update(queries=len(corpus.resume_texts), **ranking_quality(corpus, rankings, K))
+    assert len(rankings) == len(corpus.resume_texts)
+
+
+def test_simple_query(benchmark, corpus, simple_catalogue):
+    from resume_service.views import get_simple_recommendations
+
+    def run():
+        return [
+            [{'job_id': simple_catalogue[item['job_id']]} for item in get_simple_recommendations(text)][:K]
+            for text in corpus.resume_texts
+        ]
+
+    rankings = benchmark(run)
+    benchmark.extra_info.update(queries=len(corpus.resume_texts), **ranking_quality(corpus, rankings, K))
+    assert len(rankings) == len(corpus.resume_texts)
@@ -0,0 +1,133 @@
+"""Chunked reading and vectorised parsing of Parquet and JSON-lines job feeds.
+
+Feeds use the JobsFE.csv columns. ``read_feed`` yields DataFrames of at
+most ``batch_size`` rows, one Parquet record batch or JSON-lines chunk at
+a time, and ``parse_feed_frame`` normalises a frame onto Job fields with
+column operations, returning the same ``(jobs, skipped, errors)`` triple
+as ``parse_csv_rows`` so the frames go through the same writer.
+"""
+import os
+from decimal import Decimal
+
+import pandas as pd
+
+from job_service.importing import WORKING_MODES
+from job_service.models import Job
+from ml_service.skill_index import job_skill_ids
+
+FEED_COLUMNS = (
+    'Job Id', 'workplace', 'working_mode', 'salary', 'position', 'job_role_and_duties', 'requisite_skill',
+)
+REQUIRED_COLUMNS = ('position', 'workplace')
+# File extension -> feed format
+FORMATS = {
+    '.parquet': 'parquet',
+    '.pq': 'parquet',
+    '.jsonl': 'jsonl',
+    '.ndjson': 'jsonl',
+    '.json': 'jsonl',
+}
+
+
+def feed_format(file_path):
+    """Format of ``file_path`` by extension; raises ValueError when unknown"""
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension not in FORMATS:
+        raise ValueError(f"Cannot tell the format of {file_path}; pass --format")
+    return FORMATS[extension]
+
+
+def _frames(file_path, file_format, batch_size):
+    if file_format == 'parquet':
+        # Imported here: pyarrow is only needed for Parquet feeds
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(file_path)
+        missing = [column for column in REQUIRED_COLUMNS if column not in parquet_file.schema_arrow.names]
+        if missing:
+            raise ValueError(f"Missing required columns: {', '.join(missing)}")
+        columns = [column for column in FEED_COLUMNS if column in parquet_file.schema_arrow.names]
+        # Decoded one record batch at a time, reading only the feed columns
+        for batch in parquet_file.iter_batches(batch_size=batch_size, columns=columns):
+            yield batch.to_pandas()
+    else:
+        # dtype=False keeps ids and salaries as written rather than guessing numbers or dates
+        with pd.read_json(file_path, lines=True, chunksize=batch_size, dtype=False) as reader:
+            for frame in reader:
+                missing = [column for column in REQUIRED_COLUMNS if column not in frame]
+                if missing:
+                    raise ValueError(f"Missing required columns: {', '.join(missing)}")
+                yield frame
+
+
+def read_feed(file_path, file_format, batch_size, skip=0):
+    """Yield DataFrames of at most ``batch_size`` feed rows, after the first ``skip`` rows"""
+    for frame in _frames(file_path, file_format, batch_size):
+        if skip >= len(frame):
+            skip -= len(frame)
+            continue
+        if skip:
+            frame, skip = frame.iloc[skip:], 0
+        yield frame
+
+
+def _text(frame, column):
+    """Stripped string values of ``column``, '' where missing"""
+    if column not in frame:
+        return pd.Series('', index=frame.index, dtype=object)
+    return frame[column].fillna('').astype(str).str.strip()
+
+
+def _salary_part(parts, index):
+    # Built as strings even when no row has this part, so .str always applies
+    return pd.to_numeric(parts.str[index].fillna('').astype(str).str.strip(), errors='coerce')
+
+
+def parse_salaries(values):
+    """Vectorised ``parse_salary``: (salary_min, salary_max) float Series, NaN where none"""
+    parts = values.astype(str).str.replace(r'[$,£€]', '', regex=True).str.split('-')
+    count = parts.str.len()
+    low, high = _salary_part(parts, 0), _salary_part(parts, 1)
+    single, ranged = count == 1, count == 2
+    salary_min = low.where(single | ranged)
+    salary_max = high.where(ranged, low.where(single))
+    # Like parse_salary, a range with one unreadable bound gives neither
+    valid = salary_min.notna() & salary_max.notna()
+    return salary_min.where(valid), salary_max.where(valid)
+
+
+def _decimals(values):
+    return [None if pd.isna(value) else Decimal(repr(value)) for value in values.tolist()]
+
+
+def parse_feed_frame(frame):
+    """Normalise a feed DataFrame into ``(fields, skill_ids)`` pairs.
+
+    Returns ``(jobs, skipped, errors)`` like ``parse_csv_rows``: rows
+    without a position or workplace are skipped.
+    """
+    position = _text(frame, 'position')
+    workplace = _text(frame, 'workplace')
+    # Skip if essential fields are empty
+    keep = (position != '') & (workplace != '')
+    frame, position, workplace = frame[keep], position[keep], workplace[keep]
+
+    external_id = _text(frame, 'Job Id').astype(object)
+    salary_min, salary_max = parse_salaries(_text(frame, 'salary'))
+    columns = {
+        'external_id': external_id.where(external_id != '', None).tolist(),
+        'position': position.tolist(),
+        'workplace': workplace.tolist(),
+        'working_mode': _text(frame, 'working_mode').str.lower().map(WORKING_MODES).fillna('full_time').tolist(),
+        'job_role_and_duties': _text(frame, 'job_role_and_duties').tolist(),
+        'requisite_skill': _text(frame, 'requisite_skill').tolist(),
+        'salary_min': _decimals(salary_min),
+        'salary_max': _decimals(salary_max),
+        'location': workplace.tolist(),  # Use workplace as location
+    }
+
+    jobs = []
+    for values in zip(*columns.values()):
+        fields = dict(zip(columns, values))
+        jobs.append((fields, job_skill_ids(Job(**fields))))
+    return jobs, int((~keep).sum()), []
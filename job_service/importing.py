@@ -0,0 +1,333 @@
+"""Streaming job import: row parsing, batched upserts and resumable checkpoints.
+
+Import commands read their feed as a stream of raw rows, parse chunks of
+rows (optionally in worker processes, see ``parse_in_parallel``) into job
+field dicts and hand them to a ``JobWriter``, which upserts each batch on
+``Job.external_id`` in its own transaction. An ``ImportCheckpoint``
+records how many input rows are safely written, so an interrupted import
+can resume where it stopped. A ``JobEmbedder`` can encode the written jobs
+into the shared embedding store alongside, so the import leaves the
+catalogue ready to serve.
+"""
+import json
+import logging
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from decimal import Decimal, InvalidOperation
+
+import numpy as np
+from django.db import transaction
+
+from job_service.models import Job
+from ml_service.registry import recommendation_registry
+from ml_service.skill_index import job_skill_ids, sync_job_skills
+
+logger = logging.getLogger(__name__)
+
+# Feed working modes -> Job.WORKING_MODE_CHOICES; anything else is full time
+WORKING_MODES = {
+    'full time': 'full_time',
+    'part time': 'part_time',
+    'contract': 'contract',
+    'freelance': 'freelance',
+    'internship': 'internship',
+    'remote': 'remote',
+}
+# Fields an import overwrites when the external id already exists
+UPSERT_FIELDS = (
+    'position', 'workplace', 'working_mode', 'job_role_and_duties', 'requisite_skill',
+    'salary_min', 'salary_max', 'location',
+)
+# Jobs written per transaction
+DEFAULT_BATCH_SIZE = 1000
+# Past this many written jobs, serving processes rebuild instead of applying a change list
+MAX_NOTIFIED_IDS = 100000
+# Jobs per embedding store update (each rewrites the store's manifest)
+DEFAULT_EMBED_BATCH_SIZE = 4096
+
+
+def normalize_working_mode(value):
+    return WORKING_MODES.get((value or '').strip().lower(), 'full_time')
+
+
+def parse_salary(value):
+    """(salary_min, salary_max) Decimals of '$50,000', '40000-60000' and the like, or (None, None)"""
+    value = (value or '').strip()
+    if not value:
+        return None, None
+    # Remove currency symbols and commas
+    value = value.replace('$', '').replace(',', '').replace('£', '').replace('€', '')
+    try:
+        if '-' in value:
+            parts = value.split('-')
+            if len(parts) == 2:
+                return Decimal(parts[0].strip()), Decimal(parts[1].strip())
+            return None, None
+        salary = Decimal(value)
+        return salary, salary
+    except InvalidOperation:
+        return None, None
+
+
+def parse_csv_rows(rows):
+    """Parse JobsFE.csv rows into ``(fields, skill_ids)`` pairs.
+
+    Returns ``(jobs, skipped, errors)``: rows without a position or
+    workplace are skipped, rows that fail to parse are reported in
+    ``errors``. Skill ids are extracted here so that, with parse workers,
+    the taxonomy matching runs in parallel too.
+    """
+    jobs, skipped, errors = [], 0, []
+    for row in rows:
+        try:
+            position = (row.get('position') or '').strip()
+            workplace = (row.get('workplace') or '').strip()
+            # Skip if essential fields are empty
+            if not position or not workplace:
+                skipped += 1
+                continue
+
+            salary_min, salary_max = parse_salary(row.get('salary'))
+            fields = {
+                'external_id': (row.get('Job Id') or '').strip() or None,
+                'position': position,
+                'workplace': workplace,
+                'working_mode': normalize_working_mode(row.get('working_mode')),
+                'job_role_and_duties': (row.get('job_role_and_duties') or '').strip(),
+                'requisite_skill': (row.get('requisite_skill') or '').strip(),
+                'salary_min': salary_min,
+                'salary_max': salary_max,
+                'location': workplace,  # Use workplace as location
+            }
+            jobs.append((fields, job_skill_ids(Job(**fields))))
+        except Exception as e:
+            errors.append(str(e))
+    return jobs, skipped, errors
+
+
+def _init_parse_worker():
+    # Spawned workers (macOS, Windows) start without Django configured
+    import django
+    django.setup()
+
+
+def parse_in_parallel(chunks, parse, workers):
+    """Yield ``(chunk, parse(chunk))`` for each chunk, in input order.
+
+    With ``workers`` > 1 chunks are parsed in that many processes, with a
+    bounded number of chunks in flight so memory stays flat however long
+    the input is.
+    """
+    if workers <= 1:
+        for chunk in chunks:
+            yield chunk, parse(chunk)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_parse_worker) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append((chunk, executor.submit(parse, chunk)))
+            if len(pending) >= 2 * workers:
+                chunk, future = pending.popleft()
+                yield chunk, future.result()
+        while pending:
+            chunk, future = pending.popleft()
+            yield chunk, future.result()
+
+
+class JobWriter:
+    """Write parsed jobs in batches, upserting on ``Job.external_id``.
+
+    Each batch is one transaction: a ``bulk_create`` with
+    ``update_conflicts`` (rows without an external id are plain inserts)
+    followed by the batch's JobSkill rows, which the post_save signal would
+    otherwise have written. ``bulk_create`` sends no signals, so the
+    written job ids are published to the recommendation index by
+    ``publish()``, once, after the import.
+    """
+
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE):
+        self.batch_size = batch_size
+        self.written = 0
+        self._written_ids = set()
+        self._full_rebuild = False
+
+    def write(self, parsed):
+        """Upsert ``(fields, skill_ids)`` pairs; returns the saved Job objects"""
+        saved = []
+        for start in range(0, len(parsed), self.batch_size):
+            saved.extend(self._write_batch(parsed[start:start + self.batch_size]))
+        return saved
+
+    def _write_batch(self, parsed):
+        # A repeated external id keeps its last row: one statement cannot update a row twice
+        by_key = {}
+        for position, (fields, skill_ids) in enumerate(parsed):
+            by_key[fields['external_id'] or position] = (fields, skill_ids)
+        jobs = [Job(**fields) for fields, _ in by_key.values()]
+
+        with transaction.atomic():
+            jobs = Job.objects.bulk_create(
+                jobs, update_conflicts=True, unique_fields=['external_id'], update_fields=UPSERT_FIELDS,
+            )
+            if any(job.pk is None for job in jobs):
+                self._select_pks(jobs)
+            sync_job_skills(jobs, skill_ids=[skill_ids for _, skill_ids in by_key.values()])
+
+        self.written += len(jobs)
+        if not self._full_rebuild:
+            self._written_ids.update(job.pk for job in jobs)
+            if len(self._written_ids) > MAX_NOTIFIED_IDS:
+                self._full_rebuild, self._written_ids = True, set()
+        return jobs
+
+    @staticmethod
+    def _select_pks(jobs):
+        """Set the pks ``bulk_create`` could not return (backends without RETURNING, e.g. MySQL)"""
+        unkeyed = [job for job in jobs if job.pk is None and not job.external_id]
+        if unkeyed:
+            # Rolls back the batch: these rows cannot be told apart from existing jobs
+            raise RuntimeError(
+                'This database cannot return the ids of bulk-inserted rows; '
+                'every imported row needs a job id'
+            )
+        keyed = {job.external_id: job for job in jobs if job.pk is None}
+        pks = Job.objects.filter(external_id__in=list(keyed)).values_list('external_id', 'pk')
+        for external_id, pk in pks:
+            keyed[external_id].pk = pk
+
+    def require_full_rebuild(self):
+        """Publish a full rebuild, e.g. when earlier runs wrote jobs this writer never saw"""
+        self._full_rebuild, self._written_ids = True, set()
+
+    def publish(self):
+        """Tell every serving process about the written jobs, as one batch"""
+        if self._full_rebuild:
+            recommendation_registry.invalidate()
+        elif self._written_ids:
+            recommendation_registry.notify_changed(self._written_ids)
+        self._written_ids = set()
+
+
+class JobEmbedder:
+    """Encode imported jobs into the shared embedding store during the import.
+
+    Written jobs are collected into groups of ``batch_size``. The new or
+    changed texts of a group (unchanged jobs keep their stored vectors) are
+    encoded on a worker thread, with the index's recipe, while the import
+    parses and writes the next batches; the encoder releases the GIL, so
+    the two overlap. Finished groups are written to the store in import
+    order, with at most ``workers`` groups in flight.
+    """
+
+    def __init__(self, batch_size=DEFAULT_EMBED_BATCH_SIZE, workers=1):
+        from ml_service.models import AdvancedJobRecommendationSystem
+
+        self.system_class = AdvancedJobRecommendationSystem
+        self.encoder = recommendation_registry.get_encoder()
+        if self.encoder is None:
+            raise RuntimeError('The sentence encoder could not be loaded')
+        self.store = recommendation_registry.get_embedding_store()
+        self.batch_size = batch_size
+        self.workers = workers
+        self.encoded = 0
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='import-embed')
+        self._pending = deque()
+        self._ids, self._texts = [], []
+
+    def add(self, jobs):
+        """Queue saved jobs for encoding"""
+        for job in jobs:
+            self._ids.append(job.pk)
+            self._texts.append(self.system_class._job_text(job))
+        if len(self._ids) >= self.batch_size:
+            self._submit()
+
+    def _submit(self):
+        ids, texts, self._ids, self._texts = self._ids, self._texts, [], []
+        missing = [texts[i] for i in self.store.missing(ids, texts)]
+        self._pending.append((ids, texts, self._executor.submit(self._encode, missing)))
+        while len(self._pending) > self.workers:
+            self._store_next()
+
+    def _encode(self, texts):
+        if not texts:
+            return {}
+        return dict(zip(texts, self.system_class.encode_with(self.encoder, texts)))
+
+    def _store_next(self):
+        ids, texts, future = self._pending.popleft()
+        vectors = future.result()
+
+        def encode(missing):
+            # Vectors another process dropped since the group was submitted are encoded here
+            todo = [text for text in missing if text not in vectors]
+            if todo:
+                vectors.update(self._encode(todo))
+            return np.stack([vectors[text] for text in missing])
+
+        self.store.upsert(ids, texts, encode)
+        self.encoded += len(vectors)
+
+    def finish(self):
+        """Encode and store everything queued so far"""
+        if self._ids:
+            self._submit()
+        while self._pending:
+            self._store_next()
+
+    def close(self):
+        self._executor.shutdown(cancel_futures=True)
+
+
+class ImportCheckpoint:
+    """Progress of one import, saved next to the input as JSON.
+
+    Records how many input rows are committed, so a rerun with the same
+    file can skip them. The file's size and modification time are stored
+    too: a checkpoint for a file that changed since is rejected.
+    """
+
+    def __init__(self, path, source):
+        self.path = path
+        self.source = source
+        self.rows_done = 0
+
+    def _fingerprint(self):
+        stat = os.stat(self.source)
+        return {'source': os.path.abspath(self.source), 'size': stat.st_size, 'mtime': stat.st_mtime}
+
+    def load(self):
+        """Read the saved progress; raises ValueError when it belongs to another file"""
+        if not os.path.exists(self.path):
+            return self
+        with open(self.path, encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('fingerprint') != self._fingerprint():
+            raise ValueError(f"Checkpoint {self.path} was written for a different or modified input file")
+        self.rows_done = data['rows_done']
+        return self
+
+    def save(self, rows_done):
+        self.rows_done = rows_done
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'fingerprint': self._fingerprint(), 'rows_done': rows_done}, f)
+        # Atomic, so an interruption never leaves a half-written checkpoint
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class Throughput:
+    """Rows/sec since the start of an import, for progress lines"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+
+    def rate(self, rows):
+        return rows / max(time.perf_counter() - self.start, 1e-9)
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from job_service.models import Job
+from ml_service.registry import recommendation_registry
+from ml_service.skill_index import BATCH_SIZE, SKILL_FIELDS, sync_job_skills
+
+
+class Command(BaseCommand):
+    help = 'Extract the skills of every job with the current taxonomy and store them as JobSkill rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help=f'Jobs extracted and written per transaction (default: {BATCH_SIZE})'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = max(options['batch_size'], 1)
+        jobs = Job.objects.only(*SKILL_FIELDS).order_by('pk')
+        last_pk, processed = 0, 0
+        while True:
+            batch = list(jobs.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            sync_job_skills(batch)
+            last_pk = batch[-1].pk
+            processed += len(batch)
+            self.stdout.write(f'Extracted skills of {processed} jobs')
+
+        # Every job's skills may have changed; serving processes reload them all
+        recommendation_registry.invalidate()
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully backfilled skills of {processed} jobs')
+        )
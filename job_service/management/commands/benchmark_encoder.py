@@ -0,0 +1,135 @@
+import multiprocessing
+import resource
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from ml_service.encoders import ENCODER_BACKENDS, load_onnx_encoder, load_torch_encoder, onnx_directory
+from ml_service.models import AdvancedJobRecommendationSystem
+
+
+def run_backend(backend, model_name, onnx_dir, texts, queries, batch_size, results):
+    """Measure one backend in a fresh process so its RSS is not shared"""
+    start = time.perf_counter()
+    if backend == 'onnx':
+        encoder = load_onnx_encoder(model_name, onnx_dir, export=True)
+        if encoder is None:
+            results.put({'backend': backend, 'error': 'ONNX encoder could not be loaded'})
+            return
+    else:
+        encoder = load_torch_encoder(model_name)
+    load_seconds = time.perf_counter() - start
+
+    # Warm up once so lazy initialisation is not timed
+    encoder.encode(texts[:batch_size], batch_size=batch_size)
+
+    latencies = []
+    for text in texts[:queries]:
+        start = time.perf_counter()
+        encoder.encode([text], batch_size=1)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    embeddings = encoder.encode(texts, batch_size=batch_size, normalize_embeddings=True)
+    batch_seconds = time.perf_counter() - start
+
+    results.put({
+        'backend': backend,
+        'load_seconds': load_seconds,
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p99_ms': float(np.percentile(latencies, 99)),
+        'texts_per_second': len(texts) / batch_seconds,
+        # ru_maxrss is in KiB on Linux
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'embeddings': np.asarray(embeddings, dtype=np.float32),
+    })
+
+
+class Command(BaseCommand):
+    help = 'Compare sentence encoder backends: load time, query latency, batch throughput, RSS and agreement'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--backends',
+            nargs='+',
+            default=list(ENCODER_BACKENDS),
+            choices=ENCODER_BACKENDS,
+            help='Backends to compare (default: all)'
+        )
+        parser.add_argument(
+            '--model',
+            default=AdvancedJobRecommendationSystem.MODEL_NAME,
+            help='Sentence Transformer name or path'
+        )
+        parser.add_argument(
+            '--texts',
+            type=int,
+            default=512,
+            help='Texts encoded in the throughput run (default: 512)'
+        )
+        parser.add_argument(
+            '--queries',
+            type=int,
+            default=100,
+            help='Single-text queries timed for latency (default: 100)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=AdvancedJobRecommendationSystem.ENCODE_BATCH_SIZE,
+            help='Encoder batch size for the throughput run'
+        )
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=0.99,
+            help='Minimum cosine similarity between backends for a text (default: 0.99)'
+        )
+
+    def handle(self, *args, **options):
+        texts = self.sample_texts(options['texts'])
+        onnx_dir = onnx_directory(options['model'])
+        context = multiprocessing.get_context('spawn')
+
+        reports = []
+        for backend in options['backends']:
+            results = context.Queue()
+            process = context.Process(target=run_backend, args=(
+                backend, options['model'], onnx_dir, texts,
+                options['queries'], options['batch_size'], results,
+            ))
+            process.start()
+            report = results.get()
+            process.join()
+            if 'error' in report:
+                raise CommandError(f"{backend}: {report['error']}")
+            reports.append(report)
+
+            self.stdout.write(
+                f"{backend:<6} load {report['load_seconds']:6.2f}s  "
+                f"p50 {report['p50_ms']:7.2f}ms  p99 {report['p99_ms']:7.2f}ms  "
+                f"{report['texts_per_second']:8.1f} texts/s  "
+                f"peak RSS {report['peak_rss_mb']:7.1f} MB"
+            )
+
+        if len(reports) == 2:
+            similarity = (reports[0]['embeddings'] * reports[1]['embeddings']).sum(axis=1)
+            message = (f"cosine({reports[0]['backend']}, {reports[1]['backend']}): "
+                       f"min {similarity.min():.4f}  mean {similarity.mean():.4f}")
+            if similarity.min() < options['tolerance']:
+                self.stdout.write(self.style.WARNING(message + f"  below tolerance {options['tolerance']}"))
+            else:
+                self.stdout.write(self.style.SUCCESS(message))
+
+    def sample_texts(self, count):
+        """Job texts from the database, repeated or synthesised up to ``count``"""
+        # Imported here: spawned benchmark processes import this module without Django set up
+        from job_service.models import Job
+
+        texts = [job.job_text for job in Job.objects.all()[:count]]
+        if not texts:
+            rng = np.random.default_rng(0)
+            vocabulary = 'python django developer data analyst manager sales remote senior team'.split()
+            texts = [' '.join(rng.choice(vocabulary, size=rng.integers(5, 120))) for _ in range(count)]
+        return (texts * (count // len(texts) + 1))[:count]
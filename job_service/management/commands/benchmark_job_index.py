@@ -0,0 +1,135 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from ml_service.index import BACKENDS, COMPRESSED_BACKENDS, JobVectorIndex, recall_at_k
+from ml_service.registry import recommendation_registry
+
+
+class Command(BaseCommand):
+    help = 'Benchmark job index backends: build time, memory, query latency and recall@k against exact search'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--synthetic',
+            type=int,
+            default=0,
+            help='Benchmark N synthetic vectors instead of the stored job embeddings'
+        )
+        parser.add_argument(
+            '--dim',
+            type=int,
+            default=384,
+            help='Dimension of synthetic vectors (default: 384)'
+        )
+        parser.add_argument(
+            '--backends',
+            nargs='+',
+            default=list(BACKENDS),
+            choices=BACKENDS,
+            help='Backends to compare (default: all)'
+        )
+        parser.add_argument(
+            '--queries',
+            type=int,
+            default=200,
+            help='Number of queries to time (default: 200)'
+        )
+        parser.add_argument(
+            '--k',
+            type=int,
+            default=20,
+            help='Results per query, used for recall@k (default: 20)'
+        )
+        parser.add_argument(
+            '--nprobe',
+            type=int,
+            nargs='+',
+            default=[1, 4, 16, 64],
+            help='IVF nprobe values to sweep'
+        )
+        parser.add_argument(
+            '--ef-search',
+            type=int,
+            nargs='+',
+            default=[16, 64, 256],
+            help='HNSW efSearch values to sweep'
+        )
+        parser.add_argument(
+            '--rerank',
+            type=int,
+            nargs='+',
+            default=[0, 10],
+            help='Re-rank factors to sweep for compressed backends (0 = no re-ranking)'
+        )
+
+    def handle(self, *args, **options):
+        if options['synthetic']:
+            vectors = self.synthetic_vectors(options['synthetic'], options['dim'])
+        else:
+            store = recommendation_registry.get_embedding_store()
+            store.load()
+            if not len(store):
+                raise CommandError('The embedding store is empty; use --synthetic N or build the index first.')
+            vectors = np.ascontiguousarray(store.get(store.ids.tolist()), dtype=np.float32)
+
+        ids = np.arange(len(vectors), dtype=np.int64)
+        rng = np.random.default_rng(0)
+        queries = vectors[rng.choice(len(vectors), options['queries'])]
+        queries = queries + rng.normal(scale=0.05, size=queries.shape).astype(np.float32)
+        k = options['k']
+
+        self.stdout.write(f'{len(vectors)} vectors x {vectors.shape[1]} dims, {len(queries)} queries, k={k}')
+
+        exact = JobVectorIndex.build(ids, vectors, backend='flat')
+        _, exact_ids = exact.search(queries, k)
+
+        for backend in options['backends']:
+            start = time.perf_counter()
+            job_index = JobVectorIndex.build(
+                ids, vectors, backend=backend, exact_search_threshold=0,
+                rerank=lambda job_ids: vectors[job_ids],
+            )
+            build_seconds = time.perf_counter() - start
+            bytes_per_job = job_index.bytes_per_vector()
+
+            if backend.startswith('ivf'):
+                sweep = [('nprobe', value) for value in options['nprobe']]
+            elif backend == 'hnsw':
+                sweep = [('ef_search', value) for value in options['ef_search']]
+            else:
+                sweep = [(None, None)]
+            if backend in COMPRESSED_BACKENDS:
+                sweep = [(param, value, factor) for param, value in sweep for factor in options['rerank']]
+            else:
+                sweep = [(param, value, 0) for param, value in sweep]
+
+            for param, value, factor in sweep:
+                if param:
+                    setattr(job_index, param, value)
+                job_index.rerank_factor = factor
+                latencies = []
+                found_ids = []
+                for query in queries:
+                    start = time.perf_counter()
+                    _, result_ids = job_index.search(query[None, :], k)
+                    latencies.append((time.perf_counter() - start) * 1000)
+                    found_ids.append(result_ids[0])
+
+                label = f'{backend}' + (f' {param}={value}' if param else '') + (f' rerank={factor}' if factor else '')
+                self.stdout.write(
+                    f'{label:<34} build {build_seconds:7.2f}s  {bytes_per_job:7.1f} B/job  '
+                    f'p50 {np.percentile(latencies, 50):7.3f}ms  '
+                    f'p99 {np.percentile(latencies, 99):7.3f}ms  '
+                    f'recall@{k} {recall_at_k(found_ids, exact_ids):.3f}'
+                )
+
+    def synthetic_vectors(self, count, dim):
+        """Clustered, L2-normalised vectors that resemble sentence embeddings"""
+        rng = np.random.default_rng(42)
+        centers = rng.normal(size=(max(1, count // 100), dim)).astype(np.float32)
+        vectors = centers[rng.integers(len(centers), size=count)]
+        vectors += rng.normal(scale=0.5, size=vectors.shape).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors
@@ -0,0 +1,189 @@
+import json
+import subprocess
+import time
+from datetime import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from ml_service.benchmark import (
+    METHODS, HashingEncoder, SyntheticCorpus, benchmark_database, benchmark_settings, build_system, evaluate,
+    insert_corpus_jobs, peak_rss_mb, recommend,
+)
+from ml_service.conf import artifact_path
+
+
+class Command(BaseCommand):
+    help = 'Benchmark recommendation methods on synthetic labelled corpora and write a JSON report'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            type=int,
+            nargs='+',
+            default=[1000, 10000],
+            help='Catalogue sizes to generate, e.g. 1000 10000 100000 1000000'
+        )
+        parser.add_argument(
+            '--resumes',
+            type=int,
+            default=200,
+            help='Synthetic resumes used as queries (default: 200)'
+        )
+        parser.add_argument(
+            '--latency-queries',
+            type=int,
+            default=100,
+            help='Queries timed one by one for latency percentiles (default: 100)'
+        )
+        parser.add_argument(
+            '--k',
+            type=int,
+            default=20,
+            help='Cut-off for recall@k and nDCG@k (default: 20)'
+        )
+        parser.add_argument(
+            '--methods',
+            nargs='+',
+            default=list(METHODS),
+            choices=METHODS,
+            help='Methods to benchmark (default: all)'
+        )
+        parser.add_argument(
+            '--encoder',
+            choices=['model', 'hashing'],
+            default='model',
+            help="Sentence encoder: the configured model, or a hashing encoder to time the pipeline offline"
+        )
+        parser.add_argument(
+            '--index-backend',
+            default=None,
+            help='Override ML_SERVICE["INDEX_BACKEND"] for this run'
+        )
+        parser.add_argument(
+            '--simple-max-jobs',
+            type=int,
+            default=10000,
+            help='Largest catalogue the database-backed simple method is run on (default: 10000)'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Corpus random seed (default: 0)'
+        )
+        parser.add_argument(
+            '--output',
+            default=None,
+            help='JSON report path (default: ml_artifacts/benchmarks/<timestamp>.json)'
+        )
+
+    def handle(self, *args, **options):
+        overrides = {}
+        if options['index_backend']:
+            overrides['INDEX_BACKEND'] = options['index_backend']
+
+        with override_settings(ML_SERVICE={**getattr(settings, 'ML_SERVICE', {}), **overrides}):
+            encoder = self.load_encoder(options['encoder'])
+            report = {
+                'created_at': datetime.now().isoformat(timespec='seconds'),
+                'commit': self.git_commit(),
+                'encoder': options['encoder'],
+                'settings': benchmark_settings(),
+                'results': [],
+            }
+            for size in options['sizes']:
+                report['results'].extend(self.run_size(size, encoder, options))
+
+        output = options['output'] or artifact_path(
+            'benchmarks', f"recommendations-{datetime.now():%Y%m%d-%H%M%S}.json"
+        )
+        with open(output, 'w') as f:
+            json.dump(report, f, indent=2)
+        self.stdout.write(self.style.SUCCESS(f'Report written to {output}'))
+
+    def load_encoder(self, kind):
+        if kind == 'hashing':
+            return HashingEncoder()
+        from ml_service.registry import recommendation_registry
+
+        encoder = recommendation_registry.get_encoder()
+        if encoder is None:
+            raise CommandError('The sentence encoder could not be loaded; use --encoder hashing.')
+        return encoder
+
+    def run_size(self, size, encoder, options):
+        k = options['k']
+        start = time.perf_counter()
+        corpus = SyntheticCorpus.generate(size, options['resumes'], seed=options['seed'])
+        self.stdout.write(f'{size} jobs: corpus generated in {time.perf_counter() - start:.1f}s')
+
+        results = []
+        ml_methods = [method for method in options['methods'] if method != 'simple']
+        if ml_methods:
+            start = time.perf_counter()
+            system = build_system(corpus, encoder)
+            build_seconds = time.perf_counter() - start
+            build_rss = peak_rss_mb()
+            for method in ml_methods:
+                result = evaluate(
+                    corpus, method,
+                    lambda text: recommend(system, method, text, k),
+                    lambda texts: system.recommend_many(texts, method, k),
+                    k=k, latency_queries=options['latency_queries'],
+                )
+                result.update(jobs=size, build_seconds=build_seconds, build_rss_mb=build_rss)
+                results.append(self.report(result, k))
+
+        if 'simple' in options['methods']:
+            if size > options['simple_max_jobs']:
+                self.stdout.write(f'{size} jobs: skipping simple (over --simple-max-jobs)')
+            else:
+                results.append(self.report(self.run_simple(corpus, size, k, options), k))
+        return results
+
+    def run_simple(self, corpus, size, k, options):
+        """Keyword fallback, which reads jobs from the database: the corpus is
+        inserted into a throwaway test database, so the configured one is
+        neither changed nor locked"""
+        from ml_service.skill_index import job_skill_index
+        from resume_service.views import get_simple_recommendations
+
+        try:
+            with benchmark_database():
+                start = time.perf_counter()
+                synthetic_id = insert_corpus_jobs(corpus)
+                build_seconds = time.perf_counter() - start
+
+                def recommend_one(text):
+                    return [{'job_id': synthetic_id[item['job_id']]} for item in get_simple_recommendations(text)][:k]
+
+                result = evaluate(
+                    corpus, 'simple', recommend_one, lambda texts: [recommend_one(text) for text in texts],
+                    k=k, latency_queries=options['latency_queries'],
+                )
+        finally:
+            # Back to the skills of the configured database
+            job_skill_index.reload()
+
+        result.update(jobs=size, build_seconds=build_seconds, build_rss_mb=None)
+        return result
+
+    def report(self, result, k):
+        self.stdout.write(
+            f"{result['jobs']:>8} {result['method']:<9} build {result['build_seconds']:7.1f}s  "
+            f"p50 {result['p50_ms']:8.2f}ms  p95 {result['p95_ms']:8.2f}ms  p99 {result['p99_ms']:8.2f}ms  "
+            f"{result['throughput_qps']:8.1f} q/s  recall@{k} {result[f'recall_at_{k}']:.3f}  "
+            f"nDCG@{k} {result[f'ndcg_at_{k}']:.3f}  RSS {result['peak_rss_mb']:.0f}MB"
+        )
+        return result
+
+    def git_commit(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                cwd=settings.BASE_DIR, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
@@ -0,0 +1,77 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+import ml_service
+
+# Run in a fresh interpreter: set up Django, load every URLconf (and so every
+# view module), then report which modules ended up imported
+PROBE = """
+import json, sys
+import django
+django.setup()
+from django.urls import get_resolver
+get_resolver().url_patterns
+print(json.dumps(sorted(sys.modules)))
+"""
+
+
+class Command(BaseCommand):
+    help = 'Fail if Django startup imports heavy ML libraries or exceeds an import-time budget'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--budget-ms',
+            type=float,
+            default=1500,
+            help='Maximum total import time for startup and URL loading (default: 1500ms)'
+        )
+        parser.add_argument(
+            '--top',
+            type=int,
+            default=10,
+            help='Number of slowest top-level imports to list (default: 10)'
+        )
+
+    def handle(self, *args, **options):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=settings.SETTINGS_MODULE)
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', PROBE],
+            capture_output=True, text=True, env=env, cwd=settings.BASE_DIR,
+        )
+        if result.returncode != 0:
+            raise CommandError(f'Startup probe failed:\n{result.stderr[-2000:]}')
+
+        loaded = set(json.loads(result.stdout.strip().splitlines()[-1]))
+        timings = self.top_level_imports(result.stderr)
+        total_ms = sum(timings.values()) / 1000
+
+        for name, micros in sorted(timings.items(), key=lambda item: -item[1])[:options['top']]:
+            self.stdout.write(f'{micros / 1000:9.1f}ms  {name}')
+        self.stdout.write(f'{total_ms:9.1f}ms  total ({len(loaded)} modules)')
+
+        problems = []
+        heavy = sorted(name for name in ml_service.HEAVY_MODULES if name in loaded)
+        if heavy:
+            problems.append(f"heavy modules imported at startup: {', '.join(heavy)}")
+        if total_ms > options['budget_ms']:
+            problems.append(f"startup imports took {total_ms:.0f}ms, budget is {options['budget_ms']:.0f}ms")
+        if problems:
+            raise CommandError('; '.join(problems))
+        self.stdout.write(self.style.SUCCESS('Import budget OK'))
+
+    def top_level_imports(self, importtime_output):
+        """Cumulative microseconds per top-level import from ``-X importtime``"""
+        timings = {}
+        for line in importtime_output.splitlines():
+            if not line.startswith('import time:') or 'cumulative' in line:
+                continue
+            _, cumulative, name = line[len('import time:'):].split('|')
+            # Nested imports are indented under the module that triggered them
+            if not name[1:].startswith(' '):
+                timings[name.strip()] = timings.get(name.strip(), 0) + int(cumulative)
+        return timings
@@ -1,5 +1,6 @@
 from django.core.management.base import BaseCommand
 from job_service.models import Job
+from ml_service.registry import recommendation_registry
 
 class Command(BaseCommand):
     help = 'Clear all jobs from the database'
@@ -7,7 +8,8 @@ class Command(BaseCommand):
     def handle(self, *args, **options):
         # Delete all jobs
         deleted_count = Job.objects.all().count()
-        Job.objects.all().delete()
+        with recommendation_registry.deferred_updates():
+            Job.objects.all().delete()
         
         self.stdout.write(
             self.style.SUCCESS(f'Successfully deleted {deleted_count} jobs from the database')
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ml_service.encoders import ensure_onnx_export, onnx_directory
+from ml_service.models import AdvancedJobRecommendationSystem
+
+
+class Command(BaseCommand):
+    help = 'Export the sentence encoder to int8 ONNX for the onnx encoder backend (run when deploying)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Export again even if an export already exists'
+        )
+
+    def handle(self, *args, **options):
+        model_name = AdvancedJobRecommendationSystem.MODEL_NAME
+        directory = onnx_directory(model_name)
+        try:
+            ensure_onnx_export(model_name, directory, force=options['force'])
+        except ImportError as e:
+            raise CommandError(f'The export needs torch, sentence-transformers and onnxruntime: {e}')
+        self.stdout.write(self.style.SUCCESS(f'ONNX encoder for {model_name} ready in {directory}'))
@@ -1,8 +1,15 @@
 import csv
+import itertools
 import os
-from decimal import Decimal
-from django.core.management.base import BaseCommand
+
+from django.core.management.base import BaseCommand, CommandError
+
+from job_service.importing import (
+    DEFAULT_BATCH_SIZE, DEFAULT_EMBED_BATCH_SIZE, ImportCheckpoint, JobEmbedder, JobWriter, Throughput,
+    parse_csv_rows, parse_in_parallel,
+)
 from job_service.models import Job
+from ml_service.registry import recommendation_registry
 
 
 class Command(BaseCommand):
@@ -15,15 +22,59 @@ class Command(BaseCommand):
             default='JobsFE.csv',
             help='Path to the CSV file (default: JobsFE.csv)'
         )
+        self.add_import_arguments(parser)
+
+    def add_import_arguments(self, parser):
+        """Options shared by every feed format"""
         parser.add_argument(
             '--clear',
             action='store_true',
             help='Clear existing jobs before importing'
         )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f'Rows written per transaction (default: {DEFAULT_BATCH_SIZE})'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=min(4, os.cpu_count() or 1),
+            help='Processes parsing rows in parallel; 1 parses inline (default: up to 4)'
+        )
+        parser.add_argument(
+            '--checkpoint',
+            type=str,
+            default=None,
+            help='Progress file (default: <file>.checkpoint)'
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Skip the rows an interrupted import already committed, as recorded in the checkpoint'
+        )
+        parser.add_argument(
+            '--embed',
+            action='store_true',
+            help='Encode imported jobs into the embedding store during the import and prepare the '
+                 'index artifacts, so the first request does not pay for it'
+        )
+        parser.add_argument(
+            '--embed-batch-size',
+            type=int,
+            default=DEFAULT_EMBED_BATCH_SIZE,
+            help=f'Jobs per embedding store update with --embed (default: {DEFAULT_EMBED_BATCH_SIZE})'
+        )
+        parser.add_argument(
+            '--embed-workers',
+            type=int,
+            default=1,
+            help='Embedding groups encoded concurrently with --embed (default: 1)'
+        )
 
     def handle(self, *args, **options):
         file_path = options['file']
-        clear_existing = options['clear']
 
         # Check if file exists
         if not os.path.exists(file_path):
@@ -31,102 +82,99 @@ class Command(BaseCommand):
                 self.style.ERROR(f'File {file_path} not found!')
             )
             return
-
-        # Clear existing jobs if requested
-        if clear_existing:
-            Job.objects.all().delete()
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+        if options['clear'] and options['resume']:
+            # The skipped rows were written by the interrupted run; clearing would lose them
+            raise CommandError('--clear cannot be combined with --resume')
+
+        checkpoint = ImportCheckpoint(options['checkpoint'] or f'{file_path}.checkpoint', file_path)
+        if options['resume']:
+            try:
+                checkpoint.load()
+            except ValueError as e:
+                raise CommandError(str(e))
+            if checkpoint.rows_done:
+                self.stdout.write(f'Resuming after {checkpoint.rows_done} rows')
+
+        if options['clear']:
+            # Clear existing jobs if requested
+            with recommendation_registry.deferred_updates():
+                Job.objects.all().delete()
             self.stdout.write(
                 self.style.SUCCESS('Cleared existing jobs.')
             )
 
-        # Import jobs
-        imported_count = 0
+        writer = JobWriter(options['batch_size'])
+        if checkpoint.rows_done:
+            # Jobs written by the interrupted run were never published
+            writer.require_full_rebuild()
+        embedder = None
+        if options['embed']:
+            try:
+                embedder = JobEmbedder(options['embed_batch_size'], options['embed_workers'])
+            except RuntimeError as e:
+                raise CommandError(str(e))
+        try:
+            self.import_jobs(file_path, writer, checkpoint, options['batch_size'], options['workers'], embedder)
+            if embedder is not None:
+                self.prepare_index(embedder)
+        except RuntimeError as e:
+            raise CommandError(str(e))
+        finally:
+            if embedder is not None:
+                embedder.close()
+            # Publish all row changes to the recommendation index as one batch
+            writer.publish()
+
+    def prepare_index(self, embedder):
+        """Finish encoding, then build the index and TF-IDF artifacts from the stored vectors"""
+        embedder.finish()
+        self.stdout.write(f'Encoded {embedder.encoded} new or changed jobs')
+        # Every vector is stored now, so the rebuild encodes nothing
+        system = recommendation_registry.rebuild()
+        # Refresh the saved TF-IDF model now rather than on the first request
+        system._build_tfidf_features()
+        self.stdout.write(self.style.SUCCESS(f'Index ready for {len(system)} jobs'))
+
+    def import_jobs(self, file_path, writer, checkpoint, batch_size, workers, embedder=None):
+        """Stream the CSV file through the parse workers into batched upserts"""
+        try:
+            with open(file_path, 'r', encoding='utf-8', newline='') as csvfile:
+                rows = itertools.islice(csv.DictReader(csvfile), checkpoint.rows_done, None)
+                chunks = iter(lambda: list(itertools.islice(rows, batch_size)), [])
+                self.write_chunks(parse_in_parallel(chunks, parse_csv_rows, workers), writer, checkpoint, embedder)
+        except (csv.Error, UnicodeDecodeError) as e:
+            raise CommandError(f'Error reading CSV file at row {checkpoint.rows_done + 1}: {e}')
+
+    def write_chunks(self, parsed_chunks, writer, checkpoint, embedder=None):
+        """Write ``(chunk, (jobs, skipped, errors))`` pairs, checkpointing after each chunk"""
+        first_row = rows_done = checkpoint.rows_done
         skipped_count = 0
         error_count = 0
-
-        try:
-            with open(file_path, 'r', encoding='utf-8') as csvfile:
-                reader = csv.DictReader(csvfile)
-                
-                for row in reader:
-                    try:
-                        # Clean and validate data
-                        job_id = row.get('Job Id', '').strip()
-                        workplace = row.get('workplace', '').strip()
-                        working_mode = row.get('working_mode', '').strip().lower()
-                        salary = row.get('salary', '').strip()
-                        position = row.get('position', '').strip()
-                        job_role_and_duties = row.get('job_role_and_duties', '').strip()
-                        requisite_skill = row.get('requisite_skill', '').strip()
-                        offer_details = row.get('offer_details', '').strip()
-
-                        # Skip if essential fields are empty
-                        if not position or not workplace:
-                            skipped_count += 1
-                            continue
-
-                        # Map working mode to choices
-                        working_mode_mapping = {
-                            'full time': 'full_time',
-                            'part time': 'part_time',
-                            'contract': 'contract',
-                            'freelance': 'freelance',
-                            'internship': 'internship',
-                            'remote': 'remote',
-                        }
-                        
-                        working_mode = working_mode_mapping.get(working_mode, 'full_time')
-
-                        # Parse salary
-                        salary_min = None
-                        salary_max = None
-                        if salary:
-                            try:
-                                # Remove currency symbols and commas
-                                salary_clean = salary.replace('$', '').replace(',', '').replace('£', '').replace('€', '')
-                                if '-' in salary_clean:
-                                    parts = salary_clean.split('-')
-                                    if len(parts) == 2:
-                                        salary_min = Decimal(parts[0].strip())
-                                        salary_max = Decimal(parts[1].strip())
-                                else:
-                                    salary_min = Decimal(salary_clean)
-                                    salary_max = salary_min
-                            except (ValueError, TypeError):
-                                pass
-
-                        # Create job object
-                        job = Job(
-                            position=position,
-                            workplace=workplace,
-                            working_mode=working_mode,
-                            job_role_and_duties=job_role_and_duties,
-                            requisite_skill=requisite_skill,
-                            salary_min=salary_min,
-                            salary_max=salary_max,
-                            location=workplace,  # Use workplace as location
-                        )
-                        
-                        job.save()
-                        imported_count += 1
-
-                        # Progress indicator
-                        if imported_count % 100 == 0:
-                            self.stdout.write(f'Imported {imported_count} jobs...')
-
-                    except Exception as e:
-                        error_count += 1
-                        self.stdout.write(
-                            self.style.WARNING(f'Error importing row: {e}')
-                        )
-
-            self.stdout.write(
-                self.style.SUCCESS(
-                    f'Import completed! Imported: {imported_count}, Skipped: {skipped_count}, Errors: {error_count}'
+        throughput = Throughput()
+
+        for chunk, (jobs, skipped, errors) in parsed_chunks:
+            saved = writer.write(jobs)
+            if embedder is not None:
+                embedder.add(saved)
+            rows_done += len(chunk)
+            checkpoint.save(rows_done)
+            skipped_count += skipped
+            error_count += len(errors)
+            for error in errors:
+                self.stdout.write(
+                    self.style.WARNING(f'Error importing row: {error}')
                 )
+            self.stdout.write(
+                f'Imported {writer.written} jobs from {rows_done} rows '
+                f'({throughput.rate(rows_done - first_row):.0f} rows/s)...'
             )
 
-        except Exception as e:
-            self.stdout.write(
-                self.style.ERROR(f'Error reading CSV file: {e}')
-            ) 
\ No newline at end of file
+        checkpoint.clear()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Import completed! Imported: {writer.written}, Skipped: {skipped_count}, Errors: {error_count} '
+                f'({throughput.rate(rows_done - first_row):.0f} rows/s)'
+            )
+        )
@@ -0,0 +1,40 @@
+from django.core.management.base import CommandError
+
+from job_service.feeds import FORMATS, feed_format, parse_feed_frame, read_feed
+from job_service.importing import parse_in_parallel
+from job_service.management.commands.import_csv_jobs import Command as ImportCsvCommand
+
+
+class Command(ImportCsvCommand):
+    help = 'Import jobs from a Parquet or JSON-lines feed with the JobsFE.csv columns'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--file',
+            type=str,
+            required=True,
+            help='Path to the feed file'
+        )
+        parser.add_argument(
+            '--format',
+            choices=sorted(set(FORMATS.values())),
+            default=None,
+            help='Feed format (default: from the file extension)'
+        )
+        self.add_import_arguments(parser)
+
+    def handle(self, *args, **options):
+        try:
+            self.file_format = options['format'] or feed_format(options['file'])
+        except ValueError as e:
+            raise CommandError(str(e))
+        super().handle(*args, **options)
+
+    def import_jobs(self, file_path, writer, checkpoint, batch_size, workers, embedder=None):
+        """Stream the feed in DataFrames of ``batch_size`` rows through the parse workers into batched upserts"""
+        frames = read_feed(file_path, self.file_format, batch_size, skip=checkpoint.rows_done)
+        try:
+            self.write_chunks(parse_in_parallel(frames, parse_feed_frame, workers), writer, checkpoint, embedder)
+        except ValueError as e:
+            # Malformed JSON and invalid Parquet (pyarrow.ArrowInvalid) are ValueErrors
+            raise CommandError(f'Error reading {file_path} after row {checkpoint.rows_done}: {e}')
@@ -1,5 +1,6 @@
 from django.core.management.base import BaseCommand
 from job_service.models import Job
+from ml_service.registry import recommendation_registry
 
 class Command(BaseCommand):
     help = 'Populate database with 50 sample job data'
@@ -528,19 +529,20 @@ class Command(BaseCommand):
             },
         ]
 
-        # Create jobs
+        # Create jobs, publishing them to the recommendation index as one batch
         created_count = 0
-        for job_data in sample_jobs:
-            job, created = Job.objects.get_or_create(
-                position=job_data['position'],
-                workplace=job_data['workplace'],
-                defaults=job_data
-            )
-            if created:
-                created_count += 1
-                self.stdout.write(
-                    self.style.SUCCESS(f'Created job: {job.position} at {job.workplace}')
+        with recommendation_registry.deferred_updates():
+            for job_data in sample_jobs:
+                job, created = Job.objects.get_or_create(
+                    position=job_data['position'],
+                    workplace=job_data['workplace'],
+                    defaults=job_data
                 )
+                if created:
+                    created_count += 1
+                    self.stdout.write(
+                        self.style.SUCCESS(f'Created job: {job.position} at {job.workplace}')
+                    )
 
         self.stdout.write(
             self.style.SUCCESS(f'Successfully created {created_count} new jobs')
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ml_service.conf import encoder_authkey, get_setting
+from ml_service.encoder_server import EncoderServer, connect_encoder
+from ml_service.models import AdvancedJobRecommendationSystem
+
+
+class Command(BaseCommand):
+    help = 'Run the shared sentence encoder process that web workers send texts to'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--socket',
+            default=None,
+            help='Unix socket path (default: ML_SERVICE["ENCODER_SERVER"])'
+        )
+        parser.add_argument(
+            '--status',
+            action='store_true',
+            help='Print queue depth and batching counters of the running server and exit'
+        )
+
+    def handle(self, *args, **options):
+        address = options['socket'] or get_setting('ENCODER_SERVER')
+        if not address:
+            raise CommandError('Set ML_SERVICE["ENCODER_SERVER"] or pass --socket.')
+
+        if options['status']:
+            encoder = connect_encoder(address, encoder_authkey())
+            if encoder is None:
+                raise CommandError(f'No encoder server is answering on {address}')
+            for name, value in encoder.stats().items():
+                self.stdout.write(f'{name}: {value}')
+            return
+
+        encoder = AdvancedJobRecommendationSystem.load_sentence_model()
+        if encoder is None:
+            raise CommandError('The sentence encoder could not be loaded.')
+
+        server = EncoderServer(
+            encoder, address, encoder_authkey(),
+            max_batch=get_setting('ENCODER_SERVER_MAX_BATCH'),
+            max_wait=get_setting('ENCODER_SERVER_MAX_WAIT_MS') / 1000,
+            encode_batch_size=AdvancedJobRecommendationSystem.ENCODE_BATCH_SIZE,
+        )
+        self.stdout.write(self.style.SUCCESS(f'Encoder server listening on {address}'))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            server.close()
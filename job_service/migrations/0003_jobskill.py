@@ -0,0 +1,25 @@
+# Generated by Django 5.0.2 on 2026-10-17 01:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job_service', '0002_jobdescription'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobSkill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('skill_id', models.CharField(db_index=True, max_length=100)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='skills', to='job_service.job')),
+            ],
+            options={
+                'unique_together': {('job', 'skill_id')},
+            },
+        ),
+    ]
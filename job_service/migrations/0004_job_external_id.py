@@ -0,0 +1,18 @@
+# Generated by Django 5.0.2 on 2026-10-17 01:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('job_service', '0003_jobskill'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='external_id',
+            field=models.CharField(blank=True, max_length=100, null=True, unique=True),
+        ),
+    ]
@@ -1,4 +1,9 @@
 from django.db import models
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from ml_service.registry import recommendation_registry
+from ml_service.skill_index import sync_job_skills
 
 # Create your models here.
 
@@ -20,6 +25,8 @@ class Job(models.Model):
     salary_min = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
     salary_max = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
     location = models.CharField(max_length=255, blank=True)
+    # Id of the job in the feed it was imported from (e.g. the CSV 'Job Id'); imports upsert on it
+    external_id = models.CharField(max_length=100, unique=True, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     is_active = models.BooleanField(default=True)
     
@@ -76,3 +83,31 @@ class JobDescription(models.Model):
     def job_text(self):
         """Combine job fields for ML processing"""
         return f"{self.workplace} {self.working_mode} {self.position} {self.job_role_and_duties} {self.requisite_skill}"
+
+
+class JobSkill(models.Model):
+    """Canonical skill mentioned by a job (see ml_service.skills); one row per pair"""
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='skills')
+    skill_id = models.CharField(max_length=100, db_index=True)
+    
+    class Meta:
+        unique_together = [('job', 'skill_id')]
+    
+    def __str__(self):
+        return f"{self.skill_id} ({self.job_id})"
+
+
+# Connected before update_recommendation_index, so the skill rows are
+# written before other processes are told the job changed
+@receiver(post_save, sender=Job)
+def update_job_skills(sender, instance, raw=False, **kwargs):
+    """Store the job's skill set for the keyword fallback's inverted index"""
+    if not raw:
+        sync_job_skills([instance])
+
+
+@receiver(post_save, sender=Job)
+@receiver(post_delete, sender=Job)
+def update_recommendation_index(sender, instance, **kwargs):
+    """Queue the job for an incremental update of the shared job index"""
+    recommendation_registry.job_changed(instance.pk)
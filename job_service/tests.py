@@ -1,3 +1,371 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from job_service.feeds import parse_feed_frame, read_feed
+from job_service.importing import ImportCheckpoint, JobEmbedder, JobWriter, parse_csv_rows, parse_in_parallel
+from job_service.models import Job, JobSkill
+from job_service.views import get_candidate_recommendations_from_text
+from ml_service.benchmark import HashingEncoder, SyntheticJob
+from ml_service.embedding_store import JobEmbeddingStore
+from ml_service.filters import JobFilters
+from ml_service.models import AdvancedJobRecommendationSystem, CandidateRecommendationSystem
+from ml_service.registry import candidate_registry
+from resume_service.models import Resume
+
+
+class FeedParsingTests(SimpleTestCase):
+    def read_jsonl(self, rows, batch_size=10):
+        with tempfile.NamedTemporaryFile('w', suffix='.jsonl', delete=False, encoding='utf-8') as f:
+            for row in rows:
+                f.write(json.dumps(row) + '\n')
+        self.addCleanup(os.remove, f.name)
+        parsed = []
+        for frame in read_feed(f.name, 'jsonl', batch_size):
+            jobs, _, errors = parse_feed_frame(frame)
+            self.assertEqual(errors, [])
+            parsed.extend(fields for fields, _ in jobs)
+        return parsed
+
+    def test_chunk_without_ranged_salary(self):
+        jobs = self.read_jsonl([
+            {'position': 'Developer', 'workplace': 'Acme', 'salary': 'abc'},
+            {'position': 'Tester', 'workplace': 'Acme', 'salary': ''},
+            {'position': 'Analyst', 'workplace': 'Acme', 'salary': '$50,000'},
+        ])
+        self.assertEqual(
+            [(job['salary_min'], job['salary_max']) for job in jobs],
+            [(None, None), (None, None), (Decimal('50000'), Decimal('50000'))],
+        )
+
+    def test_feed_without_salary_column(self):
+        jobs = self.read_jsonl([{'position': 'Developer', 'workplace': 'Acme', 'Job Id': 'J1'}])
+        self.assertEqual(len(jobs), 1)
+        self.assertIsNone(jobs[0]['salary_min'])
+        self.assertIsNone(jobs[0]['salary_max'])
+        self.assertEqual(jobs[0]['external_id'], 'J1')
+
+    def test_ranged_salaries_match_csv_parsing(self):
+        jobs = self.read_jsonl([
+            {'position': 'Developer', 'workplace': 'Acme', 'salary': '40000-60000'},
+            {'position': 'Developer', 'workplace': 'Acme', 'salary': '40000-abc'},
+            {'position': 'Developer', 'workplace': 'Acme', 'salary': '1-2-3'},
+        ])
+        self.assertEqual(
+            [(job['salary_min'], job['salary_max']) for job in jobs],
+            [(Decimal('40000'), Decimal('60000')), (None, None), (None, None)],
+        )
+
+    def test_rows_without_position_or_workplace_are_skipped(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.jsonl', delete=False, encoding='utf-8') as f:
+            f.write(json.dumps({'position': '', 'workplace': 'Acme'}) + '\n')
+            f.write(json.dumps({'position': 'Developer', 'workplace': 'Acme'}) + '\n')
+        self.addCleanup(os.remove, f.name)
+        frame, = read_feed(f.name, 'jsonl', 10)
+        jobs, skipped, _ = parse_feed_frame(frame)
+        self.assertEqual((len(jobs), skipped), (1, 1))
+
+
+class BackfillJobSkillsTests(TestCase):
+    @mock.patch('job_service.management.commands.backfill_job_skills.recommendation_registry')
+    def test_skills_of_every_job_are_extracted(self, registry):
+        jobs = [
+            Job.objects.create(position=f'Developer {i}', workplace='Acme', working_mode='full_time',
+                               job_role_and_duties='Maintain CI/CD pipelines', requisite_skill=skills,
+                               location='Remote')
+            for i, skills in enumerate(['Python, Git', 'C++ and C#', 'Retail manager'])
+        ]
+        JobSkill.objects.all().delete()
+        JobSkill.objects.create(job=jobs[2], skill_id='stale')
+
+        call_command('backfill_job_skills', batch_size=2, stdout=io.StringIO())
+
+        skills = {job.pk: set(job.skills.values_list('skill_id', flat=True)) for job in jobs}
+        self.assertEqual(skills[jobs[0].pk], {'python', 'git', 'ci_cd'})
+        self.assertEqual(skills[jobs[1].pk], {'cpp', 'csharp', 'ci_cd'})
+        self.assertEqual(skills[jobs[2].pk], {'ci_cd'})
+        registry.invalidate.assert_called_once_with()
+
+
+def csv_row(job_id, position, skills='Python', salary='40000-60000'):
+    return {
+        'Job Id': job_id, 'position': position, 'workplace': 'Acme', 'working_mode': 'Full Time',
+        'job_role_and_duties': 'Build services', 'requisite_skill': skills, 'salary': salary,
+    }
+
+
+@mock.patch('job_service.importing.recommendation_registry')
+class JobImportTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def write_csv(self, rows, name='jobs.csv'):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(csv_row('', '')))
+            writer.writeheader()
+            writer.writerows(rows)
+        return path
+
+    def import_csv(self, path, **options):
+        call_command('import_csv_jobs', file=path, workers=1, stdout=io.StringIO(), **options)
+
+    def write(self, rows, writer=None):
+        writer = writer or JobWriter()
+        jobs, _, errors = parse_csv_rows(rows)
+        self.assertEqual(errors, [])
+        return writer.write(jobs)
+
+    def test_existing_external_id_is_updated(self, registry):
+        first, = self.write([csv_row('J1', 'Developer', skills='Python')])
+        second, = self.write([csv_row('J1', 'Senior Developer', skills='Go, Rust, Docker', salary='90000')])
+        self.assertEqual(first.pk, second.pk)
+        job = Job.objects.get()
+        self.assertEqual((job.position, job.salary_min, job.salary_max),
+                         ('Senior Developer', Decimal('90000'), Decimal('90000')))
+        self.assertNotIn('python', set(job.skills.values_list('skill_id', flat=True)))
+
+    def test_repeated_id_in_one_batch_keeps_the_last_row(self, registry):
+        saved = self.write([csv_row('J1', 'Developer'), csv_row('J2', 'Tester'), csv_row('J1', 'Architect')])
+        self.assertEqual(len(saved), 2)
+        self.assertEqual(sorted(Job.objects.values_list('external_id', 'position')),
+                         [('J1', 'Architect'), ('J2', 'Tester')])
+
+    def test_pks_are_selected_when_the_backend_cannot_return_them(self, registry):
+        bulk_create = Job.objects.bulk_create
+
+        def without_pks(jobs, **kwargs):
+            jobs = bulk_create(jobs, **kwargs)
+            for job in jobs:
+                job.pk = None
+            return jobs
+
+        self.write([csv_row('J1', 'Developer')])
+        writer = JobWriter()
+        with mock.patch.object(Job.objects, 'bulk_create', side_effect=without_pks):
+            saved = self.write([csv_row('J1', 'Architect'), csv_row('J2', 'Tester')], writer)
+            self.assertEqual([job.pk for job in saved],
+                             [Job.objects.get(external_id=key).pk for key in ('J1', 'J2')])
+            self.assertFalse(JobSkill.objects.filter(job__isnull=True).exists())
+            self.assertEqual(JobSkill.objects.filter(job__external_id='J2').count(), 1)
+
+            with self.assertRaises(RuntimeError):
+                self.write([csv_row('', 'No id')], writer)
+        writer.publish()
+        registry.notify_changed.assert_called_once_with({job.pk for job in saved})
+
+    def test_publish_rebuilds_past_the_notified_id_limit(self, registry):
+        with mock.patch('job_service.importing.MAX_NOTIFIED_IDS', 2):
+            writer = JobWriter()
+            self.write([csv_row('J1', 'Developer'), csv_row('J2', 'Tester')], writer)
+            writer.publish()
+            registry.notify_changed.assert_called_once()
+            registry.invalidate.assert_not_called()
+
+            self.write([csv_row(f'K{i}', 'Developer') for i in range(3)], writer)
+            writer.publish()
+        registry.invalidate.assert_called_once_with()
+        registry.notify_changed.assert_called_once()
+
+    def test_checkpoint_rejects_a_modified_file(self, registry):
+        path = self.write_csv([csv_row('J1', 'Developer')])
+        checkpoint = ImportCheckpoint(f'{path}.checkpoint', path)
+        checkpoint.save(1)
+        self.assertEqual(ImportCheckpoint(checkpoint.path, path).load().rows_done, 1)
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write('J2,Tester,Acme,Full Time,,,\n')
+        with self.assertRaises(ValueError):
+            ImportCheckpoint(checkpoint.path, path).load()
+
+    def test_resume_skips_committed_rows(self, registry):
+        path = self.write_csv([csv_row(f'J{i}', f'Developer {i}') for i in range(5)])
+        ImportCheckpoint(f'{path}.checkpoint', path).save(2)
+        self.import_csv(path, resume=True, batch_size=2)
+        self.assertEqual(sorted(Job.objects.values_list('external_id', flat=True)), ['J2', 'J3', 'J4'])
+        self.assertFalse(os.path.exists(f'{path}.checkpoint'))
+        # Jobs of the interrupted run were never published
+        registry.invalidate.assert_called_once_with()
+
+    def test_embed_prepares_the_index(self, registry):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        registry.get_encoder.return_value = HashingEncoder(dim=16)
+        registry.get_embedding_store.return_value = store = JobEmbeddingStore(directory, 'test-model')
+        path = self.write_csv([csv_row(f'J{i}', f'Developer {i}') for i in range(3)])
+
+        system = mock.MagicMock()
+
+        def rebuild():
+            # Every job is encoded before the index is rebuilt
+            self.assertEqual(len(store), 3)
+            return system
+
+        with mock.patch('job_service.management.commands.import_csv_jobs.recommendation_registry') as command_registry:
+            command_registry.rebuild.side_effect = rebuild
+            self.import_csv(path, embed=True, embed_batch_size=2)
+        self.assertEqual(sorted(store.ids.tolist()), sorted(Job.objects.values_list('pk', flat=True)))
+        command_registry.rebuild.assert_called_once_with()
+        system._build_tfidf_features.assert_called_once_with()
+
+    def test_clear_cannot_be_combined_with_resume(self, registry):
+        path = self.write_csv([csv_row('J1', 'Developer')])
+        Job.objects.create(position='Kept', workplace='Acme', working_mode='full_time',
+                           job_role_and_duties='', requisite_skill='')
+        with self.assertRaises(CommandError):
+            self.import_csv(path, resume=True, clear=True)
+        self.assertTrue(Job.objects.filter(position='Kept').exists())
+
+
+class ParseInParallelTests(SimpleTestCase):
+    def test_chunks_keep_input_order_with_workers(self):
+        chunks = [list(range(i)) for i in range(20, 0, -1)]
+        results = list(parse_in_parallel(iter(chunks), sum, workers=2))
+        self.assertEqual(results, [(chunk, sum(chunk)) for chunk in chunks])
+
+
+class RecordingEncoder(HashingEncoder):
+    """HashingEncoder that records what it encodes; texts mentioning 'slow' take a while"""
+
+    def __init__(self):
+        super().__init__(dim=16)
+        self.encoded = []
+        self._lock = threading.Lock()
+
+    def encode(self, sentences, *args, **kwargs):
+        if any('slow' in sentence for sentence in sentences):
+            threading.Event().wait(0.2)
+        with self._lock:
+            self.encoded.extend(sentences)
+        return super().encode(sentences, *args, **kwargs)
+
+
+def synthetic_job(pk, duties='build services'):
+    return SyntheticJob(pk, 'Developer', 'Acme', 'full_time', duties, 'Python', None, None, 'Remote')
+
+
+class JobEmbedderTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.store = JobEmbeddingStore(directory, 'test-model')
+        self.encoder = RecordingEncoder()
+        registry = mock.patch('job_service.importing.recommendation_registry')
+        registry = registry.start()
+        self.addCleanup(mock.patch.stopall)
+        registry.get_encoder.return_value = self.encoder
+        registry.get_embedding_store.return_value = self.store
+
+    def embed(self, groups, batch_size=2, workers=1):
+        embedder = JobEmbedder(batch_size, workers)
+        try:
+            for jobs in groups:
+                embedder.add(jobs)
+            embedder.finish()
+        finally:
+            embedder.close()
+        return embedder
+
+    def expected_vectors(self, jobs):
+        texts = [AdvancedJobRecommendationSystem._job_text(job) for job in jobs]
+        return AdvancedJobRecommendationSystem.encode_with(HashingEncoder(dim=16), texts)
+
+    def test_imported_jobs_land_in_the_store(self):
+        jobs = [synthetic_job(pk, f'duty {pk}') for pk in (4, 2, 7, 5, 1)]
+        embedder = self.embed([jobs[:3], jobs[3:]])
+        self.assertEqual(embedder.encoded, 5)
+        self.assertEqual(self.store.ids.tolist(), [4, 2, 7, 5, 1])
+        np.testing.assert_allclose(self.store.get([job.pk for job in jobs]), self.expected_vectors(jobs), atol=1e-6)
+
+    def test_unchanged_texts_are_not_reencoded(self):
+        jobs = [synthetic_job(pk, f'duty {pk}') for pk in (1, 2, 3)]
+        self.embed([jobs])
+        self.encoder.encoded.clear()
+
+        changed = synthetic_job(2, 'new duties')
+        embedder = self.embed([[jobs[0], changed, jobs[2]]])
+        self.assertEqual(self.encoder.encoded, [AdvancedJobRecommendationSystem._job_text(changed)])
+        self.assertEqual(embedder.encoded, 1)
+        np.testing.assert_allclose(self.store.get([2]), self.expected_vectors([changed]), atol=1e-6)
+
+    def test_groups_are_stored_in_import_order(self):
+        # The first group encodes slowly, so with two workers the second finishes first;
+        # job 1 appears in both, and its later text must win
+        first = [synthetic_job(1, 'slow duties'), synthetic_job(2)]
+        second = [synthetic_job(3), synthetic_job(1, 'final duties')]
+        self.embed([first, second], batch_size=2, workers=2)
+        self.assertEqual(self.store.ids.tolist(), [2, 3, 1])
+        np.testing.assert_allclose(self.store.get([1]), self.expected_vectors([second[1]]), atol=1e-6)
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'job-tests'}},
+    ML_SERVICE={'CACHE_ALIAS': 'default'},
+)
+class CandidateMatchingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user('employer', password='secret')
+        resumes = [
+            # (title, owner, active, extracted text)
+            ('Anonymous python', None, True, 'Python developer with Django and PostgreSQL'),
+            ('Anonymous java', None, True, 'Java engineer building Spring services'),
+            ('Registered', user, True, 'Python developer with Django'),
+            ('Inactive', None, False, 'Python developer with Django'),
+            ('Empty text', None, True, ''),
+            ('No text', None, True, None),
+        ]
+        cls.resumes = {
+            title: Resume.objects.create(title=title, user=owner, is_active=active, extracted_text=text,
+                                         file=f'resumes/{title}.pdf')
+            for title, owner, active, text in resumes
+        }
+
+    def setUp(self):
+        from django.core.cache import caches
+
+        caches['default'].clear()
+        self.system = CandidateRecommendationSystem(
+            candidate_registry._queryset().iterator(), sentence_model=HashingEncoder(dim=32)
+        )
+        registry = mock.patch('job_service.views.candidate_registry').start()
+        self.addCleanup(mock.patch.stopall)
+        registry.get_system.return_value = self.system
+        registry.catalogue_version = '1-0'
+
+    def test_only_anonymous_active_resumes_with_text_are_indexed(self):
+        self.assertEqual(sorted(self.system.catalogue.ids.tolist()),
+                         sorted(self.resumes[title].pk for title in ('Anonymous python', 'Anonymous java')))
+
+    def test_candidates_for_a_job_text(self):
+        candidates = get_candidate_recommendations_from_text('Python developer with Django')
+        self.assertEqual(candidates[0]['resume_id'], self.resumes['Anonymous python'].pk)
+        self.assertEqual(candidates[0]['filename'], 'Anonymous python.pdf')
+        self.assertEqual({candidate['resume_id'] for candidate in candidates},
+                         {self.resumes[title].pk for title in ('Anonymous python', 'Anonymous java')})
+
+    def test_job_filters_are_rejected_and_handled(self):
+        with self.assertRaises(ValueError):
+            self.system.recommend_many(['python'], filters=JobFilters(working_mode='remote'))
+
+        # The single-query entry points log it and return no candidates
+        with self.assertLogs('ml_service.models', 'ERROR'):
+            self.assertEqual(self.system.get_hybrid_recommendations('python', filters=JobFilters(location='x')), [])
+
+        error = ValueError('Job filters do not apply to candidate recommendations')
+        with mock.patch.object(self.system, 'get_hybrid_recommendations', side_effect=error):
+            with self.assertLogs('job_service.views', 'ERROR'):
+                self.assertEqual(get_candidate_recommendations_from_text('Python developer'), [])
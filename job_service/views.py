@@ -10,8 +10,10 @@ import json
 from .models import Job, JobDescription
 from .forms import JobDescriptionForm, JobForm
 
-# Import advanced ML system
-from ml_service.models import AdvancedJobRecommendationSystem
+# Shared, prebuilt candidate (resume) index
+from ml_service.cache import recommendation_cache
+from ml_service.registry import candidate_registry
+from ml_service.timing import timed
 
 logger = logging.getLogger(__name__)
 
@@ -63,30 +65,9 @@ def job_description_detail(request, job_id):
 
 def get_candidate_recommendations(job_description, top_n=20):
     """Get candidate recommendations for a job description"""
-    try:
-        from resume_service.models import Resume
-        
-        # Get all resumes from database
-        resumes = Resume.objects.filter(user__isnull=True)  # Anonymous resumes
-        
-        if resumes.count() == 0:
-            return []
-        
-        # Initialize ML system with resumes
-        ml_system = AdvancedJobRecommendationSystem(resumes)
-        
-        # Get job text for matching
-        job_text = job_description.job_text
-        
-        # Get candidate recommendations using hybrid method
-        candidates = ml_system.get_hybrid_recommendations(job_text, top_n)
-        
-        logger.info(f"Found {len(candidates)} candidate recommendations for job: {job_description.position}")
-        return candidates
-        
-    except Exception as e:
-        logger.error(f"Error getting candidate recommendations: {str(e)}")
-        return []
+    candidates = get_candidate_recommendations_from_text(job_description.job_text, top_n)
+    logger.info(f"Found {len(candidates)} candidate recommendations for job: {job_description.position}")
+    return candidates
 
 def job_list(request):
     """List all jobs with filtering"""
@@ -154,19 +135,26 @@ def api_get_candidates(request):
 def get_candidate_recommendations_from_text(job_text, top_n=20):
     """Get candidate recommendations from job text"""
     try:
-        from resume_service.models import Resume
-        
-        resumes = Resume.objects.filter(user__isnull=True)
+        # Reuse the process-wide resume index; only the job text is encoded per request
+        ml_system = candidate_registry.get_system()
         
-        if resumes.count() == 0:
+        if len(ml_system) == 0:
             return []
         
-        # Initialize ML system
-        ml_system = AdvancedJobRecommendationSystem(resumes)
+        # Repeated job descriptions are served from the result cache
+        cache_key = recommendation_cache.key(
+            ml_system._clean_text(job_text), 'candidates', top_n, None, candidate_registry.catalogue_version
+        )
+        with timed('cache'):
+            cached = recommendation_cache.get_many([cache_key])
+        if cache_key in cached:
+            return cached[cache_key]
         
         # Get recommendations
         candidates = ml_system.get_hybrid_recommendations(job_text, top_n)
         
+        if candidates:
+            recommendation_cache.set_many({cache_key: candidates})
         return candidates
         
     except Exception as e:
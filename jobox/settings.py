@@ -48,6 +48,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so the total in its Server-Timing header covers every other middleware
+    'ml_service.timing.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -135,6 +137,51 @@ MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 
+# ML service (job recommendation engine)
+ML_SERVICE = {
+    'ARTIFACT_DIR': os.path.join(BASE_DIR, 'ml_artifacts'),
+    # Approximate search for large catalogues: 'flat', 'sq8', 'pq', 'ivf_flat', 'ivf_sq8', 'ivf_pq' or 'hnsw'
+    'INDEX_BACKEND': 'flat',
+    'EXACT_SEARCH_THRESHOLD': 10000,
+    'IVF_NPROBE': 16,
+    'HNSW_EF_SEARCH': 64,
+    # One sub-index per working mode and/or region, e.g. ('working_mode', 'region')
+    'INDEX_SHARD_KEYS': (),
+    # How hybrid recommendations combine TF-IDF and semantic scores: 'weighted' or 'rrf'
+    'HYBRID_FUSION': 'weighted',
+    'HYBRID_WEIGHTS': {'tfidf': 0.5, 'semantic': 0.5},
+    # Sentence encoder: 'onnx' (run manage.py export_encoder when deploying; falls
+    # back to 'torch' when onnxruntime is missing or the model is not exported)
+    'ENCODER_BACKEND': 'onnx',
+    # Socket of a shared encoder process (manage.py run_encoder_server), e.g.
+    # os.path.join(BASE_DIR, 'ml_artifacts', 'encoder.sock'); None = per worker
+    'ENCODER_SERVER': None,
+    # Repeated resumes are answered from this cache until the job catalogue changes
+    'CACHE_ALIAS': 'recommendations',
+    'RESULT_CACHE_TTL': 600,
+    'EMBEDDING_CACHE_TTL': 3600,
+    # Stage timings in Server-Timing headers and logs
+    'TIMING_ENABLED': DEBUG,
+    # Histograms at /metrics/ for a Prometheus scraper. Behind a reverse proxy
+    # every client looks local, so set METRICS_TOKEN (and METRICS_ALLOWED_IPS
+    # to None) or block /metrics/ at the proxy before enabling it
+    'METRICS_ENABLED': False,
+    'METRICS_TOKEN': None,
+}
+
+# Caches (local memory needs no external service; swap in a file or Redis
+# backend to share entries between worker processes)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'recommendations': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'ml-recommendations',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -20,6 +20,7 @@ from django.conf import settings
 from django.conf.urls.static import static
 from resume_service import views as resume_views
 from job_service import views as job_views
+from ml_service.timing import metrics
 
 urlpatterns = [
     # Django's default admin (optional – for developers only)
@@ -46,6 +47,9 @@ urlpatterns = [
     # Job service
     path('jobs/', include('job_service.urls')),
     
+    # Recommendation timing histograms (Prometheus text, local clients only)
+    path('metrics/', metrics, name='metrics'),
+    
     # Other services (commented out for now)
     # path('api/application/', include('application_service.urls')),
     # path('api/interview/', include('interview_service.urls')),
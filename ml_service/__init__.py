@@ -1 +1,45 @@
-# ML Service for advanced job matching 
\ No newline at end of file
+# ML Service for advanced job matching
+"""Lazy facade over the ML service.
+
+Importing ``ml_service`` (or its light modules: conf, registry, cache,
+filters, skills, timing) must stay cheap, because every web worker and
+management command does it. Heavy libraries (faiss, sklearn, torch, onnxruntime, ...) are only
+imported when one of the names below is first used.
+"""
+import importlib
+
+# Public name -> module that defines it, imported on first attribute access
+_LAZY_ATTRIBUTES = {
+    'AdvancedJobRecommendationSystem': 'ml_service.models',
+    'CandidateRecommendationSystem': 'ml_service.models',
+    'JobVectorIndex': 'ml_service.index',
+    'JobEmbeddingStore': 'ml_service.embedding_store',
+    'TfidfArtifactStore': 'ml_service.tfidf_store',
+    'JobFilters': 'ml_service.filters',
+    'SkillTaxonomy': 'ml_service.skills',
+    'recommendation_registry': 'ml_service.registry',
+    'candidate_registry': 'ml_service.registry',
+    'recommendation_cache': 'ml_service.cache',
+}
+
+# Modules that must not be loaded by Django startup or URL resolution
+# (enforced by ``manage.py check_import_budget``)
+HEAVY_MODULES = (
+    'torch', 'faiss', 'sklearn', 'scipy', 'pandas', 'sentence_transformers',
+    'transformers', 'onnxruntime', 'joblib',
+)
+
+__all__ = sorted(_LAZY_ATTRIBUTES) + ['HEAVY_MODULES']
+
+
+def __getattr__(name):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
@@ -0,0 +1,295 @@
+"""Quality and latency benchmarks for the recommendation methods.
+
+Synthetic, labelled corpora make runs reproducible at any catalogue size:
+every job belongs to a job family and a specialisation within it, and each
+resume is written for one specialisation. A recommended job is relevant
+with grade 2 when it matches the resume's specialisation and grade 1 when
+it only matches the family. Each family and specialisation also names one
+taxonomy skill, so the skill-overlap ('simple') method is graded on the
+same labels.
+
+``manage.py benchmark_recommendations`` drives these helpers and writes
+JSON reports; ``benchmarks/`` holds the same measurements as
+pytest-benchmark tests (``pytest benchmarks``). The database-backed
+keyword fallback runs against a throwaway test database
+(``benchmark_database``), never the configured one.
+"""
+import contextlib
+import math
+import resource
+import time
+import zlib
+
+import numpy as np
+
+from .conf import get_setting
+from .skills import get_skill_taxonomy
+
+METHODS = ('tfidf', 'semantic', 'hybrid', 'simple')
+
+WORKING_MODES = ('full_time', 'part_time', 'contract', 'freelance', 'internship', 'remote')
+LOCATIONS = ('New York, NY', 'Austin, TX', 'Denver, CO', 'Seattle, WA', 'Remote', 'Chicago, IL')
+
+
+class SyntheticJob:
+    """Duck-typed stand-in for job_service.models.Job"""
+
+    def __init__(self, pk, position, workplace, working_mode, job_role_and_duties,
+                 requisite_skill, salary_min, salary_max, location):
+        self.pk = pk
+        self.position = position
+        self.workplace = workplace
+        self.working_mode = working_mode
+        self.job_role_and_duties = job_role_and_duties
+        self.requisite_skill = requisite_skill
+        self.salary_min = salary_min
+        self.salary_max = salary_max
+        self.location = location
+
+    @property
+    def job_text(self):
+        return f"{self.workplace} {self.working_mode} {self.position} {self.job_role_and_duties} {self.requisite_skill}"
+
+
+class SyntheticCorpus:
+    """Jobs and resumes drawn from family / specialisation vocabularies"""
+
+    FAMILIES = 30
+    SPECIALISATIONS = 4
+    FAMILY_TERMS = 40
+    SPECIALISATION_TERMS = 12
+    COMMON_TERMS = 300
+
+    def __init__(self, jobs, job_family, job_specialisation, resume_texts, resume_family, resume_specialisation):
+        self.jobs = jobs
+        # Arrays indexed by job id (ids start at 1; index 0 is unused)
+        self.job_family = job_family
+        self.job_specialisation = job_specialisation
+        self.resume_texts = resume_texts
+        self.resume_family = resume_family
+        self.resume_specialisation = resume_specialisation
+
+    @classmethod
+    def generate(cls, n_jobs, n_resumes, seed=0):
+        rng = np.random.default_rng(seed)
+        family_terms = [[f"fam{f}term{t}" for t in range(cls.FAMILY_TERMS)] for f in range(cls.FAMILIES)]
+        specialisation_terms = [
+            [[f"fam{f}spec{s}term{t}" for t in range(cls.SPECIALISATION_TERMS)] for s in range(cls.SPECIALISATIONS)]
+            for f in range(cls.FAMILIES)
+        ]
+        common_terms = [f"common{t}" for t in range(cls.COMMON_TERMS)]
+        # One taxonomy skill per family and one per specialisation, so the
+        # skill-overlap ('simple') method sees the same relevance structure
+        skills = cls.skill_names()
+        family_skill = [skills[f % len(skills)] for f in range(cls.FAMILIES)]
+        specialisation_skill = [
+            [skills[(cls.FAMILIES + f * cls.SPECIALISATIONS + s) % len(skills)] for s in range(cls.SPECIALISATIONS)]
+            for f in range(cls.FAMILIES)
+        ]
+
+        def words(pool, count):
+            return ' '.join(pool[i] for i in rng.integers(len(pool), size=count))
+
+        families = rng.integers(cls.FAMILIES, size=n_jobs)
+        specialisations = rng.integers(cls.SPECIALISATIONS, size=n_jobs)
+        salaries = rng.integers(30, 200, size=n_jobs) * 1000
+        jobs = []
+        for i in range(n_jobs):
+            f, s = families[i], specialisations[i]
+            jobs.append(SyntheticJob(
+                pk=i + 1,
+                position=f"fam{f} spec{s} {words(specialisation_terms[f][s], 2)}",
+                workplace=f"company{rng.integers(5000)}",
+                working_mode=WORKING_MODES[rng.integers(len(WORKING_MODES))],
+                job_role_and_duties=' '.join([
+                    words(family_terms[f], 12), words(specialisation_terms[f][s], 6), words(common_terms, 10)
+                ]),
+                requisite_skill=' '.join([
+                    specialisation_skill[f][s], words(specialisation_terms[f][s], 6),
+                    family_skill[f], words(family_terms[f], 4),
+                ]),
+                salary_min=float(salaries[i]),
+                salary_max=float(salaries[i] * 1.3),
+                location=LOCATIONS[rng.integers(len(LOCATIONS))],
+            ))
+
+        resume_families = rng.integers(cls.FAMILIES, size=n_resumes)
+        resume_specialisations = rng.integers(cls.SPECIALISATIONS, size=n_resumes)
+        resume_texts = []
+        for f, s in zip(resume_families, resume_specialisations):
+            # Some off-topic terms, as real resumes mention past roles
+            other = rng.integers(cls.FAMILIES)
+            resume_texts.append(' '.join([
+                family_skill[f], words(family_terms[f], 8), specialisation_skill[f][s], words(specialisation_terms[f][s], 4),
+                family_skill[other], words(family_terms[other], 3), words(common_terms, 20),
+            ]))
+
+        return cls(
+            jobs,
+            np.concatenate([[-1], families]), np.concatenate([[-1], specialisations]),
+            resume_texts, resume_families, resume_specialisations,
+        )
+
+    @staticmethod
+    def skill_names():
+        """Names of the taxonomy skills that extract back to exactly themselves"""
+        taxonomy = get_skill_taxonomy()
+        return [skill.name for skill in taxonomy.skills.values() if taxonomy.extract(skill.name) == [skill.id]]
+
+    def grades(self, resume_index, job_ids):
+        """Relevance grade (0, 1 or 2) of each job id for one resume"""
+        job_ids = np.asarray(job_ids, dtype=np.int64)
+        same_family = self.job_family[job_ids] == self.resume_family[resume_index]
+        same_specialisation = self.job_specialisation[job_ids] == self.resume_specialisation[resume_index]
+        return same_family.astype(int) + (same_family & same_specialisation).astype(int)
+
+    def ideal_grades(self, resume_index, k):
+        """Best possible grades of a top-k list for one resume"""
+        family = self.job_family[1:] == self.resume_family[resume_index]
+        exact = int((family & (self.job_specialisation[1:] == self.resume_specialisation[resume_index])).sum())
+        partial = int(family.sum()) - exact
+        return ([2] * exact + [1] * partial + [0] * k)[:k]
+
+
+class HashingEncoder:
+    """Deterministic bag-of-words encoder with the SentenceTransformer interface.
+
+    Lets the benchmark measure index and pipeline cost where the real model
+    is not available; its quality figures say nothing about the model.
+    """
+
+    def __init__(self, dim=384):
+        self.dim = dim
+
+    def encode(self, sentences, batch_size=32, convert_to_numpy=True, normalize_embeddings=False, **kwargs):
+        vectors = np.zeros((len(sentences), self.dim), dtype=np.float32)
+        for i, sentence in enumerate(sentences):
+            for word in sentence.split():
+                vectors[i, zlib.crc32(word.encode('utf-8')) % self.dim] += 1
+        if normalize_embeddings:
+            vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        return vectors
+
+
+def build_system(corpus, sentence_model):
+    """In-memory recommendation system over the corpus (no artifact stores)"""
+    from .models import AdvancedJobRecommendationSystem
+
+    system = AdvancedJobRecommendationSystem(corpus.jobs, sentence_model=sentence_model)
+    # Fit TF-IDF now so it is part of the build, not of the first query
+    system._build_tfidf_features()
+    return system
+
+
+@contextlib.contextmanager
+def benchmark_database():
+    """Point the default connection at a freshly migrated test database for the duration"""
+    from django.db import connection
+
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def insert_corpus_jobs(corpus):
+    """Insert the corpus jobs (and their skills) as Job rows; returns {row pk: synthetic pk}"""
+    from job_service.models import Job
+    from .skill_index import job_skill_index, sync_job_skills
+
+    created = Job.objects.bulk_create(
+        [Job(**{field: getattr(job, field) for field in (
+            'position', 'workplace', 'working_mode', 'job_role_and_duties',
+            'requisite_skill', 'salary_min', 'salary_max', 'location',
+        )}) for job in corpus.jobs],
+        batch_size=2000,
+    )
+    # bulk_create sends no signals: store skills and reload the index directly
+    sync_job_skills(created)
+    job_skill_index.reload()
+    return {row.pk: job.pk for row, job in zip(created, corpus.jobs)}
+
+
+def recommend(system, method, text, top_n=20):
+    """One query through the public single-resume method"""
+    if method == 'tfidf':
+        return system.get_tfidf_recommendations(text, top_n)
+    if method == 'semantic':
+        return system.get_semantic_recommendations(text, top_n)
+    return system.get_hybrid_recommendations(text, top_n)
+
+
+def query_runner(system, method, texts, top_n=20):
+    """Zero-argument callable running every text once, for pytest-benchmark"""
+    def run():
+        return [recommend(system, method, text, top_n) for text in texts]
+    return run
+
+
+def ndcg_at_k(grades, ideal_grades):
+    def dcg(values):
+        return sum((2 ** grade - 1) / math.log2(rank + 2) for rank, grade in enumerate(values))
+    ideal = dcg(ideal_grades)
+    return dcg(grades) / ideal if ideal else 0.0
+
+
+def peak_rss_mb():
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def evaluate(corpus, method, recommend_one, recommend_batch, k=20, latency_queries=None):
+    """Latency percentiles, throughput and ranking quality of one method.
+
+    ``recommend_one(text)`` and ``recommend_batch(texts)`` return
+    recommendation dicts carrying ``job_id``.
+    """
+    texts = corpus.resume_texts
+    latency_texts = texts[:latency_queries] if latency_queries else texts
+
+    latencies, rankings = [], []
+    for text in latency_texts:
+        start = time.perf_counter()
+        rankings.append(recommend_one(text))
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    batch_rankings = recommend_batch(texts)
+    batch_seconds = time.perf_counter() - start
+    if len(batch_rankings) == len(texts):
+        rankings = batch_rankings
+
+    quality = ranking_quality(corpus, rankings, k)
+    return {
+        'method': method,
+        'queries': len(texts),
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p95_ms': float(np.percentile(latencies, 95)),
+        'p99_ms': float(np.percentile(latencies, 99)),
+        'throughput_qps': len(texts) / batch_seconds if batch_seconds else None,
+        **quality,
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def ranking_quality(corpus, rankings, k=20):
+    """Mean recall@k and nDCG@k of one ranking (recommendation dicts with ``job_id``) per resume"""
+    recalls, ndcgs = [], []
+    for i, recommendations in enumerate(rankings):
+        ids = [item['job_id'] for item in recommendations[:k]]
+        grades = corpus.grades(i, ids) if ids else np.zeros(0, dtype=int)
+        ideal = corpus.ideal_grades(i, k)
+        relevant = sum(1 for grade in ideal if grade == 2)
+        recalls.append(float((grades == 2).sum()) / relevant if relevant else 0.0)
+        ndcgs.append(ndcg_at_k(grades.tolist(), ideal))
+    return {f'recall_at_{k}': float(np.mean(recalls)), f'ndcg_at_{k}': float(np.mean(ndcgs))}
+
+
+def benchmark_settings():
+    """ML settings that affect results, recorded with every report"""
+    return {name: get_setting(name) for name in (
+        'INDEX_BACKEND', 'INDEX_SHARD_KEYS', 'EXACT_SEARCH_THRESHOLD', 'IVF_NPROBE', 'HNSW_EF_SEARCH',
+        'RERANK_FACTOR', 'HYBRID_FUSION', 'HYBRID_WEIGHTS', 'CHUNK_WORDS', 'MAX_CHUNKS', 'ENCODER_BACKEND',
+    )}
@@ -0,0 +1,114 @@
+"""Django-cache backed caches for query embeddings and recommendation results"""
+import hashlib
+import logging
+import threading
+
+import numpy as np
+from django.core.cache import caches
+
+from .conf import get_setting
+
+logger = logging.getLogger(__name__)
+
+
+def text_hash(text):
+    """Stable hex digest of a (cleaned) text, used in cache keys"""
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+
+class CacheStats:
+    """Thread-safe hit/miss counters for one cache in this process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, hits, misses):
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+
+    def as_dict(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 3) if total else 0.0,
+        }
+
+
+class _DjangoCache:
+    """Shared plumbing: backend lookup, namespaced keys and counters.
+
+    Eviction is the backend's: the local-memory backend is an LRU bounded by
+    MAX_ENTRIES, and every entry expires after the configured TTL.
+    """
+
+    PREFIX = None
+    TTL_SETTING = None
+
+    def __init__(self):
+        self.stats = CacheStats()
+
+    @property
+    def backend(self):
+        return caches[get_setting('CACHE_ALIAS')]
+
+    def _key(self, *parts):
+        return ':'.join((self.PREFIX,) + tuple(str(part) for part in parts))
+
+    def get_many(self, keys):
+        """Return {key: value} for cached keys, counting hits and misses"""
+        try:
+            found = self.backend.get_many(keys)
+        except Exception as e:
+            logger.error(f"❌ Error reading {self.PREFIX} cache: {str(e)}")
+            found = {}
+        self.stats.record(len(found), len(keys) - len(found))
+        return found
+
+    def set_many(self, values):
+        try:
+            self.backend.set_many(values, timeout=get_setting(self.TTL_SETTING))
+        except Exception as e:
+            logger.error(f"❌ Error writing {self.PREFIX} cache: {str(e)}")
+
+
+class QueryEmbeddingCache(_DjangoCache):
+    """Encoder output per cleaned query text, shared by every method and filter"""
+
+    PREFIX = 'ml-qemb'
+    TTL_SETTING = 'EMBEDDING_CACHE_TTL'
+
+    def encode(self, clean_texts, encode, model_key):
+        """Embeddings for ``clean_texts``, running ``encode`` on cache misses only"""
+        keys = [self._key(model_key, text_hash(text)) for text in clean_texts]
+        found = self.get_many(list(dict.fromkeys(keys)))
+
+        missing = list(dict.fromkeys(
+            (key, text) for key, text in zip(keys, clean_texts) if key not in found
+        ))
+        if missing:
+            vectors = encode([text for _, text in missing])
+            computed = {key: vector for (key, _), vector in zip(missing, vectors)}
+            self.set_many(computed)
+            found.update(computed)
+        return np.vstack([found[key] for key in keys]).astype(np.float32, copy=False)
+
+
+class RecommendationCache(_DjangoCache):
+    """Finished recommendation lists keyed by query, options and index version"""
+
+    PREFIX = 'ml-recs'
+    TTL_SETTING = 'RESULT_CACHE_TTL'
+
+    def key(self, clean_text, method, top_n, filters, index_version):
+        filter_key = filters.key() if filters else ()
+        return self._key(
+            index_version, method, top_n, text_hash(repr(filter_key)), text_hash(clean_text)
+        )
+
+
+query_embedding_cache = QueryEmbeddingCache()
+recommendation_cache = RecommendationCache()
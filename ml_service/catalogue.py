@@ -0,0 +1,261 @@
+"""Compact columnar snapshots of the catalogue served by a recommendation system"""
+import datetime
+import math
+from collections import namedtuple
+
+import numpy as np
+
+_EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+_MICROSECOND = datetime.timedelta(microseconds=1)
+# Stored for a missing timestamp
+_NO_TIMESTAMP = np.iinfo(np.int64).min
+
+
+class CatalogueSnapshot:
+    """Immutable array-backed copy of the fields ranking and responses read.
+
+    Rows are sorted by primary key and every field is stored by kind:
+    ``CATEGORICAL`` strings as int32 codes into a list of interned values,
+    ``NUMERIC`` fields as float64 (NaN when missing; exact for every salary
+    the Job DecimalField holds), ``TIMESTAMP`` fields as int64 microseconds
+    since the epoch and ``TEXT`` fields as offsets into shared UTF-8
+    buffers. A catalogue is therefore a few arrays, not
+    one model instance per row, and only the rows being returned are turned
+    back into Python values (``records``).
+
+    ``apply_changes`` returns a new snapshot that shares the existing
+    buffers and appends one buffer for the changed rows; the text is
+    rewritten into a single buffer once replaced rows make up
+    COMPACT_RATIO of it.
+    """
+
+    CATEGORICAL = ()
+    NUMERIC = ()
+    TIMESTAMP = ()
+    TEXT = ()
+    COMPACT_RATIO = 0.5
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.Record = namedtuple(f'{cls.__name__}Record',
+                                ('pk',) + cls.CATEGORICAL + cls.NUMERIC + cls.TIMESTAMP + cls.TEXT)
+
+    def __init__(self, ids, codes, values, numeric, timestamps, buffers, buffer_of, offsets, dead_bytes=0):
+        self.ids = ids
+        self._codes = codes
+        self._values = values
+        self._numeric = numeric
+        self._timestamps = timestamps
+        self._buffers = buffers
+        # Buffer index of each row, and the start of each TEXT field plus the end of the last
+        self._buffer_of = buffer_of
+        self._offsets = offsets
+        self._dead_bytes = dead_bytes
+
+    @classmethod
+    def _field(cls, obj, field):
+        return getattr(obj, field)
+
+    @classmethod
+    def from_objects(cls, objects):
+        """Snapshot of ``objects`` (any iterable, consumed once)"""
+        return cls._from_columns(*cls._columns(objects, buffer_index=0))
+
+    @classmethod
+    def _columns(cls, objects, buffer_index, values=None):
+        """Columns of ``objects`` in input order, coding categories against ``values``"""
+        values = {field: list(values[field]) if values else [] for field in cls.CATEGORICAL}
+        code_of = {field: {value: code for code, value in enumerate(values[field])} for field in cls.CATEGORICAL}
+        ids, codes = [], {field: [] for field in cls.CATEGORICAL}
+        numeric = {field: [] for field in cls.NUMERIC}
+        timestamps = {field: [] for field in cls.TIMESTAMP}
+        chunks, offsets, position = [], [], 0
+
+        for obj in objects:
+            ids.append(obj.pk)
+            for field in cls.CATEGORICAL:
+                value = cls._field(obj, field) or ''
+                code = code_of[field].get(value)
+                if code is None:
+                    code = code_of[field][value] = len(values[field])
+                    values[field].append(value)
+                codes[field].append(code)
+            for field in cls.NUMERIC:
+                value = cls._field(obj, field)
+                numeric[field].append(math.nan if value is None else float(value))
+            for field in cls.TIMESTAMP:
+                value = cls._field(obj, field)
+                timestamps[field].append(_NO_TIMESTAMP if value is None else (value - _EPOCH) // _MICROSECOND)
+            row = [position]
+            for field in cls.TEXT:
+                text = (cls._field(obj, field) or '').encode('utf-8')
+                chunks.append(text)
+                position += len(text)
+                row.append(position)
+            offsets.append(row)
+
+        n = len(ids)
+        return (
+            np.asarray(ids, dtype=np.int64),
+            {field: np.asarray(codes[field], dtype=np.int32) for field in cls.CATEGORICAL},
+            values,
+            {field: np.asarray(numeric[field], dtype=np.float64) for field in cls.NUMERIC},
+            {field: np.asarray(timestamps[field], dtype=np.int64) for field in cls.TIMESTAMP},
+            (b''.join(chunks),),
+            np.full(n, buffer_index, dtype=np.int32),
+            np.asarray(offsets, dtype=np.int64).reshape(n, len(cls.TEXT) + 1),
+        )
+
+    @classmethod
+    def _from_columns(cls, ids, codes, values, numeric, timestamps, buffers, buffer_of, offsets, dead_bytes=0):
+        """Snapshot with the rows sorted by id"""
+        order = np.argsort(ids, kind='stable')
+        return cls(
+            ids[order],
+            {field: column[order] for field, column in codes.items()},
+            values,
+            {field: column[order] for field, column in numeric.items()},
+            {field: column[order] for field, column in timestamps.items()},
+            buffers, buffer_of[order], offsets[order], dead_bytes,
+        )
+
+    def __len__(self):
+        return len(self.ids)
+
+    def nbytes(self):
+        """Approximate memory held by the snapshot"""
+        arrays = [self.ids, self._buffer_of, self._offsets, *self._codes.values(),
+                  *self._numeric.values(), *self._timestamps.values()]
+        return sum(array.nbytes for array in arrays) + sum(len(buffer) for buffer in self._buffers)
+
+    def positions(self, ids):
+        """Row positions of ``ids``; raises KeyError for an id not in the snapshot"""
+        ids = np.asarray(ids, dtype=np.int64)
+        positions = np.searchsorted(self.ids, ids)
+        found = positions < len(self.ids)
+        found[found] = self.ids[positions[found]] == ids[found]
+        if not found.all():
+            raise KeyError(int(ids[~found][0]))
+        return positions
+
+    def column(self, field, ids):
+        """Python values of one CATEGORICAL field for ``ids``"""
+        values = self._values[field]
+        return [values[code] for code in self._codes[field][self.positions(ids)].tolist()]
+
+    def records(self, ids):
+        """Record tuples (pk and every stored field) for ``ids``, in order"""
+        positions = self.positions(ids)
+        columns = [self.ids[positions].tolist()]
+        for field in self.CATEGORICAL:
+            values = self._values[field]
+            columns.append([values[code] for code in self._codes[field][positions].tolist()])
+        for field in self.NUMERIC:
+            column = self._numeric[field][positions].tolist()
+            columns.append([None if math.isnan(value) else value for value in column])
+        for field in self.TIMESTAMP:
+            columns.append([None if value == _NO_TIMESTAMP else _EPOCH + value * _MICROSECOND
+                            for value in self._timestamps[field][positions].tolist()])
+        texts = []
+        for buffer_index, offsets in zip(self._buffer_of[positions].tolist(), self._offsets[positions].tolist()):
+            buffer = self._buffers[buffer_index]
+            texts.append([buffer[start:end].decode('utf-8') for start, end in zip(offsets, offsets[1:])])
+        columns.extend(zip(*texts) if texts else [[]] * len(self.TEXT))
+        return list(map(self.Record._make, zip(*columns)))
+
+    def apply_changes(self, upserted, removed_ids):
+        """New snapshot with the rows of ``upserted`` objects replaced or added and ``removed_ids`` dropped"""
+        ids, codes, values, numeric, timestamps, (buffer,), buffer_of, offsets = self._columns(
+            upserted, buffer_index=len(self._buffers), values=self._values
+        )
+        replaced = np.isin(self.ids, np.concatenate([ids, np.asarray(list(removed_ids), dtype=np.int64)]))
+        keep = ~replaced
+        dead_bytes = self._dead_bytes + int((self._offsets[replaced, -1] - self._offsets[replaced, 0]).sum())
+
+        snapshot = self._from_columns(
+            np.concatenate([self.ids[keep], ids]),
+            {field: np.concatenate([self._codes[field][keep], codes[field]]) for field in self.CATEGORICAL},
+            values,
+            {field: np.concatenate([self._numeric[field][keep], numeric[field]]) for field in self.NUMERIC},
+            {field: np.concatenate([self._timestamps[field][keep], timestamps[field]]) for field in self.TIMESTAMP},
+            self._buffers + (buffer,),
+            np.concatenate([self._buffer_of[keep], buffer_of]),
+            np.concatenate([self._offsets[keep], offsets]),
+            dead_bytes,
+        )
+        if dead_bytes > self.COMPACT_RATIO * sum(len(buffer) for buffer in snapshot._buffers):
+            snapshot = snapshot._compact()
+        return snapshot
+
+    def _compact(self):
+        """Copy with the text of live rows rewritten into one buffer"""
+        starts, ends = self._offsets[:, 0], self._offsets[:, -1]
+        chunks = [self._buffers[buffer_index][start:end] for buffer_index, start, end
+                  in zip(self._buffer_of.tolist(), starts.tolist(), ends.tolist())]
+        new_starts = np.concatenate(([0], np.cumsum(ends - starts)[:-1])).astype(np.int64)
+        offsets = self._offsets - starts[:, None] + new_starts[:, None]
+        return type(self)(
+            self.ids, self._codes, self._values, self._numeric, self._timestamps,
+            (b''.join(chunks),), np.zeros(len(self.ids), dtype=np.int32), offsets,
+        )
+
+
+class JobCatalogue(CatalogueSnapshot):
+    """Job fields used by filters and recommendation payloads.
+
+    Filters are evaluated as vectorised masks: working mode and location
+    conditions are resolved once per distinct value and mapped through
+    the codes, salaries compared as arrays.
+    """
+
+    CATEGORICAL = ('working_mode', 'location')
+    NUMERIC = ('salary_min', 'salary_max')
+    TEXT = ('position', 'workplace', 'job_role_and_duties', 'requisite_skill')
+
+    @classmethod
+    def _field(cls, job, field):
+        value = getattr(job, field)
+        if field in cls.NUMERIC and not value:
+            # A zero salary means none was given
+            return None
+        return value
+
+    def _category_mask(self, field, matches):
+        """Rows whose value of ``field`` satisfies ``matches``"""
+        matching = [code for code, value in enumerate(self._values[field]) if matches(value)]
+        return np.isin(self._codes[field], matching)
+
+    def mask(self, filters):
+        """Boolean mask over ``ids`` of the jobs matching ``filters`` (a JobFilters)"""
+        mask = np.ones(len(self.ids), dtype=bool)
+        if filters.working_mode:
+            mask &= self._category_mask('working_mode', lambda value: value == filters.working_mode)
+        if filters.location:
+            mask &= self._category_mask('location', lambda value: filters.location in value.lower())
+        salary_min, salary_max = self._numeric['salary_min'], self._numeric['salary_max']
+        with np.errstate(invalid='ignore'):
+            if filters.min_salary is not None:
+                # A job without a maximum can still pay its minimum
+                top = np.where(np.isnan(salary_max), salary_min, salary_max)
+                mask &= top >= filters.min_salary
+            if filters.max_salary is not None:
+                bottom = np.where(np.isnan(salary_min), salary_max, salary_min)
+                mask &= bottom <= filters.max_salary
+        return mask
+
+    def allowed_ids(self, filters):
+        """Sorted job ids matching ``filters``"""
+        return self.ids[self.mask(filters)]
+
+
+class CandidateCatalogue(CatalogueSnapshot):
+    """Resume fields used by candidate recommendation payloads"""
+
+    TIMESTAMP = ('uploaded_at',)
+    TEXT = ('title', 'filename')
+
+    @classmethod
+    def _field(cls, resume, field):
+        if field == 'filename':
+            return resume.filename()
+        return getattr(resume, field)
@@ -0,0 +1,59 @@
+"""Split long texts into overlapping windows and pool their embeddings"""
+import numpy as np
+
+POOLING_METHODS = ('mean', 'max')
+
+
+def split_windows(text, window_words, overlap_words, max_chunks):
+    """Overlapping word windows covering ``text``.
+
+    At most ``max_chunks`` windows are returned; longer texts get windows
+    spread evenly over the whole document instead of only its beginning,
+    so the encoding cost per document stays bounded.
+    """
+    words = text.split()
+    if not window_words or len(words) <= window_words:
+        return [text]
+
+    stride = max(1, window_words - overlap_words)
+    last_start = len(words) - window_words
+    starts = list(range(0, last_start + 1, stride))
+    if starts[-1] != last_start:
+        starts.append(last_start)
+    if len(starts) > max_chunks:
+        starts = np.linspace(0, last_start, max_chunks).round().astype(int).tolist()
+    return [' '.join(words[start:start + window_words]) for start in starts]
+
+
+def pool(vectors, method='mean'):
+    """Pool chunk embeddings into one unit-length document embedding"""
+    if method not in POOLING_METHODS:
+        raise ValueError(f"Unknown pooling method: {method}")
+    pooled = vectors.max(axis=0) if method == 'max' else vectors.mean(axis=0)
+    norm = np.linalg.norm(pooled)
+    return pooled / norm if norm > 0 else pooled
+
+
+def encode_chunked(texts, encode, window_words, overlap_words, max_chunks, pooling='mean'):
+    """Embed each text as the pooled embedding of its windows.
+
+    All windows of all texts go to ``encode`` in one call, longest first,
+    so batches hold windows of similar length and little padding.
+    """
+    chunks, owners = [], []
+    for i, text in enumerate(texts):
+        windows = split_windows(text, window_words, overlap_words, max_chunks)
+        chunks.extend(windows)
+        owners.extend([i] * len(windows))
+    if len(chunks) == len(texts):
+        return encode(texts)
+
+    order = np.argsort([-len(chunk) for chunk in chunks], kind='stable')
+    encoded = encode([chunks[i] for i in order])
+    vectors = np.empty_like(encoded)
+    vectors[order] = encoded
+
+    owners = np.asarray(owners)
+    # Windows of one text are contiguous, so each document is one slice
+    bounds = np.flatnonzero(np.diff(owners)) + 1
+    return np.vstack([pool(part, pooling) for part in np.split(vectors, bounds)]).astype(np.float32)
@@ -0,0 +1,103 @@
+"""Settings for the ML service, read from ``settings.ML_SERVICE`` with defaults"""
+import hashlib
+import os
+
+from django.conf import settings
+
+DEFAULTS = {
+    # Directory holding persisted ML artifacts (embeddings, indexes, markers)
+    'ARTIFACT_DIR': None,
+    # Job index backend: 'flat' (exact), 'sq8', 'pq', 'ivf_flat', 'ivf_sq8', 'ivf_pq' or 'hnsw'
+    'INDEX_BACKEND': 'flat',
+    # Catalogues smaller than this always use exact search
+    'EXACT_SEARCH_THRESHOLD': 10000,
+    # IVF: number of inverted lists (None = 4 * sqrt(n)) and lists probed per query
+    'IVF_NLIST': None,
+    'IVF_NPROBE': 16,
+    # IVF-PQ: sub-quantizers per vector (must divide the embedding size) and bits each
+    'PQ_M': 16,
+    'PQ_NBITS': 8,
+    # Compressed backends (sq8, pq, ivf_sq8, ivf_pq) re-rank this many times k
+    # candidates by their exact score from the embedding store (0 disables)
+    'RERANK_FACTOR': 10,
+    # HNSW: graph degree, build-time and query-time beam width
+    'HNSW_M': 32,
+    'HNSW_EF_CONSTRUCTION': 80,
+    'HNSW_EF_SEARCH': 64,
+    # Partition the job index into one sub-index per key: any of
+    # ('working_mode', 'region'), where region is derived from the location
+    # ('remote' or the part after the last comma); () keeps one global index
+    'INDEX_SHARD_KEYS': (),
+    # A shard is rebuilt alone once this share of its entries changed
+    'SHARD_REBUILD_RATIO': 0.2,
+    # Threads searching several shards of one query batch in parallel
+    'SHARD_SEARCH_THREADS': 4,
+    # Hybrid ranking: 'weighted' (min-max normalised scores) or 'rrf' (reciprocal rank)
+    'HYBRID_FUSION': 'weighted',
+    'HYBRID_WEIGHTS': {'tfidf': 0.5, 'semantic': 0.5},
+    'RRF_K': 60,
+    # Sentence encoder: 'onnx' (int8 ONNX Runtime, exported at deploy time by
+    # manage.py export_encoder) or 'torch' (dynamically quantized PyTorch);
+    # ONNX falls back to torch when it is not installed or not exported
+    'ENCODER_BACKEND': 'onnx',
+    # Unix socket of a shared encoder process (manage.py run_encoder_server);
+    # None loads the encoder in every worker
+    'ENCODER_SERVER': None,
+    # Encoder server batching: most texts per encoder call, and how long to
+    # wait for more requests before running a partial batch
+    'ENCODER_SERVER_MAX_BATCH': 256,
+    'ENCODER_SERVER_MAX_WAIT_MS': 5,
+    # Long texts are encoded as overlapping word windows (the encoder keeps
+    # ~128 word pieces, roughly 96 words) pooled with 'mean' or 'max';
+    # MAX_CHUNKS bounds the encoding cost of very long documents
+    'CHUNK_WORDS': 96,
+    'CHUNK_OVERLAP': 24,
+    'MAX_CHUNKS': 8,
+    'CHUNK_POOLING': 'mean',
+    # JSON skill taxonomy used for skill extraction (None = ml_service/data/skills.json)
+    'SKILL_TAXONOMY': None,
+    # Django cache alias holding query embeddings and recommendation results
+    'CACHE_ALIAS': 'default',
+    # Seconds a cached recommendation list / query embedding stays valid (0 disables)
+    'RESULT_CACHE_TTL': 600,
+    'EMBEDDING_CACHE_TTL': 3600,
+    # Per-stage request timing (Server-Timing headers, timing log lines and
+    # histograms); when off, instrumented stages cost one context lookup
+    'TIMING_ENABLED': False,
+    # Serve the Prometheus metrics endpoint at all; off, /metrics/ is a 404
+    'METRICS_ENABLED': False,
+    # Bearer token scrapers must send ("Authorization: Bearer <token>"); None
+    # requires none
+    'METRICS_TOKEN': None,
+    # Client addresses allowed to scrape (None = any). Behind a reverse proxy
+    # every request comes from the proxy's address, so this only restricts
+    # anything if the proxy itself blocks /metrics/; use METRICS_TOKEN instead
+    'METRICS_ALLOWED_IPS': ('127.0.0.1', '::1'),
+}
+
+
+def get_setting(name):
+    """Return an ML service setting, falling back to its default"""
+    value = getattr(settings, 'ML_SERVICE', {}).get(name, DEFAULTS[name])
+    if name == 'ARTIFACT_DIR' and value is None:
+        value = os.path.join(settings.BASE_DIR, 'ml_artifacts')
+    return value
+
+
+def encoder_authkey():
+    """Key authenticating encoder server clients, derived from SECRET_KEY"""
+    return hashlib.sha256(('ml-encoder:' + settings.SECRET_KEY).encode('utf-8')).digest()
+
+
+def artifact_path(*parts):
+    """Build a path inside the artifact directory, creating parent folders"""
+    path = os.path.join(get_setting('ARTIFACT_DIR'), *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+
+def artifact_dir(*parts):
+    """Build a directory path inside the artifact directory, creating it"""
+    path = os.path.join(get_setting('ARTIFACT_DIR'), *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
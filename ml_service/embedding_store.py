@@ -0,0 +1,236 @@
+"""Persistent job embedding store shared by all worker processes"""
+import hashlib
+import logging
+import os
+import uuid
+
+import numpy as np
+from filelock import FileLock
+
+logger = logging.getLogger(__name__)
+
+
+class JobEmbeddingStore:
+    """Memory-mapped float32 embedding matrix with an id/content-hash manifest.
+
+    The vector file is append-only: new or changed jobs are written as new
+    rows and the manifest (ids, content hashes, row numbers) is replaced
+    atomically. Rows referenced by any manifest are never rewritten, so every
+    process can read the same file through its own read-only memory map
+    without holding a private copy. Dead rows are dropped by compacting into
+    a fresh file once they outnumber the live ones.
+    """
+
+    MANIFEST_NAME = 'manifest.npz'
+
+    def __init__(self, directory, model_name):
+        self.directory = directory
+        self.model_name = model_name
+        os.makedirs(directory, exist_ok=True)
+        self._file_lock = FileLock(os.path.join(directory, 'store.lock'))
+        self._reset()
+
+    def _reset(self):
+        self.ids = np.empty(0, dtype=np.int64)
+        self.hashes = np.empty(0, dtype=np.uint64)
+        self.rows = np.empty(0, dtype=np.int64)
+        self.dim = None
+        self.vectors_name = None
+        self.total_rows = 0
+        self._vectors = None
+        self._manifest_mtime = None
+        self._row_of = None
+        self._row_of_ids = None
+
+    @staticmethod
+    def content_hash(text):
+        """64-bit hash of the text an embedding was computed from"""
+        digest = hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest()
+        return int.from_bytes(digest, 'little')
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _manifest_path(self):
+        return os.path.join(self.directory, self.MANIFEST_NAME)
+
+    def load(self):
+        """(Re)load the manifest and memory map if another process changed them"""
+        path = self._manifest_path()
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            self._reset()
+            return
+        if mtime == self._manifest_mtime:
+            return
+
+        with np.load(path, allow_pickle=False) as manifest:
+            if str(manifest['model']) != self.model_name:
+                logger.warning("⚠️ Embedding store was built with another model, ignoring it")
+                self._reset()
+                return
+            self.ids = manifest['ids']
+            self.hashes = manifest['hashes']
+            self.rows = manifest['rows']
+            self.dim = int(manifest['dim'])
+            # An emptied store publishes no vector file
+            self.vectors_name = str(manifest['vectors']) or None
+            self.total_rows = int(manifest['total_rows'])
+
+        self._vectors = None
+        if self.total_rows:
+            self._vectors = np.memmap(
+                os.path.join(self.directory, self.vectors_name),
+                dtype=np.float32, mode='r', shape=(self.total_rows, self.dim)
+            )
+        self._manifest_mtime = mtime
+
+    def get(self, ids):
+        """Return the stored vectors for ``ids`` (which must all be present)"""
+        if self._row_of_ids is not self.ids:
+            # Rebuilt only when a new manifest replaced the id array
+            self._row_of = dict(zip(self.ids.tolist(), self.rows.tolist()))
+            self._row_of_ids = self.ids
+        row_of = self._row_of
+        rows = np.fromiter((row_of[i] for i in ids), dtype=np.int64, count=len(ids))
+        if len(rows) and np.array_equal(rows, np.arange(rows[0], rows[0] + len(rows))):
+            # Contiguous rows are served straight from the shared memory map
+            return self._vectors[rows[0]:rows[0] + len(rows)]
+        if len(rows) == 0:
+            return np.empty((0, self.dim or 0), dtype=np.float32)
+        return self._vectors[rows]
+
+    def missing(self, ids, texts):
+        """Positions of the ``ids`` with no stored embedding of exactly ``texts``"""
+        self.load()
+        stored = dict(zip(self.ids.tolist(), self.hashes.tolist()))
+        return [i for i, (item_id, text) in enumerate(zip(ids, texts))
+                if stored.get(item_id) != self.content_hash(text)]
+
+    def sync(self, ids, texts, encode):
+        """Make the store hold exactly ``ids``, encoding only new or changed texts.
+
+        Returns the embedding matrix aligned with ``ids``; ``encode`` maps a
+        list of texts to a 2-D array and is only called for the misses.
+        """
+        return self._update(ids, texts, encode, keep_others=False)
+
+    def upsert(self, ids, texts, encode):
+        """Add or refresh ``ids`` while keeping every other stored job.
+
+        Returns the embedding matrix aligned with ``ids``.
+        """
+        return self._update(ids, texts, encode, keep_others=True)
+
+    def remove(self, ids):
+        """Drop ``ids`` from the store"""
+        with self._file_lock:
+            self.load()
+            keep = ~np.isin(self.ids, np.asarray(list(ids), dtype=np.int64))
+            if keep.all():
+                return
+            self._write_manifest(self.ids[keep], self.hashes[keep], self.rows[keep])
+
+    def _update(self, ids, texts, encode, keep_others):
+        ids = requested_ids = np.asarray(list(ids), dtype=np.int64)
+        hashes = np.fromiter(
+            (self.content_hash(text) for text in texts), dtype=np.uint64, count=len(ids)
+        )
+
+        with self._file_lock:
+            self.load()
+            stored = dict(zip(self.ids.tolist(), zip(self.hashes.tolist(), self.rows.tolist())))
+
+            rows = np.empty(len(ids), dtype=np.int64)
+            missing = []
+            for i, (job_id, content_hash) in enumerate(zip(ids.tolist(), hashes.tolist())):
+                entry = stored.get(job_id)
+                if entry is not None and entry[0] == content_hash:
+                    rows[i] = entry[1]
+                else:
+                    missing.append(i)
+
+            if missing:
+                vectors = np.ascontiguousarray(
+                    encode([texts[i] for i in missing]), dtype=np.float32
+                )
+                rows[missing] = self._append(vectors)
+                logger.info(f"✅ Encoded {len(missing)} new or changed jobs into the embedding store")
+
+            if keep_others:
+                others = ~np.isin(self.ids, ids)
+                ids = np.concatenate([self.ids[others], ids])
+                hashes = np.concatenate([self.hashes[others], hashes])
+                rows = np.concatenate([self.rows[others], rows])
+
+            if missing or not np.array_equal(ids, self.ids) or not np.array_equal(rows, self.rows):
+                if self.total_rows > 2 * len(ids):
+                    rows = self._compact(rows)
+                self._write_manifest(ids, hashes, rows)
+
+            return self.get(requested_ids)
+
+    def _append(self, vectors):
+        """Append vectors to the shared file and return their row numbers"""
+        if self.dim is None or self.vectors_name is None:
+            self.dim = vectors.shape[1]
+            self.vectors_name = f"vectors-{uuid.uuid4().hex[:8]}.f32"
+            self.total_rows = 0
+
+        path = os.path.join(self.directory, self.vectors_name)
+        start = self.total_rows
+        # Write after the last published row; anything beyond it is unreferenced
+        with open(path, 'r+b' if os.path.exists(path) else 'wb') as f:
+            f.seek(start * self.dim * 4)
+            f.write(vectors.tobytes())
+            f.truncate()
+            f.flush()
+            os.fsync(f.fileno())
+
+        self.total_rows += len(vectors)
+        self._vectors = np.memmap(path, dtype=np.float32, mode='r', shape=(self.total_rows, self.dim))
+        return np.arange(start, self.total_rows, dtype=np.int64)
+
+    def _compact(self, rows):
+        """Copy live rows into a new file, in order, and return their new numbers"""
+        if len(rows) == 0:
+            # Nothing is live: publish no vector file at all (an empty file cannot be mapped)
+            self.vectors_name, self.total_rows, self._vectors = None, 0, None
+            logger.info("✅ Emptied embedding store")
+            return np.empty(0, dtype=np.int64)
+        name = f"vectors-{uuid.uuid4().hex[:8]}.f32"
+        path = os.path.join(self.directory, name)
+        live = np.ascontiguousarray(self._vectors[rows])
+        with open(path, 'wb') as f:
+            f.write(live.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+
+        self.vectors_name = name
+        self.total_rows = len(live)
+        self._vectors = np.memmap(path, dtype=np.float32, mode='r', shape=(self.total_rows, self.dim))
+        logger.info(f"✅ Compacted embedding store to {self.total_rows} rows")
+        return np.arange(self.total_rows, dtype=np.int64)
+
+    def _write_manifest(self, ids, hashes, rows):
+        """Atomically publish a new manifest and drop unreferenced vector files"""
+        tmp_path = os.path.join(self.directory, f".manifest-{uuid.uuid4().hex[:8]}.npz")
+        with open(tmp_path, 'wb') as f:
+            np.savez(
+                f, ids=ids, hashes=hashes, rows=rows,
+                dim=np.int64(self.dim or 0), model=np.str_(self.model_name),
+                vectors=np.str_(self.vectors_name or ''), total_rows=np.int64(self.total_rows),
+            )
+        os.replace(tmp_path, self._manifest_path())
+
+        self.ids, self.hashes, self.rows = ids, hashes, rows
+        self._manifest_mtime = os.stat(self._manifest_path()).st_mtime_ns
+
+        # Readers that still map an old file keep their mapping until they reload
+        for name in os.listdir(self.directory):
+            if name.startswith('vectors-') and name != self.vectors_name:
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
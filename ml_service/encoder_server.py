@@ -0,0 +1,244 @@
+"""Shared sentence-encoder process serving web workers over a Unix socket"""
+import logging
+import os
+import queue
+import threading
+import time
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class _PendingRequest:
+    def __init__(self, texts, normalize):
+        self.texts = texts
+        self.normalize = normalize
+        self.result = None
+        self.done = threading.Event()
+
+
+class EncoderServer:
+    """Hold one encoder and answer encode requests from many processes.
+
+    Each client connection is served by its own thread, which queues the
+    request and waits. A single batching thread drains the queue, merging
+    requests that arrive within ``max_wait`` seconds (up to ``max_batch``
+    texts) into one encoder call, then hands each client its rows.
+    """
+
+    def __init__(self, encoder, address, authkey, max_batch=256, max_wait=0.005, encode_batch_size=64):
+        self.encoder = encoder
+        self.address = address
+        self.authkey = authkey
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.encode_batch_size = encode_batch_size
+        self._requests = queue.Queue()
+        self._listener = None
+        self._stats_lock = threading.Lock()
+        self._connections = 0
+        self._batches = 0
+        self._texts = 0
+        self._encode_seconds = 0.0
+
+    def stats(self):
+        """Queue depth and batching counters since the server started"""
+        with self._stats_lock:
+            return {
+                'queue_depth': self._requests.qsize(),
+                'connections': self._connections,
+                'batches': self._batches,
+                'texts': self._texts,
+                'mean_batch_size': round(self._texts / self._batches, 1) if self._batches else 0.0,
+                'encode_seconds': round(self._encode_seconds, 3),
+            }
+
+    def serve_forever(self):
+        if os.path.exists(self.address):
+            # Left behind by a server that did not shut down cleanly
+            os.remove(self.address)
+        listener = self._listener = Listener(self.address, family='AF_UNIX', authkey=self.authkey)
+        threading.Thread(target=self._batch_loop, name='encoder-batcher', daemon=True).start()
+        logger.info(f"✅ Encoder server listening on {self.address}")
+
+        while True:
+            try:
+                # close() clears self._listener, so keep our own reference
+                connection = listener.accept()
+            except (OSError, AuthenticationError):
+                if self._listener is None:
+                    return
+                logger.warning("⚠️ Rejected an encoder client connection")
+                continue
+            threading.Thread(target=self._serve_connection, args=(connection,), daemon=True).start()
+
+    def close(self):
+        listener, self._listener = self._listener, None
+        if listener is not None:
+            listener.close()
+
+    def _serve_connection(self, connection):
+        with self._stats_lock:
+            self._connections += 1
+        try:
+            with connection:
+                while True:
+                    try:
+                        message = connection.recv()
+                    except (EOFError, OSError):
+                        return
+                    if message[0] == 'encode':
+                        request = _PendingRequest(message[1], message[2])
+                        self._requests.put(request)
+                        request.done.wait()
+                        connection.send(request.result)
+                    elif message[0] == 'stats':
+                        connection.send(('ok', self.stats()))
+                    else:
+                        connection.send(('error', f"Unknown request: {message[0]}"))
+        finally:
+            with self._stats_lock:
+                self._connections -= 1
+
+    def _batch_loop(self):
+        while True:
+            batch = [self._requests.get()]
+            size = len(batch[0].texts)
+            deadline = time.monotonic() + self.max_wait
+            while size < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    request = self._requests.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                batch.append(request)
+                size += len(request.texts)
+            self._encode_batch(batch)
+
+    def _encode_batch(self, batch):
+        texts = [text for request in batch for text in request.texts]
+        start = time.perf_counter()
+        try:
+            vectors = np.asarray(
+                self.encoder.encode(texts, batch_size=self.encode_batch_size, convert_to_numpy=True),
+                dtype=np.float32,
+            )
+        except Exception as e:
+            logger.error(f"❌ Error encoding batch of {len(texts)} texts: {str(e)}")
+            for request in batch:
+                request.result = ('error', str(e))
+                request.done.set()
+            return
+
+        with self._stats_lock:
+            self._batches += 1
+            self._texts += len(texts)
+            self._encode_seconds += time.perf_counter() - start
+
+        offset = 0
+        for request in batch:
+            rows = vectors[offset:offset + len(request.texts)]
+            offset += len(request.texts)
+            if request.normalize:
+                rows = rows / np.maximum(np.linalg.norm(rows, axis=1, keepdims=True), 1e-12)
+            request.result = ('ok', rows)
+            request.done.set()
+
+
+class RemoteEncoder:
+    """Client for EncoderServer with the ``SentenceTransformer.encode`` interface.
+
+    Each thread keeps its own connection, so concurrent requests from one
+    worker reach the server together and can share a batch. If the server
+    stops answering, ``fallback`` (a function loading a local encoder, run
+    once) takes over; the server is tried again every RETRY_INTERVAL
+    seconds.
+    """
+
+    # Seconds spent on the local encoder before trying the server again
+    RETRY_INTERVAL = 30.0
+
+    def __init__(self, address, authkey, fallback=None):
+        self.address = address
+        self.authkey = authkey
+        self.fallback = fallback
+        self._local = threading.local()
+        self._fallback_lock = threading.Lock()
+        self._fallback_encoder = None
+        self._retry_at = None
+
+    def _call(self, message):
+        for attempt in range(2):
+            connection = getattr(self._local, 'connection', None)
+            try:
+                if connection is None:
+                    connection = self._local.connection = Client(
+                        self.address, family='AF_UNIX', authkey=self.authkey
+                    )
+                connection.send(message)
+                status, payload = connection.recv()
+                break
+            except (EOFError, OSError):
+                # The server restarted; reconnect once before giving up
+                self._local.connection = None
+                if attempt:
+                    raise
+        if status != 'ok':
+            raise RuntimeError(f"Encoder server error: {payload}")
+        return payload
+
+    def encode(self, sentences, batch_size=32, convert_to_numpy=True, normalize_embeddings=False, **kwargs):
+        if isinstance(sentences, str):
+            return self.encode([sentences], batch_size, convert_to_numpy, normalize_embeddings)[0]
+        if not len(sentences):
+            return np.empty((0, 0), dtype=np.float32)
+        retry_at = self._retry_at
+        if retry_at is None or time.monotonic() >= retry_at:
+            try:
+                vectors = self._call(('encode', list(sentences), normalize_embeddings))
+                self._retry_at = None
+                return vectors
+            except (EOFError, OSError, AuthenticationError) as e:
+                encoder = self._local_encoder()
+                if encoder is None:
+                    raise
+                if retry_at is None:
+                    logger.warning(f"⚠️ Encoder server at {self.address} failed ({str(e)}), encoding locally")
+                self._retry_at = time.monotonic() + self.RETRY_INTERVAL
+        return self._local_encoder().encode(
+            sentences, batch_size=batch_size, convert_to_numpy=convert_to_numpy,
+            normalize_embeddings=normalize_embeddings,
+        )
+
+    def _local_encoder(self):
+        """The fallback encoder, loaded on first use; None without a fallback or if it fails to load"""
+        if self.fallback is not None and self._fallback_encoder is None:
+            with self._fallback_lock:
+                if self._fallback_encoder is None:
+                    self._fallback_encoder = self.fallback()
+                    if self._fallback_encoder is None:
+                        # Failed to load; do not try again on every request
+                        self.fallback = None
+        return self._fallback_encoder
+
+    def stats(self):
+        return self._call(('stats',))
+
+
+def connect_encoder(address, authkey, fallback=None):
+    """Return a RemoteEncoder if a server answers at ``address``, else None.
+
+    ``fallback`` loads the local encoder used if the server goes away later.
+    """
+    encoder = RemoteEncoder(address, authkey, fallback)
+    try:
+        encoder.stats()
+    except (OSError, EOFError, RuntimeError, AuthenticationError) as e:
+        logger.warning(f"⚠️ Encoder server at {address} is not reachable: {str(e)}")
+        return None
+    return encoder
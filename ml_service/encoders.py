@@ -0,0 +1,184 @@
+"""Sentence encoder backends: PyTorch (SentenceTransformer) and ONNX Runtime"""
+import json
+import logging
+import os
+
+import numpy as np
+from filelock import FileLock
+
+from .conf import artifact_dir
+
+logger = logging.getLogger(__name__)
+
+ENCODER_BACKENDS = ('torch', 'onnx')
+ONNX_MODEL_NAME = 'model.int8.onnx'
+
+
+def onnx_directory(model_name):
+    """Artifact directory holding the ONNX export of ``model_name``"""
+    return artifact_dir('encoders', 'onnx', model_name.replace('/', '_'))
+
+
+def load_torch_encoder(model_name):
+    """SentenceTransformer with dynamically int8-quantized linear layers"""
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    sentence_model = SentenceTransformer(model_name, device="cpu")
+    # Quantize for better performance
+    return torch.quantization.quantize_dynamic(
+        sentence_model, {torch.nn.Linear}, dtype=torch.qint8
+    )
+
+
+def export_onnx(model_name, directory, quantize=True):
+    """Export a SentenceTransformer's transformer to ONNX (int8 by default).
+
+    Writes the graph, the fast tokenizer and an ``encoder.json`` with the
+    pooling settings; only the export needs torch, not the runtime.
+    """
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from sentence_transformers import SentenceTransformer
+
+    os.makedirs(directory, exist_ok=True)
+    sentence_model = SentenceTransformer(model_name, device="cpu")
+    transformer = sentence_model[0].auto_model.eval()
+    pooling = next((module for module in sentence_model if hasattr(module, 'pooling_mode_mean_tokens')), None)
+    if pooling is not None and not pooling.pooling_mode_mean_tokens:
+        raise ValueError(f"{model_name} does not use mean pooling")
+
+    inputs = sentence_model.tokenizer(["example sentence"], return_tensors='pt')
+    input_names = [name for name in ('input_ids', 'attention_mask', 'token_type_ids') if name in inputs]
+
+    class TokenEmbeddings(torch.nn.Module):
+        # Positional inputs in a fixed order; the token embeddings as the only output
+        def __init__(self):
+            super().__init__()
+            self.transformer = transformer
+
+        def forward(self, *args):
+            return self.transformer(**dict(zip(input_names, args))).last_hidden_state
+
+    float_path = os.path.join(directory, 'model.onnx')
+    with torch.no_grad():
+        torch.onnx.export(
+            TokenEmbeddings(), tuple(inputs[name] for name in input_names), float_path,
+            input_names=input_names, output_names=['token_embeddings'],
+            dynamic_axes={name: {0: 'batch', 1: 'tokens'} for name in input_names + ['token_embeddings']},
+            opset_version=17, dynamo=False,
+        )
+
+    sentence_model.tokenizer.save_pretrained(directory)
+    with open(os.path.join(directory, 'encoder.json'), 'w') as f:
+        json.dump({'model': model_name, 'max_seq_length': sentence_model.max_seq_length,
+                   'quantized': quantize}, f)
+
+    # The graph is written last; its presence marks a complete export
+    if quantize:
+        quantize_dynamic(float_path, os.path.join(directory, ONNX_MODEL_NAME), weight_type=QuantType.QInt8)
+        os.remove(float_path)
+    else:
+        os.replace(float_path, os.path.join(directory, ONNX_MODEL_NAME))
+    logger.info(f"✅ Exported {model_name} to ONNX in {directory}")
+
+
+class OnnxSentenceEncoder:
+    """Mean-pooled sentence embeddings from an exported ONNX transformer.
+
+    Mirrors the ``SentenceTransformer.encode`` arguments the recommendation
+    system uses, so either backend can be passed as ``sentence_model``.
+    """
+
+    def __init__(self, directory, threads=None):
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        with open(os.path.join(directory, 'encoder.json')) as f:
+            config = json.load(f)
+        self.max_seq_length = config['max_seq_length']
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(directory, 'tokenizer.json'))
+        self.tokenizer.enable_truncation(max_length=self.max_seq_length)
+        self.tokenizer.enable_padding()
+
+        options = onnxruntime.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = onnxruntime.InferenceSession(
+            os.path.join(directory, ONNX_MODEL_NAME), options, providers=['CPUExecutionProvider']
+        )
+        self.input_names = [node.name for node in self.session.get_inputs()]
+
+    def encode(self, sentences, batch_size=32, convert_to_numpy=True, normalize_embeddings=False, **kwargs):
+        if isinstance(sentences, str):
+            return self.encode([sentences], batch_size, convert_to_numpy, normalize_embeddings)[0]
+
+        if not len(sentences):
+            return np.empty((0, self.session.get_outputs()[0].shape[-1]), dtype=np.float32)
+
+        # Longest first, so each batch is padded to a similar length
+        order = np.argsort([-len(sentence) for sentence in sentences], kind='stable')
+        parts = [
+            self._encode_batch([sentences[i] for i in order[start:start + batch_size]])
+            for start in range(0, len(sentences), batch_size)
+        ]
+        embeddings = np.empty((len(sentences), parts[0].shape[1]), dtype=np.float32)
+        embeddings[order] = np.vstack(parts)
+
+        if normalize_embeddings:
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings = embeddings / np.maximum(norms, 1e-12)
+        return embeddings
+
+    def _encode_batch(self, sentences):
+        encodings = self.tokenizer.encode_batch(sentences)
+        feeds = {
+            'input_ids': np.array([e.ids for e in encodings], dtype=np.int64),
+            'attention_mask': np.array([e.attention_mask for e in encodings], dtype=np.int64),
+            'token_type_ids': np.array([e.type_ids for e in encodings], dtype=np.int64),
+        }
+        token_embeddings = self.session.run(None, {name: feeds[name] for name in self.input_names})[0]
+        mask = feeds['attention_mask'][:, :, None].astype(np.float32)
+        return (token_embeddings * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+
+
+def onnx_exported(directory):
+    """Whether ``directory`` holds a complete ONNX export"""
+    return os.path.exists(os.path.join(directory, ONNX_MODEL_NAME))
+
+
+def ensure_onnx_export(model_name, directory, force=False):
+    """Export the model to ``directory`` unless an export is already there"""
+    with FileLock(directory.rstrip(os.sep) + '.lock'):
+        if force and onnx_exported(directory):
+            os.remove(os.path.join(directory, ONNX_MODEL_NAME))
+        if not onnx_exported(directory):
+            export_onnx(model_name, directory)
+
+
+def load_onnx_encoder(model_name, directory, export=False):
+    """Load the ONNX encoder from its export (``manage.py export_encoder``).
+
+    The export loads torch and the full model for a minute or more, so it
+    only runs here with ``export=True`` (management commands), never inside
+    a request. Returns None when onnxruntime is not installed, the model is
+    not exported or the export fails, so callers can fall back to the
+    PyTorch backend.
+    """
+    try:
+        import onnxruntime  # noqa: F401
+    except ImportError:
+        logger.warning("⚠️ onnxruntime is not installed")
+        return None
+
+    try:
+        if export:
+            ensure_onnx_export(model_name, directory)
+        elif not onnx_exported(directory):
+            logger.warning(f"⚠️ No ONNX export in {directory}; run manage.py export_encoder")
+            return None
+        return OnnxSentenceEncoder(directory)
+    except Exception as e:
+        logger.error(f"❌ Error loading ONNX encoder: {str(e)}")
+        return None
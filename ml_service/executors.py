@@ -0,0 +1,30 @@
+"""Process-wide thread pools created on first use"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class LazyExecutor:
+    """Calling it returns one ThreadPoolExecutor per process, built on the
+    first call; concurrent first calls share the same pool.
+
+    ``max_workers`` may be a callable, read when the pool is built, so
+    settings are not evaluated at import time.
+    """
+
+    def __init__(self, thread_name_prefix, max_workers):
+        self.thread_name_prefix = thread_name_prefix
+        self.max_workers = max_workers
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        executor = self._executor
+        if executor is None:
+            with self._lock:
+                executor = self._executor
+                if executor is None:
+                    max_workers = self.max_workers() if callable(self.max_workers) else self.max_workers
+                    executor = self._executor = ThreadPoolExecutor(
+                        max_workers=max_workers, thread_name_prefix=self.thread_name_prefix
+                    )
+        return executor
@@ -0,0 +1,81 @@
+"""Structured job constraints applied inside recommendation search"""
+import math
+from decimal import Decimal
+
+from django.db.models import Value
+from django.db.models.functions import Coalesce, NullIf
+
+
+class JobFilters:
+    """Constraints on the jobs a recommendation may return.
+
+    ``working_mode`` matches exactly, ``location`` is a case-insensitive
+    substring (as in the job list), ``min_salary`` keeps jobs that can pay
+    at least that much and ``max_salary`` jobs that start at or below it.
+    Jobs without salary information never match a salary constraint; as
+    in ``JobCatalogue``, a salary of 0 counts as not given.
+    """
+
+    FIELDS = ('working_mode', 'location', 'min_salary', 'max_salary')
+
+    def __init__(self, working_mode=None, location=None, min_salary=None, max_salary=None):
+        self.working_mode = working_mode or None
+        self.location = location.strip().lower() if location and location.strip() else None
+        self.min_salary = min_salary
+        self.max_salary = max_salary
+
+    @classmethod
+    def from_dict(cls, data):
+        """Parse request filters; raises ValueError on malformed values"""
+        data = data or {}
+        if not isinstance(data, dict):
+            raise ValueError('filters must be an object')
+        unknown = set(data) - set(cls.FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown filters: {', '.join(sorted(unknown))}")
+
+        for name in ('working_mode', 'location'):
+            if data.get(name) is not None and not isinstance(data[name], str):
+                raise ValueError(f'{name} must be a string')
+        salaries = {}
+        for name in ('min_salary', 'max_salary'):
+            value = data.get(name)
+            if value is None or value == '':
+                continue
+            try:
+                if isinstance(value, bool):
+                    raise TypeError
+                salaries[name] = float(value)
+            except (TypeError, ValueError):
+                raise ValueError(f'{name} must be a number')
+            if not math.isfinite(salaries[name]):
+                raise ValueError(f'{name} must be a finite number')
+        if salaries.get('min_salary', -math.inf) > salaries.get('max_salary', math.inf):
+            raise ValueError('min_salary must not exceed max_salary')
+        return cls(data.get('working_mode'), data.get('location'), **salaries)
+
+    def __bool__(self):
+        return any(self.key())
+
+    def filter_queryset(self, jobs):
+        """Apply the same constraints to a Job queryset (for non-indexed paths)"""
+        if self.working_mode:
+            jobs = jobs.filter(working_mode=self.working_mode)
+        if self.location:
+            jobs = jobs.filter(location__icontains=self.location)
+        # A zero salary means none was given
+        salary_min, salary_max = NullIf('salary_min', Value(Decimal(0))), NullIf('salary_max', Value(Decimal(0)))
+        if self.min_salary is not None:
+            jobs = jobs.annotate(_salary_top=Coalesce(salary_max, salary_min)).filter(
+                _salary_top__gte=self.min_salary
+            )
+        if self.max_salary is not None:
+            jobs = jobs.annotate(_salary_bottom=Coalesce(salary_min, salary_max)).filter(
+                _salary_bottom__lte=self.max_salary
+            )
+        return jobs
+
+    def key(self):
+        """Hashable form, for caching results per filter combination"""
+        return (self.working_mode, self.location, self.min_salary, self.max_salary)
+
@@ -0,0 +1,47 @@
+"""Score fusion for hybrid (TF-IDF + semantic) job rankings"""
+import numpy as np
+
+FUSION_METHODS = ('weighted', 'rrf')
+
+
+def min_max_normalize(scores):
+    """Rescale scores to 0-1 over the candidate set"""
+    scores = np.asarray(scores, dtype=np.float32)
+    if len(scores) == 0:
+        return scores
+    low, high = scores.min(), scores.max()
+    if high - low < 1e-9:
+        return np.full_like(scores, 1.0 if high > 0 else 0.0)
+    return (scores - low) / (high - low)
+
+
+def weighted_fusion(score_columns, weights):
+    """Weighted mean of min-max normalised score columns, in 0-1"""
+    fused = np.zeros(len(score_columns[0]), dtype=np.float32)
+    for scores, weight in zip(score_columns, weights):
+        fused += weight * min_max_normalize(scores)
+    return fused / max(sum(weights), 1e-9)
+
+
+def reciprocal_rank_fusion(score_columns, k=60):
+    """Reciprocal-rank fusion, scaled so a job ranked first by every ranker scores 1.
+
+    Only the order within each column matters, so rankers on different score
+    scales combine without normalisation.
+    """
+    n = len(score_columns[0])
+    fused = np.zeros(n, dtype=np.float32)
+    for scores in score_columns:
+        ranks = np.empty(n, dtype=np.float32)
+        ranks[np.argsort(-np.asarray(scores), kind='stable')] = np.arange(1, n + 1)
+        fused += 1.0 / (k + ranks)
+    return fused * (k + 1) / len(score_columns)
+
+
+def fuse_scores(score_columns, method='weighted', weights=None, rrf_k=60):
+    """Fuse aligned score columns (one per ranker) into a single 0-1 score"""
+    if method == 'rrf':
+        return reciprocal_rank_fusion(score_columns, rrf_k)
+    if method != 'weighted':
+        raise ValueError(f"Unknown fusion method: {method}")
+    return weighted_fusion(score_columns, weights or [1.0] * len(score_columns))
@@ -0,0 +1,288 @@
+"""FAISS vector index addressed by job primary key"""
+import logging
+import math
+import threading
+
+import faiss
+import numpy as np
+
+from .conf import get_setting
+from .topk import top_k
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ('flat', 'sq8', 'pq', 'ivf_flat', 'ivf_sq8', 'ivf_pq', 'hnsw')
+# Backends storing lossy codes, whose scores can be refined by re-ranking
+COMPRESSED_BACKENDS = ('sq8', 'pq', 'ivf_sq8', 'ivf_pq')
+# Vectors decoded at a time by the exact fallback search
+EXACT_SEARCH_BLOCK = 65536
+
+
+class JobVectorIndex:
+    """Inner-product index whose entries are keyed by job id.
+
+    Jobs can be added, re-embedded or removed one at a time without
+    rebuilding the rest of the index. Supported backends:
+
+    * ``flat``: exact search (IndexIDMap2 over IndexFlatIP), 4 bytes/dim
+    * ``sq8`` / ``pq``: exhaustive search over compressed codes, 1 byte/dim
+      for 8-bit scalar quantization and PQ_M bytes/vector for product
+      quantization
+    * ``ivf_flat`` / ``ivf_sq8`` / ``ivf_pq``: inverted lists probed
+      ``nprobe`` at a time, trained on the job embeddings
+    * ``hnsw``: graph search tuned by ``ef_search``; HNSW cannot delete, so
+      removed entries are tombstoned and skipped with an IDSelector until
+      the next rebuild
+
+    Compressed backends can be given ``rerank``, a callable returning the
+    original float32 vectors for job ids (e.g. JobEmbeddingStore.get): each
+    search then fetches ``rerank_factor * k`` candidates and orders them by
+    their exact score, recovering most of the recall lost to quantization.
+
+    FAISS indexes are not safe to mutate while being searched, so mutations
+    and searches share a lock.
+    """
+
+    def __init__(self, dim, backend='flat', nprobe=None, ef_search=None, rerank=None, rerank_factor=None):
+        self.dim = dim
+        self.backend = backend
+        self.nprobe = nprobe
+        self.ef_search = ef_search
+        self.rerank = rerank if backend in COMPRESSED_BACKENDS else None
+        self.rerank_factor = rerank_factor
+        self._lock = threading.RLock()
+        # HNSW only: internal row -> job id, and job id -> live internal row
+        self._labels = np.empty(0, dtype=np.int64)
+        self._rows = {}
+        self._dead = set()
+
+        if backend == 'flat':
+            self.index = faiss.IndexIDMap2(faiss.IndexFlatIP(dim))
+        elif backend == 'hnsw':
+            self.index = faiss.IndexHNSWFlat(
+                dim, get_setting('HNSW_M'), faiss.METRIC_INNER_PRODUCT
+            )
+            self.index.hnsw.efConstruction = get_setting('HNSW_EF_CONSTRUCTION')
+        else:
+            # Trained indexes are created by build()
+            self.index = None
+
+    @classmethod
+    def build(cls, ids, vectors, backend=None, exact_search_threshold=None, rerank=None):
+        """Create and fill an index, training it when the backend needs it.
+
+        Catalogues smaller than EXACT_SEARCH_THRESHOLD always use exact
+        search, where approximate search would not pay for itself.
+        """
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        n, dim = vectors.shape
+        backend = backend or get_setting('INDEX_BACKEND')
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown index backend: {backend}")
+        if exact_search_threshold is None:
+            exact_search_threshold = get_setting('EXACT_SEARCH_THRESHOLD')
+        if backend != 'flat' and n < exact_search_threshold:
+            backend = 'flat'
+
+        job_index = cls(
+            dim, backend,
+            nprobe=get_setting('IVF_NPROBE'),
+            ef_search=get_setting('HNSW_EF_SEARCH'),
+            rerank=rerank,
+            rerank_factor=get_setting('RERANK_FACTOR'),
+        )
+        if backend.startswith('ivf'):
+            job_index.index = cls._train_ivf(backend, vectors)
+        elif backend in ('sq8', 'pq'):
+            job_index.index = cls._train_codec(backend, vectors)
+        job_index.add(ids, vectors)
+        logger.info(f"✅ Built {backend} job index with {n} vectors ({job_index.bytes_per_vector():.0f} bytes/job)")
+        return job_index
+
+    @staticmethod
+    def _train_codec(backend, vectors):
+        dim = vectors.shape[1]
+        if backend == 'pq':
+            codec = faiss.IndexPQ(dim, get_setting('PQ_M'), get_setting('PQ_NBITS'), faiss.METRIC_INNER_PRODUCT)
+        else:
+            codec = faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_INNER_PRODUCT)
+        codec.train(vectors)
+        return faiss.IndexIDMap2(codec)
+
+    @staticmethod
+    def _train_ivf(backend, vectors):
+        n, dim = vectors.shape
+        # Aim for ~4*sqrt(n) lists while keeping enough training points per list
+        nlist = get_setting('IVF_NLIST') or int(4 * math.sqrt(n))
+        nlist = max(1, min(nlist, n // 39))
+        quantizer = faiss.IndexFlatIP(dim)
+        if backend == 'ivf_pq':
+            index = faiss.IndexIVFPQ(
+                quantizer, dim, nlist, get_setting('PQ_M'), get_setting('PQ_NBITS'),
+                faiss.METRIC_INNER_PRODUCT
+            )
+        elif backend == 'ivf_sq8':
+            index = faiss.IndexIVFScalarQuantizer(
+                quantizer, dim, nlist, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_INNER_PRODUCT
+            )
+        else:
+            index = faiss.IndexIVFFlat(quantizer, dim, nlist, faiss.METRIC_INNER_PRODUCT)
+        index.train(vectors)
+        # Keep an id -> list entry map so vectors can be reconstructed by id
+        index.set_direct_map_type(faiss.DirectMap.Hashtable)
+        return index
+
+    def __len__(self):
+        return self.index.ntotal - len(self._dead)
+
+    def bytes_per_vector(self):
+        """Serialized index size divided by the number of stored vectors"""
+        with self._lock:
+            if self.index.ntotal == 0:
+                return 0.0
+            return faiss.serialize_index(self.index).nbytes / self.index.ntotal
+
+    def add(self, ids, vectors):
+        """Insert vectors for ``ids``, replacing any existing entries"""
+        ids = np.asarray(ids, dtype=np.int64)
+        if len(ids) == 0:
+            return
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        with self._lock:
+            self._remove(ids)
+            if self.backend == 'hnsw':
+                start = self.index.ntotal
+                self.index.add(vectors)
+                self._labels = np.concatenate([self._labels, ids])
+                self._rows.update(zip(ids.tolist(), range(start, start + len(ids))))
+            else:
+                self.index.add_with_ids(vectors, ids)
+
+    def remove(self, ids):
+        """Remove the entries for ``ids`` (unknown ids are ignored)"""
+        ids = np.asarray(list(ids), dtype=np.int64)
+        if len(ids) == 0:
+            return
+        with self._lock:
+            self._remove(ids)
+
+    def _remove(self, ids):
+        if self.backend == 'hnsw':
+            for job_id in ids.tolist():
+                row = self._rows.pop(job_id, None)
+                if row is not None:
+                    self._dead.add(row)
+        else:
+            self.index.remove_ids(ids)
+
+    def reconstruct(self, ids):
+        """Return the stored vectors for ``ids`` (approximate for compressed backends)"""
+        ids = np.asarray(ids, dtype=np.int64)
+        if len(ids) == 0:
+            return np.empty((0, self.dim), dtype=np.float32)
+        with self._lock:
+            if self.backend == 'hnsw':
+                ids = np.array([self._rows[job_id] for job_id in ids.tolist()], dtype=np.int64)
+            return self.index.reconstruct_batch(ids)
+
+    def _search_params(self, selector=None):
+        if self.backend.startswith('ivf'):
+            return faiss.SearchParametersIVF(sel=selector, nprobe=self.nprobe or 1)
+        if self.backend == 'hnsw':
+            return faiss.SearchParametersHNSW(sel=selector, efSearch=self.ef_search or 16)
+        if selector is not None:
+            return faiss.SearchParameters(sel=selector)
+        return None
+
+    def search(self, queries, k, allowed_ids=None):
+        """Return (scores, job_ids) of the ``k`` best matches for each query.
+
+        ``allowed_ids`` restricts the search to those jobs; the restriction
+        is applied inside the FAISS scan, so a full ``k`` is returned
+        whenever enough jobs qualify. Rows are padded with id -1 when fewer
+        than ``k`` jobs are found.
+        """
+        queries = np.ascontiguousarray(queries, dtype=np.float32)
+        with self._lock:
+            if allowed_ids is not None:
+                allowed_ids = np.asarray(allowed_ids, dtype=np.int64)
+                if self.backend == 'hnsw':
+                    allowed_ids = np.array([self._rows[job_id] for job_id in allowed_ids.tolist()
+                                            if job_id in self._rows], dtype=np.int64)
+                k = min(k, len(allowed_ids))
+            k = min(k, len(self))
+            if k == 0:
+                return (np.empty((len(queries), 0), dtype=np.float32),
+                        np.empty((len(queries), 0), dtype=np.int64))
+            candidates = k
+            if self.rerank is not None and self.rerank_factor:
+                candidates = min(k * self.rerank_factor, len(self))
+                if allowed_ids is not None:
+                    candidates = min(candidates, len(allowed_ids))
+            # The selector and its backing arrays must stay referenced for the search
+            selector = dead = bitmap = None
+            if allowed_ids is not None:
+                # HNSW rows in allowed_ids are live, so tombstones need no extra check
+                bitmap = self._bitmap(allowed_ids)
+                selector = faiss.IDSelectorBitmap(len(bitmap), faiss.swig_ptr(bitmap))
+            elif self._dead:
+                dead = faiss.IDSelectorBatch(np.fromiter(self._dead, dtype=np.int64))
+                selector = faiss.IDSelectorNot(dead)
+            if allowed_ids is not None and self.backend == 'pq':
+                # IndexPQ takes no selector; scoring the decoded codes gives the same PQ scores
+                scores, labels = self._exact_search(queries, candidates, allowed_ids)
+            else:
+                scores, labels = self.index.search(queries, candidates, params=self._search_params(selector))
+            if allowed_ids is not None and self.backend not in ('flat', 'pq') and (labels < 0).any():
+                # Probed lists / the graph beam held too few matches; scan them exactly
+                scores, labels = self._exact_search(queries, candidates, allowed_ids)
+            if self.backend == 'hnsw':
+                labels = np.where(labels >= 0, self._labels[labels], -1)
+        if candidates > k:
+            scores, labels = self._rerank(queries, labels, k)
+        return scores, labels
+
+    def _rerank(self, queries, labels, k):
+        """Order candidate ids by their exact inner product and keep ``k``"""
+        valid = labels >= 0
+        unique_ids, inverse = np.unique(labels[valid], return_inverse=True)
+        vectors = np.asarray(self.rerank(unique_ids.tolist()), dtype=np.float32)
+        exact = np.full(labels.shape, -np.inf, dtype=np.float32)
+        exact[valid] = np.einsum('ij,ij->i', vectors[inverse], queries[np.nonzero(valid)[0]])
+        top = top_k(exact, k)
+        return np.take_along_axis(exact, top, axis=1), np.take_along_axis(labels, top, axis=1)
+
+    @staticmethod
+    def _bitmap(keys):
+        """Little-endian bitset with a bit set for every key"""
+        bits = np.zeros(int(keys.max()) + 1 if len(keys) else 1, dtype=bool)
+        bits[keys] = True
+        return np.packbits(bits, bitorder='little')
+
+    def _exact_search(self, queries, k, keys):
+        """Brute-force top-k over ``keys`` (HNSW rows or job ids).
+
+        Stored vectors are decoded EXACT_SEARCH_BLOCK at a time with one
+        ``reconstruct_batch`` call each, and every block's matches are merged
+        into the running top-k, so a broad filter costs a few FAISS calls
+        and bounded memory rather than one call per allowed job.
+        """
+        scores = np.empty((len(queries), 0), dtype=np.float32)
+        labels = np.empty((len(queries), 0), dtype=np.int64)
+        for start in range(0, len(keys), EXACT_SEARCH_BLOCK):
+            block = keys[start:start + EXACT_SEARCH_BLOCK]
+            similarities = queries @ self.index.reconstruct_batch(block).T
+            scores = np.concatenate([scores, similarities], axis=1)
+            labels = np.concatenate([labels, np.broadcast_to(block, similarities.shape)], axis=1)
+            top = top_k(scores, k)
+            scores, labels = np.take_along_axis(scores, top, axis=1), np.take_along_axis(labels, top, axis=1)
+        return scores, labels
+
+
+def recall_at_k(found_ids, exact_ids):
+    """Mean share of the exact top-k ids that an approximate search returned"""
+    hits = [
+        len(set(found[found >= 0].tolist()) & set(exact[exact >= 0].tolist())) / max(1, (exact >= 0).sum())
+        for found, exact in zip(found_ids, exact_ids)
+    ]
+    return float(np.mean(hits)) if hits else 0.0
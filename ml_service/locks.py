@@ -0,0 +1,50 @@
+"""Read/write lock guarding a recommendation system's searchable state"""
+import contextlib
+import threading
+
+
+class ReadWriteLock:
+    """Many concurrent readers or one writer.
+
+    Writers take precedence: once a writer waits, new readers queue behind
+    it, so a steady stream of requests cannot starve an index update. The
+    lock is not reentrant; a reader must not take it again (from the same
+    or a helper thread) while holding it.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+
+    @contextlib.contextmanager
+    def read(self):
+        with self._condition:
+            while self._writer or self._waiting_writers:
+                self._condition.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._readers -= 1
+                if self._readers == 0:
+                    self._condition.notify_all()
+
+    @contextlib.contextmanager
+    def write(self):
+        with self._condition:
+            self._waiting_writers += 1
+            try:
+                while self._writer or self._readers:
+                    self._condition.wait()
+            finally:
+                self._waiting_writers -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writer = False
+                self._condition.notify_all()
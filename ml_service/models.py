@@ -1,52 +1,143 @@
+import contextvars
 import string
+import threading
 import numpy as np
-import faiss
-import pandas as pd
-import torch
-from sentence_transformers import SentenceTransformer
+from scipy import sparse
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 import logging
 
+from .catalogue import CandidateCatalogue, JobCatalogue
+from .chunking import encode_chunked
+from .conf import get_setting
+from .embedding_store import JobEmbeddingStore
+from .encoders import load_onnx_encoder, load_torch_encoder, onnx_directory
+from .executors import LazyExecutor
+from .fusion import fuse_scores
+from .index import JobVectorIndex
+from .locks import ReadWriteLock
+from .shards import ShardedJobIndex, partition_key
+from .timing import timed
+from .topk import top_k
+
 logger = logging.getLogger(__name__)
 
 class AdvancedJobRecommendationSystem:
-    def __init__(self, jobs_data):
-        """Initialize the advanced ML system with job data"""
-        self.jobs_data = jobs_data
+    MODEL_NAME = "paraphrase-MiniLM-L6-v2"
+    # Texts per SentenceTransformer.encode batch
+    ENCODE_BATCH_SIZE = 64
+    # Queries scored per sparse TF-IDF product, bounding the dense score block
+    TFIDF_QUERY_BLOCK = 256
+    # Refit the TF-IDF vocabulary once this share of jobs changed since the last fit
+    TFIDF_REFIT_RATIO = 0.2
+    # Columnar snapshot holding the fields filters and payloads read
+    CATALOGUE_CLASS = JobCatalogue
+    
+    def __init__(self, jobs_data, sentence_model=None, embedding_store=None, tfidf_store=None,
+                 query_cache=None):
+        """Initialize the advanced ML system with job data.
+
+        ``jobs_data`` may be any iterable, e.g. a queryset iterator: it is
+        read once into a columnar catalogue and the objects are not kept.
+        A preloaded ``sentence_model`` can be passed in so the encoder is
+        loaded and quantized once per process instead of per instance, a
+        ``JobEmbeddingStore`` so only new or changed jobs are re-encoded, a
+        ``TfidfArtifactStore`` so the TF-IDF model is loaded, not refitted,
+        and a ``QueryEmbeddingCache`` so repeated queries skip the encoder.
+        """
+        self.embedding_store = embedding_store
+        self.tfidf_store = tfidf_store
+        self.query_cache = query_cache
+        self._tfidf_lock = threading.Lock()
+        # Requests read the catalogue, TF-IDF rows and index under the read
+        # side; apply_changes swaps them in under the write side
+        self._state_lock = ReadWriteLock()
+        self.job_ids = []
         self.jobs_texts = []
+        self.catalogue = None
+        self.text_by_id = {}
         self.job_embeddings = None
         self.tfidf_vectorizer = None
+        self.tfidf_matrix = None
+        self.tfidf_ids = None
+        self._tfidf_row_of = None
+        self._tfidf_row_ids = None
         self.faiss_index = None
+        self.partition_fields = self._partition_fields()
         
         # Load Sentence Transformer model
+        if sentence_model is None:
+            sentence_model = self.load_sentence_model()
+        self.sentence_model = sentence_model
+        
+        self._prepare_job_data(jobs_data)
+        self._build_embeddings()
+        self._build_faiss_index()
+        self._index_keys = None
+    
+    @staticmethod
+    def load_sentence_model(backend=None):
+        """Load the sentence encoder, or None if unavailable.
+
+        ``backend`` (default: ENCODER_BACKEND) is 'onnx' for the int8 ONNX
+        Runtime graph written by ``manage.py export_encoder``, or 'torch'
+        for the quantized Sentence Transformer, which is also the fallback.
+        """
+        model_name = AdvancedJobRecommendationSystem.MODEL_NAME
+        if (backend or get_setting('ENCODER_BACKEND')) == 'onnx':
+            sentence_model = load_onnx_encoder(model_name, onnx_directory(model_name))
+            if sentence_model is not None:
+                logger.info("✅ ONNX sentence encoder loaded successfully")
+                return sentence_model
+            logger.warning("⚠️ ONNX encoder not available, falling back to PyTorch")
+        
         try:
-            self.sentence_model = SentenceTransformer("paraphrase-MiniLM-L6-v2", device="cpu")
-            # Quantize for better performance
-            self.sentence_model = torch.quantization.quantize_dynamic(
-                self.sentence_model, {torch.nn.Linear}, dtype=torch.qint8
-            )
+            sentence_model = load_torch_encoder(model_name)
             logger.info("✅ Sentence Transformer model loaded successfully")
+            return sentence_model
         except Exception as e:
             logger.error(f"❌ Error loading Sentence Transformer: {str(e)}")
-            self.sentence_model = None
-        
-        self._prepare_job_data()
-        self._build_embeddings()
-        self._build_faiss_index()
+            return None
     
-    def _prepare_job_data(self):
+    def _partition_fields(self):
+        """Job fields the vector index is sharded by (empty for one global index)"""
+        return tuple(get_setting('INDEX_SHARD_KEYS'))
+    
+    def _partition_keys(self, jobs):
+        return [partition_key(job, self.partition_fields) for job in jobs]
+    
+    def _prepare_job_data(self, jobs):
         """Prepare job text data for ML processing"""
-        for job in self.jobs_data:
-            job_text = f"{job.position} {job.workplace} {job.working_mode} {job.job_role_and_duties} {job.requisite_skill}"
-            self.jobs_texts.append(self._clean_text(job_text))
+        # Shard keys of the jobs, only needed until the index is built
+        self._index_keys = []
         
-        logger.info(f"✅ Prepared {len(self.jobs_texts)} job texts for ML processing")
+        def prepared(jobs):
+            for job in jobs:
+                clean_text = self._job_text(job)
+                self.job_ids.append(job.pk)
+                self.jobs_texts.append(clean_text)
+                self.text_by_id[job.pk] = clean_text
+                if self.partition_fields:
+                    self._index_keys.append(partition_key(job, self.partition_fields))
+                yield job
+        
+        self.catalogue = self.CATALOGUE_CLASS.from_objects(prepared(jobs))
+        logger.info(f"✅ Prepared {len(self.jobs_texts)} job texts for ML processing "
+                    f"(catalogue {self.catalogue.nbytes() / 2 ** 20:.1f} MB)")
+    
+    @classmethod
+    def _job_text(cls, job):
+        """Cleaned text used to embed and vectorize a job"""
+        job_text = f"{job.position} {job.workplace} {job.working_mode} {job.job_role_and_duties} {job.requisite_skill}"
+        return cls._clean_text(job_text)
     
-    def _clean_text(self, text):
+    @staticmethod
+    def _clean_text(text):
         """Clean text for ML processing"""
         return text.lower().translate(str.maketrans("", "", string.punctuation)).strip()
     
+    def __len__(self):
+        return len(self.catalogue)
+    
     def _build_embeddings(self):
         """Build sentence embeddings for all jobs"""
         if self.sentence_model is None:
@@ -54,14 +145,56 @@ class AdvancedJobRecommendationSystem:
             return
         
         try:
-            self.job_embeddings = self.sentence_model.encode(
-                self.jobs_texts, convert_to_numpy=True
-            ).astype(np.float16)
+            self.job_embeddings = self._embed_jobs(self.job_ids, self.jobs_texts, sync=True)
             logger.info(f"✅ Built embeddings for {len(self.jobs_texts)} jobs")
         except Exception as e:
             logger.error(f"❌ Error building embeddings: {str(e)}")
             self.job_embeddings = None
     
+    def _embed_jobs(self, job_ids, texts, sync=False):
+        """Embed job texts, going through the embedding store when there is one"""
+        if self.embedding_store is None:
+            return self._encode_texts(texts)
+        if sync:
+            return self.embedding_store.sync(job_ids, texts, self._encode_texts)
+        return self.embedding_store.upsert(job_ids, texts, self._encode_texts)
+    
+    @classmethod
+    def embedding_key(cls):
+        """Key of stored and cached embeddings; changes whenever the embedding recipe does"""
+        return (f"{cls.MODEL_NAME}/normalized/chunks-{get_setting('CHUNK_WORDS')}-"
+                f"{get_setting('CHUNK_OVERLAP')}-{get_setting('MAX_CHUNKS')}-{get_setting('CHUNK_POOLING')}")
+    
+    @classmethod
+    def encode_with(cls, sentence_model, texts):
+        """Encode texts into unit-length float32 embeddings (inner product = cosine).
+
+        The encoder truncates its input at ~128 word pieces, so long texts are
+        split into overlapping windows whose embeddings are pooled. Exposed so
+        importers can precompute job vectors with the index's exact recipe.
+        """
+        def encode_batch(texts):
+            return sentence_model.encode(
+                texts, batch_size=cls.ENCODE_BATCH_SIZE, convert_to_numpy=True,
+                normalize_embeddings=True
+            ).astype(np.float32)
+        
+        return encode_chunked(
+            texts, encode_batch,
+            get_setting('CHUNK_WORDS'), get_setting('CHUNK_OVERLAP'),
+            get_setting('MAX_CHUNKS'), get_setting('CHUNK_POOLING'),
+        )
+    
+    def _encode_texts(self, texts):
+        return self.encode_with(self.sentence_model, texts)
+    
+    def _encode_queries(self, clean_texts):
+        """Encode query texts, reusing cached embeddings of repeated queries"""
+        with timed('encode'):
+            if self.query_cache is None:
+                return self._encode_texts(clean_texts)
+            return self.query_cache.encode(clean_texts, self._encode_texts, self.embedding_key())
+    
     def _build_faiss_index(self):
         """Build FAISS index for fast similarity search"""
         if self.job_embeddings is None:
@@ -70,68 +203,213 @@ class AdvancedJobRecommendationSystem:
         
         try:
             self.dim = self.job_embeddings.shape[1]
-            self.faiss_index = faiss.IndexFlatIP(self.dim)
-            self.faiss_index.add(self.job_embeddings.astype(np.float16))
+            rerank = self.embedding_store.get if self.embedding_store is not None else None
+            if self.partition_fields:
+                self.faiss_index = ShardedJobIndex.build(
+                    self.job_ids, self.job_embeddings, self._index_keys, rerank=rerank
+                )
+            else:
+                self.faiss_index = JobVectorIndex.build(self.job_ids, self.job_embeddings, rerank=rerank)
+            if self.embedding_store is not None:
+                # Full-precision vectors stay in the memory-mapped store, not in RAM
+                self.job_embeddings = None
             logger.info("✅ FAISS index built successfully")
         except Exception as e:
             logger.error(f"❌ Error building FAISS index: {str(e)}")
             self.faiss_index = None
     
     def _build_tfidf_features(self):
-        """Build TF-IDF features for jobs"""
-        try:
-            self.tfidf_vectorizer = TfidfVectorizer(
-                max_features=1000,
-                stop_words='english',
-                ngram_range=(1, 2)
+        """Load or build TF-IDF features for jobs"""
+        with self._tfidf_lock:
+            if self.tfidf_vectorizer is not None:
+                return
+            try:
+                if self.tfidf_store is not None:
+                    self._load_tfidf_features()
+                else:
+                    self._fit_tfidf_features()
+                logger.info("✅ TF-IDF features built successfully")
+            except Exception as e:
+                logger.error(f"❌ Error building TF-IDF features: {str(e)}")
+                self.tfidf_vectorizer = None
+    
+    def _fit_tfidf_features(self):
+        """Fit a new TF-IDF vocabulary on the whole catalogue"""
+        tfidf_vectorizer = TfidfVectorizer(
+            max_features=1000,
+            stop_words='english',
+            ngram_range=(1, 2)
+        )
+        self.tfidf_matrix = tfidf_vectorizer.fit_transform(self.jobs_texts)
+        self.tfidf_ids = np.asarray(self.job_ids, dtype=np.int64)
+        self.tfidf_vectorizer = tfidf_vectorizer
+    
+    def _load_tfidf_features(self):
+        """Reuse the saved TF-IDF model, transforming only new or changed jobs.
+
+        The vocabulary is refitted, and a new version saved, once the jobs
+        added, changed or removed since the last fit exceed
+        TFIDF_REFIT_RATIO of the catalogue.
+        """
+        ids = np.asarray(self.job_ids, dtype=np.int64)
+        hashes = np.fromiter(
+            (JobEmbeddingStore.content_hash(text) for text in self.jobs_texts),
+            dtype=np.uint64, count=len(ids)
+        )
+        
+        saved = self.tfidf_store.load()
+        if saved is not None:
+            saved_rows = {
+                key: row for row, key in enumerate(zip(saved.ids.tolist(), saved.hashes.tolist()))
+            }
+            rows = np.array(
+                [saved_rows.get(key, -1) for key in zip(ids.tolist(), hashes.tolist())],
+                dtype=np.int64
             )
-            self.tfidf_matrix = self.tfidf_vectorizer.fit_transform(self.jobs_texts)
-            logger.info("✅ TF-IDF features built successfully")
-        except Exception as e:
-            logger.error(f"❌ Error building TF-IDF features: {str(e)}")
-            self.tfidf_vectorizer = None
+            fresh = rows < 0
+            removed = len(set(saved.ids.tolist()) - set(ids.tolist()))
+            drift = saved.drift + int(fresh.sum()) + removed
+            
+            if drift <= self.TFIDF_REFIT_RATIO * len(ids):
+                order = np.concatenate([np.flatnonzero(~fresh), np.flatnonzero(fresh)])
+                parts = [saved.matrix[rows[~fresh]]]
+                if fresh.any():
+                    parts.append(saved.vectorizer.transform([self.jobs_texts[i] for i in np.flatnonzero(fresh)]))
+                self.tfidf_matrix = sparse.vstack(parts, format='csr')
+                self.tfidf_ids = ids[order]
+                self.tfidf_vectorizer = saved.vectorizer
+                if drift != saved.drift:
+                    self.tfidf_store.save(
+                        self.tfidf_vectorizer, self.tfidf_matrix, self.tfidf_ids, hashes[order], drift
+                    )
+                return
+        
+        self._fit_tfidf_features()
+        self.tfidf_store.save(self.tfidf_vectorizer, self.tfidf_matrix, self.tfidf_ids, hashes, 0)
     
-    def get_tfidf_recommendations(self, resume_text, top_n=20):
-        """Get recommendations using TF-IDF + Cosine Similarity"""
-        if self.tfidf_vectorizer is None:
-            self._build_tfidf_features()
+    def apply_changes(self, upserted_jobs, removed_ids):
+        """Incrementally add, refresh or remove jobs without a full rebuild.
+
+        Jobs whose text changed are re-embedded and re-vectorized against the
+        existing TF-IDF vocabulary; metadata-only edits just swap the object,
+        unless they move the job to another index shard. ``upserted_jobs``
+        only need to be model instances for this call; the catalogue keeps
+        a columnar copy.
+
+        The new catalogue, TF-IDF rows and vectors are built first, while
+        requests keep searching the current state; they are then swapped in,
+        and the index updated, under the write lock, so a request never sees
+        one structure updated and another not. Calls must not overlap (the
+        registry serialises them).
+        """
+        removed_ids = set(removed_ids)
+        texts = {}
+        changed_ids, changed_texts = [], []
+        moved_ids, moved_texts = [], []
         
-        if self.tfidf_vectorizer is None:
-            logger.error("❌ TF-IDF vectorizer not available")
-            return []
+        for job in upserted_jobs:
+            clean_text = self._job_text(job)
+            if self.text_by_id.get(job.pk) != clean_text:
+                changed_ids.append(job.pk)
+                changed_texts.append(clean_text)
+            elif self._partition_keys([job]) != self._partition_keys(self.catalogue.records([job.pk])):
+                moved_ids.append(job.pk)
+                moved_texts.append(clean_text)
+            texts[job.pk] = clean_text
         
-        try:
-            # Clean resume text
-            clean_resume = self._clean_text(resume_text)
-            
-            # Transform resume to TF-IDF vector
-            resume_vector = self.tfidf_vectorizer.transform([clean_resume])
-            
-            # Calculate cosine similarity
-            similarities = cosine_similarity(resume_vector, self.tfidf_matrix).flatten()
-            
-            # Get top recommendations
-            top_indices = np.argsort(similarities)[-top_n:][::-1]
-            
-            recommendations = []
-            for idx in top_indices:
-                # Convert numpy int64 to regular int for QuerySet indexing
-                job_idx = int(idx)
-                job = self.jobs_data[job_idx]
-                recommendations.append({
-                    'position': job.position,
-                    'workplace': job.workplace,
-                    'working_mode': job.working_mode,
-                    'job_role_and_duties': job.job_role_and_duties,
-                    'requisite_skill': job.requisite_skill,
-                    'salary_min': float(job.salary_min) if job.salary_min else None,
-                    'salary_max': float(job.salary_max) if job.salary_max else None,
-                    'location': job.location,
-                    'similarity_score': round(similarities[idx] * 100, 1),
-                    'ai_ranked': True,
-                    'method': 'TF-IDF + Cosine Similarity'
-                })
+        catalogue = self.catalogue.apply_changes(upserted_jobs, removed_ids)
+        job_ids = catalogue.ids.tolist()
+        jobs_texts = [texts[job_id] if job_id in texts else self.text_by_id[job_id] for job_id in job_ids]
+        
+        index_ids, index_texts = changed_ids + moved_ids, changed_texts + moved_texts
+        encoded, keys = {}, None
+        if self.sentence_model is not None and index_ids:
+            # Encode now; the shared store is only written under the lock, as requests read it
+            todo = index_texts
+            if self.embedding_store is not None:
+                todo = [index_texts[i] for i in self.embedding_store.missing(index_ids, index_texts)]
+            if todo:
+                encoded = dict(zip(todo, self._encode_texts(todo)))
+            if self.partition_fields:
+                keys = self._partition_keys(catalogue.records(index_ids))
+        
+        vectorizer, tfidf_matrix, tfidf_ids = self.tfidf_vectorizer, self.tfidf_matrix, self.tfidf_ids
+        if vectorizer is not None:
+            stale = np.isin(tfidf_ids, list(removed_ids) + changed_ids)
+            keep = np.flatnonzero(~stale)
+            parts, ids = [tfidf_matrix[keep]], [tfidf_ids[keep]]
+            if changed_ids:
+                parts.append(vectorizer.transform(changed_texts))
+                ids.append(np.asarray(changed_ids, dtype=np.int64))
+            tfidf_matrix = sparse.vstack(parts, format='csr')
+            tfidf_ids = np.concatenate(ids)
+        
+        with self._state_lock.write():
+            self.catalogue, self.job_ids, self.jobs_texts = catalogue, job_ids, jobs_texts
+            if self.tfidf_vectorizer is vectorizer:
+                self.tfidf_matrix, self.tfidf_ids = tfidf_matrix, tfidf_ids
+            else:
+                # A request built the TF-IDF features from the old catalogue meanwhile
+                self.tfidf_vectorizer = None
+            self.text_by_id.update(texts)
+            for job_id in removed_ids:
+                self.text_by_id.pop(job_id, None)
             
+            if self.sentence_model is not None:
+                if removed_ids:
+                    if self.faiss_index is not None:
+                        self.faiss_index.remove(removed_ids)
+                    if self.embedding_store is not None:
+                        self.embedding_store.remove(removed_ids)
+                if index_ids:
+                    if self.embedding_store is None:
+                        vectors = self._encode_missing(index_texts, encoded)
+                    else:
+                        vectors = self.embedding_store.upsert(
+                            index_ids, index_texts, lambda texts: self._encode_missing(texts, encoded)
+                        )
+                    if self.faiss_index is None:
+                        self.dim = vectors.shape[1]
+                        if self.partition_fields:
+                            rerank = self.embedding_store.get if self.embedding_store is not None else None
+                            self.faiss_index = ShardedJobIndex(self.dim, rerank=rerank)
+                        else:
+                            self.faiss_index = JobVectorIndex(self.dim)
+                    if self.partition_fields:
+                        self.faiss_index.add(index_ids, vectors, keys)
+                    else:
+                        self.faiss_index.add(index_ids, vectors)
+        
+        logger.info(f"✅ Applied incremental update: {len(changed_ids)} re-embedded, {len(removed_ids)} removed")
+    
+    def _encode_missing(self, texts, encoded):
+        """Vectors for ``texts``, taken from ``encoded`` (text -> vector) where present"""
+        todo = [text for text in texts if text not in encoded]
+        if todo:
+            encoded.update(zip(todo, self._encode_texts(todo)))
+        return np.stack([encoded[text] for text in texts])
+    
+    def _job_to_dict(self, job, similarity_score, method):
+        """Build the recommendation payload for a job (a catalogue record)"""
+        return {
+            'job_id': job.pk,
+            'position': job.position,
+            'workplace': job.workplace,
+            'working_mode': job.working_mode,
+            'job_role_and_duties': job.job_role_and_duties,
+            'requisite_skill': job.requisite_skill,
+            'salary_min': job.salary_min,
+            'salary_max': job.salary_max,
+            'location': job.location,
+            'similarity_score': round(float(similarity_score), 1),
+            'ai_ranked': True,
+            'method': method
+        }
+    
+    def get_tfidf_recommendations(self, resume_text, top_n=20, filters=None):
+        """Get recommendations using TF-IDF + Cosine Similarity"""
+        try:
+            recommendations = self.recommend_many([resume_text], 'tfidf', top_n, filters=filters)[0]
             logger.info(f"✅ TF-IDF recommendations: {len(recommendations)} jobs")
             return recommendations
             
@@ -139,86 +417,233 @@ class AdvancedJobRecommendationSystem:
             logger.error(f"❌ Error in TF-IDF recommendations: {str(e)}")
             return []
     
-    def get_semantic_recommendations(self, resume_text, top_n=20):
+    def get_semantic_recommendations(self, resume_text, top_n=20, filters=None):
         """Get recommendations using Sentence Transformers + FAISS"""
-        if self.faiss_index is None or self.sentence_model is None:
+        if not self._semantic_available():
             logger.warning("⚠️ Semantic search not available, falling back to TF-IDF")
-            return self.get_tfidf_recommendations(resume_text, top_n)
+            return self.get_tfidf_recommendations(resume_text, top_n, filters)
         
         try:
-            # Clean resume text
-            clean_resume = self._clean_text(resume_text)
-            
-            # Get resume embedding
-            resume_embedding = self.sentence_model.encode(
-                [clean_resume], convert_to_numpy=True
-            ).astype(np.float16)
-            
-            # Search FAISS index
-            distances, indices = self.faiss_index.search(resume_embedding, top_n)
-            
-            recommendations = []
-            for i, idx in enumerate(indices[0]):
-                # Convert numpy int64 to regular int for QuerySet indexing
-                job_idx = int(idx)
-                job = self.jobs_data[job_idx]
-                # Convert distance to similarity score (0-100)
-                similarity_score = max(0, min(100, (1 - distances[0][i]) * 100))
-                
-                recommendations.append({
-                    'position': job.position,
-                    'workplace': job.workplace,
-                    'working_mode': job.working_mode,
-                    'job_role_and_duties': job.job_role_and_duties,
-                    'requisite_skill': job.requisite_skill,
-                    'salary_min': float(job.salary_min) if job.salary_min else None,
-                    'salary_max': float(job.salary_max) if job.salary_max else None,
-                    'location': job.location,
-                    'similarity_score': round(similarity_score, 1),
-                    'ai_ranked': True,
-                    'method': 'Semantic Search (BERT)'
-                })
-            
+            recommendations = self.recommend_many([resume_text], 'semantic', top_n, filters=filters)[0]
             logger.info(f"✅ Semantic recommendations: {len(recommendations)} jobs")
             return recommendations
             
         except Exception as e:
             logger.error(f"❌ Error in semantic recommendations: {str(e)}")
-            return self.get_tfidf_recommendations(resume_text, top_n)
+            return self.get_tfidf_recommendations(resume_text, top_n, filters)
     
-    def get_hybrid_recommendations(self, resume_text, top_n=20):
+    def get_hybrid_recommendations(self, resume_text, top_n=20, fusion=None, filters=None):
         """Get recommendations using both TF-IDF and Semantic methods"""
-        tfidf_recs = self.get_tfidf_recommendations(resume_text, top_n)
-        semantic_recs = self.get_semantic_recommendations(resume_text, top_n)
-        
-        # Combine and rank by average score
-        job_scores = {}
-        
-        # Add TF-IDF scores
-        for rec in tfidf_recs:
-            job_key = f"{rec['position']}_{rec['workplace']}"
-            if job_key not in job_scores:
-                job_scores[job_key] = {'job': rec, 'scores': []}
-            job_scores[job_key]['scores'].append(rec['similarity_score'])
-        
-        # Add semantic scores
-        for rec in semantic_recs:
-            job_key = f"{rec['position']}_{rec['workplace']}"
-            if job_key not in job_scores:
-                job_scores[job_key] = {'job': rec, 'scores': []}
-            job_scores[job_key]['scores'].append(rec['similarity_score'])
-        
-        # Calculate average scores
-        hybrid_recommendations = []
-        for job_key, data in job_scores.items():
-            avg_score = sum(data['scores']) / len(data['scores'])
-            job = data['job'].copy()
-            job['similarity_score'] = round(avg_score, 1)
-            job['method'] = 'Hybrid (TF-IDF + BERT)'
-            hybrid_recommendations.append(job)
-        
-        # Sort by average score
-        hybrid_recommendations.sort(key=lambda x: x['similarity_score'], reverse=True)
-        
-        logger.info(f"✅ Hybrid recommendations: {len(hybrid_recommendations)} jobs")
-        return hybrid_recommendations[:top_n] 
\ No newline at end of file
+        try:
+            recommendations = self.recommend_many([resume_text], 'hybrid', top_n, fusion, filters)[0]
+            logger.info(f"✅ Hybrid recommendations: {len(recommendations)} jobs")
+            return recommendations
+            
+        except Exception as e:
+            logger.error(f"❌ Error in hybrid recommendations: {str(e)}")
+            return self.get_tfidf_recommendations(resume_text, top_n, filters)
+    
+    def recommend_many(self, resume_texts, method='hybrid', top_n=20, fusion=None, filters=None):
+        """Recommend jobs for many resumes in one call.
+
+        All resumes are encoded in batched encoder calls, searched with one
+        multi-query FAISS search and scored against the TF-IDF matrix with
+        blocked sparse products. ``filters`` (a JobFilters) restricts every
+        ranking to matching jobs inside the search itself. Returns one
+        recommendation list per resume.
+        """
+        with self._state_lock.read():
+            return self._recommend_many(resume_texts, method, top_n, fusion, filters)
+    
+    def _recommend_many(self, resume_texts, method, top_n, fusion, filters):
+        with timed('clean'):
+            clean_texts = [self._clean_text(text) for text in resume_texts]
+        if method == 'semantic' and not self._semantic_available():
+            method = 'tfidf'
+        
+        allowed_ids = None
+        if filters:
+            with timed('filter'):
+                allowed_ids = self.allowed_ids(filters)
+            if len(allowed_ids) == 0:
+                return [[] for _ in clean_texts]
+        
+        if method == 'tfidf':
+            query_matrix = self._tfidf_vectorize(clean_texts)
+            if query_matrix is None:
+                return [[] for _ in clean_texts]
+            return [
+                self._build_recommendations(job_ids, scores * 100, 'TF-IDF + Cosine Similarity')
+                for job_ids, scores in self._tfidf_rank(query_matrix, top_n, allowed_ids)
+            ]
+        
+        if method == 'semantic':
+            embeddings = self._encode_queries(clean_texts)
+            return [
+                self._build_recommendations(
+                    job_ids, np.clip(scores, 0, 1) * 100, 'Semantic Search (BERT)'
+                )
+                for job_ids, scores in self._semantic_rank(embeddings, top_n, allowed_ids)
+            ]
+        
+        return self._hybrid_many(
+            clean_texts, top_n, fusion or get_setting('HYBRID_FUSION'), allowed_ids
+        )
+    
+    def allowed_ids(self, filters):
+        """Sorted ids of the current jobs matching ``filters``"""
+        return self.catalogue.allowed_ids(filters)
+    
+    def _hybrid_many(self, clean_texts, top_n, fusion, allowed_ids=None):
+        """Fuse TF-IDF and semantic rankings per job id.
+
+        Both stages run concurrently (the encoder and FAISS release the GIL),
+        then every job in the union of the two candidate sets is scored by
+        both rankers, so a job found by only one of them is not penalised.
+        """
+        query_matrix = self._tfidf_vectorize(clean_texts)
+        tfidf_future = None
+        if query_matrix is not None:
+            # Run in a copy of this context so the stage is timed with the request
+            tfidf_future = _stage_executor().submit(
+                contextvars.copy_context().run, self._tfidf_rank, query_matrix, top_n, allowed_ids
+            )
+        
+        semantic_results = embeddings = None
+        if self._semantic_available():
+            embeddings = self._encode_queries(clean_texts)
+            semantic_results = self._semantic_rank(embeddings, top_n, allowed_ids)
+        tfidf_results = tfidf_future.result() if tfidf_future is not None else None
+        
+        with timed('fusion'):
+            weights = get_setting('HYBRID_WEIGHTS')
+            results = []
+            for i in range(len(clean_texts)):
+                candidates, columns, column_weights = [], [], []
+                if tfidf_results is not None:
+                    candidates.append(tfidf_results[i][0])
+                if semantic_results is not None:
+                    candidates.append(semantic_results[i][0])
+                if not candidates:
+                    results.append([])
+                    continue
+                job_ids = np.unique(np.concatenate(candidates))
+            
+                if tfidf_results is not None:
+                    columns.append(self._tfidf_scores_for(query_matrix[i], job_ids))
+                    column_weights.append(weights['tfidf'])
+                if semantic_results is not None:
+                    columns.append(self._semantic_scores_for(embeddings[i], job_ids))
+                    column_weights.append(weights['semantic'])
+            
+                fused = fuse_scores(columns, fusion, column_weights, get_setting('RRF_K'))
+                top_indices = top_k(fused, top_n)
+                results.append(self._build_recommendations(
+                    job_ids[top_indices], fused[top_indices] * 100, 'Hybrid (TF-IDF + BERT)'
+                ))
+            return results
+    
+    def _semantic_available(self):
+        return self.faiss_index is not None and self.sentence_model is not None
+    
+    def _build_recommendations(self, job_ids, scores, method):
+        """Recommendation payloads for ranked job ids"""
+        return [
+            self._job_to_dict(record, score, method)
+            for record, score in zip(self.catalogue.records(job_ids), scores)
+        ]
+    
+    def _tfidf_vectorize(self, clean_texts):
+        """TF-IDF query vectors, or None when the lexical model is unavailable"""
+        if self.tfidf_vectorizer is None:
+            self._build_tfidf_features()
+        
+        if self.tfidf_vectorizer is None:
+            logger.error("❌ TF-IDF vectorizer not available")
+            return None
+        with timed('tfidf'):
+            return self.tfidf_vectorizer.transform(clean_texts)
+    
+    def _tfidf_rank(self, query_matrix, top_n, allowed_ids=None):
+        """Top (job_ids, cosine scores) per query, one sparse product per block"""
+        with timed('tfidf'):
+            tfidf_ids = self.tfidf_ids
+            matrix = self.tfidf_matrix
+            if allowed_ids is not None:
+                # Only score the rows of matching jobs
+                rows = np.flatnonzero(np.isin(tfidf_ids, allowed_ids))
+                tfidf_ids, matrix = tfidf_ids[rows], matrix[rows]
+        
+            results = []
+            for start in range(0, query_matrix.shape[0], self.TFIDF_QUERY_BLOCK):
+                query_block = query_matrix[start:start + self.TFIDF_QUERY_BLOCK]
+                # Rows are L2-normalised, so the dot product is the cosine similarity
+                similarities = (matrix @ query_block.T).T.toarray()
+                for row, top_indices in zip(similarities, top_k(similarities, top_n)):
+                    results.append((tfidf_ids[top_indices], row[top_indices]))
+            return results
+    
+    def _semantic_rank(self, embeddings, top_n, allowed_ids=None):
+        """Top (job_ids, cosine scores) per query from one multi-query search"""
+        with timed('faiss'):
+            scores, job_ids = self.faiss_index.search(embeddings, top_n, allowed_ids)
+        # -1 marks an empty slot when fewer than top_n jobs are indexed
+        return [(row_ids[row_ids >= 0], row_scores[row_ids >= 0])
+                for row_scores, row_ids in zip(scores, job_ids)]
+    
+    def _tfidf_scores_for(self, query_vector, job_ids):
+        """Exact TF-IDF cosine between one query and the given jobs"""
+        if self._tfidf_row_of is None or self._tfidf_row_ids is not self.tfidf_ids:
+            self._tfidf_row_of = {job_id: row for row, job_id in enumerate(self.tfidf_ids.tolist())}
+            self._tfidf_row_ids = self.tfidf_ids
+        rows = np.array([self._tfidf_row_of.get(int(job_id), -1) for job_id in job_ids])
+        scores = np.zeros(len(job_ids), dtype=np.float32)
+        present = rows >= 0
+        if present.any():
+            scores[present] = (self.tfidf_matrix[rows[present]] @ query_vector.T).toarray().ravel()
+        return scores
+    
+    def _semantic_scores_for(self, embedding, job_ids):
+        """Exact embedding cosine between one query and the given jobs"""
+        if self.embedding_store is not None:
+            vectors = self.embedding_store.get(job_ids.tolist())
+        else:
+            vectors = self.faiss_index.reconstruct(job_ids)
+        return np.asarray(vectors, dtype=np.float32) @ embedding
+
+
+class CandidateRecommendationSystem(AdvancedJobRecommendationSystem):
+    """The same index and ranking machinery over resumes instead of jobs.
+
+    Built from ``Resume.extracted_text`` and queried with a job
+    description's ``job_text``; recommendations are candidate payloads.
+    Job filters do not apply to resumes.
+    """
+    
+    CATALOGUE_CLASS = CandidateCatalogue
+    
+    def _partition_fields(self):
+        return ()
+    
+    @classmethod
+    def _job_text(cls, resume):
+        return cls._clean_text(resume.extracted_text or '')
+    
+    def _job_to_dict(self, resume, similarity_score, method):
+        """Build the recommendation payload for a candidate (a catalogue record)"""
+        return {
+            'resume_id': resume.pk,
+            'title': resume.title,
+            'filename': resume.filename,
+            'uploaded_at': resume.uploaded_at,
+            'similarity_score': round(float(similarity_score), 1),
+            'ai_ranked': True,
+            'method': method
+        }
+    
+    def allowed_ids(self, filters):
+        raise ValueError("Job filters do not apply to candidate recommendations")
+
+
+# Shared thread pool running the TF-IDF stage alongside encoding
+_stage_executor = LazyExecutor('ml-stage', 4)
@@ -0,0 +1,318 @@
+"""Process-wide registry owning the encoder and the prebuilt job index"""
+import logging
+import os
+import threading
+from contextlib import contextmanager
+
+from django.db import transaction
+from filelock import FileLock
+
+from .conf import artifact_dir, artifact_path, encoder_authkey, get_setting
+from .timing import timed
+
+logger = logging.getLogger(__name__)
+
+
+class RecommendationRegistry:
+    """Keep one AdvancedJobRecommendationSystem alive per worker process.
+
+    The sentence encoder is loaded (and quantized) once, and the job index is
+    built once and reused by every request. Requests only encode their query
+    and search the prebuilt index.
+
+    Job changes are published to an append-only change log in the artifact
+    directory, so a job saved by a management command or by another worker
+    reaches every process. Before serving, each process applies the log
+    entries it has not seen yet as one coalesced incremental update; a full
+    rebuild only happens on invalidate(), log rotation, or when a batch
+    touches a large share of the catalogue.
+    """
+
+    NAME = 'Recommendation'
+    CHANGES_NAME = 'catalogue.changes'
+    # Artifact subdirectories of the embedding and TF-IDF stores
+    EMBEDDINGS_DIR = 'job_embeddings'
+    TFIDF_DIR = 'tfidf'
+    FULL_REBUILD = '*'
+    # Rotate the change log once it grows past this size
+    MAX_LOG_BYTES = 1 << 20
+    # Rebuild from scratch when one batch touches more than this share of jobs
+    REBUILD_RATIO = 0.2
+    # Primary keys fetched per query when applying a batch
+    FETCH_BATCH_SIZE = 1000
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._local = threading.local()
+        self._encoder = None
+        self._encoder_loaded = False
+        self._embedding_store = None
+        self._tfidf_store = None
+        self._system = None
+        self._log_position = (None, 0)
+        self._version = 0
+
+    @property
+    def version(self):
+        """Counter bumped whenever the served index changes"""
+        return self._version
+
+    @property
+    def catalogue_version(self):
+        """Change-log position this process has applied, comparable across processes"""
+        inode, offset = self._log_position
+        return f"{inode or 0}-{offset}"
+
+    def get_encoder(self):
+        """Return the shared sentence encoder, loading it on first use.
+
+        With ML_SERVICE['ENCODER_SERVER'] set, texts are encoded by the
+        encoder server process instead (``manage.py run_encoder_server``);
+        the model is only loaded here if that server cannot be reached, at
+        startup or later.
+        """
+        if not self._encoder_loaded:
+            with self._lock:
+                if not self._encoder_loaded:
+                    from .models import AdvancedJobRecommendationSystem
+                    self._encoder = None
+                    if get_setting('ENCODER_SERVER'):
+                        from .encoder_server import connect_encoder
+                        self._encoder = connect_encoder(
+                            get_setting('ENCODER_SERVER'), encoder_authkey(),
+                            fallback=AdvancedJobRecommendationSystem.load_sentence_model,
+                        )
+                    if self._encoder is None:
+                        self._encoder = AdvancedJobRecommendationSystem.load_sentence_model()
+                    self._encoder_loaded = True
+        return self._encoder
+
+    def get_embedding_store(self):
+        """Return the on-disk job embedding store shared between processes"""
+        if self._embedding_store is None:
+            with self._lock:
+                if self._embedding_store is None:
+                    from .embedding_store import JobEmbeddingStore
+                    from .models import AdvancedJobRecommendationSystem
+                    self._embedding_store = JobEmbeddingStore(
+                        artifact_dir(self.EMBEDDINGS_DIR), AdvancedJobRecommendationSystem.embedding_key()
+                    )
+        return self._embedding_store
+
+    def get_tfidf_store(self):
+        """Return the versioned TF-IDF artifact store"""
+        if self._tfidf_store is None:
+            with self._lock:
+                if self._tfidf_store is None:
+                    from .tfidf_store import TfidfArtifactStore
+                    self._tfidf_store = TfidfArtifactStore(artifact_dir(self.TFIDF_DIR))
+        return self._tfidf_store
+
+    def get_system(self):
+        """Return the current recommendation system with all changes applied"""
+        system = self._system
+        if system is not None and self._stat_log() == self._log_position:
+            return system
+
+        with self._lock:
+            if self._system is None:
+                self._build()
+            else:
+                self._apply_pending_changes()
+            return self._system
+
+    def rebuild(self):
+        """Rebuild the job index now and return the new system"""
+        with self._lock:
+            self._build()
+            return self._system
+
+    def invalidate(self):
+        """Make every worker process rebuild its index on its next request"""
+        self._append_log(self.FULL_REBUILD)
+
+    def notify_changed(self, job_ids):
+        """Publish changed, created or deleted job ids to every process"""
+        job_ids = sorted(set(job_ids))
+        if job_ids:
+            self._append_log(' '.join(str(job_id) for job_id in job_ids))
+
+    def job_changed(self, job_id):
+        """Queue a job for an incremental index update once its transaction commits"""
+        pending = getattr(self._local, 'pending', None)
+        if pending is not None:
+            pending.add(job_id)
+        else:
+            transaction.on_commit(lambda: self.notify_changed([job_id]))
+
+    @contextmanager
+    def deferred_updates(self):
+        """Coalesce job changes made in this block into a single notification.
+
+        Use around bulk writes (imports, mass deletes) so they publish one
+        batch instead of one change per row.
+        """
+        if getattr(self._local, 'pending', None) is not None:
+            yield
+            return
+
+        self._local.pending = set()
+        try:
+            yield
+        finally:
+            job_ids, self._local.pending = self._local.pending, None
+            if job_ids:
+                transaction.on_commit(lambda: self.notify_changed(job_ids))
+
+    def _changes_path(self):
+        return artifact_path(self.CHANGES_NAME)
+
+    def _stat_log(self):
+        try:
+            stat = os.stat(self._changes_path())
+        except OSError:
+            return (None, 0)
+        return (stat.st_ino, stat.st_size)
+
+    def _append_log(self, line):
+        path = self._changes_path()
+        with FileLock(path + '.lock'):
+            try:
+                size = os.path.getsize(path)
+            except OSError:
+                size = 0
+            if size + len(line) + 1 > self.MAX_LOG_BYTES:
+                # Replace the log; readers see a new file and rebuild
+                tmp_path = path + '.tmp'
+                with open(tmp_path, 'w') as f:
+                    f.write(self.FULL_REBUILD + '\n')
+                os.replace(tmp_path, path)
+            else:
+                with open(path, 'a') as f:
+                    f.write(line + '\n')
+
+    def log_position(self):
+        """Current end of the change log, to pass to changes_since() later"""
+        return self._stat_log()
+
+    def changes_since(self, position):
+        """Read the change log after ``position`` (a log_position() value).
+
+        Returns ``(new_position, ids)``; ``ids`` is None when the reader
+        must reload everything (a full rebuild was requested, or the log
+        was rotated).
+        """
+        inode, size = self._stat_log()
+        seen_inode, offset = position
+        if (seen_inode is not None and inode != seen_inode) or size < offset:
+            return (inode, size), None
+        if size == offset:
+            return position, set()
+
+        with open(self._changes_path(), 'rb') as f:
+            f.seek(offset)
+            chunk = f.read(size - offset)
+        # Only consume complete lines; a writer may be mid-append
+        chunk = chunk[:chunk.rfind(b'\n') + 1]
+        new_position = (inode, offset + len(chunk))
+
+        ids = set()
+        for line in chunk.decode().splitlines():
+            if line.strip() == self.FULL_REBUILD:
+                return new_position, None
+            ids.update(int(item_id) for item_id in line.split())
+        return new_position, ids
+
+    def _apply_pending_changes(self):
+        position, job_ids = self.changes_since(self._log_position)
+        if job_ids is None:
+            self._build()
+            return
+
+        if job_ids:
+            self._apply_job_changes(job_ids)
+        # Only advance once applied, so a failed update is retried by the next request
+        self._log_position = position
+
+    def _queryset(self):
+        """Objects served by the index"""
+        from job_service.models import Job
+        return Job.objects.filter(is_active=True)
+
+    def _system_class(self):
+        from .models import AdvancedJobRecommendationSystem
+        return AdvancedJobRecommendationSystem
+
+    def _apply_job_changes(self, job_ids):
+        # A sharded index rebuilds the shards a burst touched by itself
+        if not self._system.partition_fields and len(job_ids) > self.REBUILD_RATIO * len(self._system):
+            self._build()
+            return
+
+        job_ids = list(job_ids)
+        active_jobs = []
+        with timed('orm'):
+            for start in range(0, len(job_ids), self.FETCH_BATCH_SIZE):
+                batch = job_ids[start:start + self.FETCH_BATCH_SIZE]
+                active_jobs.extend(self._queryset().filter(pk__in=batch))
+
+        removed_ids = set(job_ids) - {job.pk for job in active_jobs}
+        with timed('index_update'):
+            self._system.apply_changes(active_jobs, removed_ids)
+        self._version += 1
+
+    def _build(self):
+        from .cache import query_embedding_cache
+
+        # Record the log position first so changes made during the build are replayed
+        inode, size = self._stat_log()
+        self._log_position = (inode, size)
+
+        with timed('index_build'):
+            # Streamed: the system keeps a columnar catalogue, not the model instances
+            system = self._system_class()(
+                self._queryset().iterator(chunk_size=self.FETCH_BATCH_SIZE),
+                sentence_model=self.get_encoder(),
+                embedding_store=self.get_embedding_store(),
+                tfidf_store=self.get_tfidf_store(),
+                query_cache=query_embedding_cache,
+            )
+
+        self._system = system
+        self._version += 1
+        logger.info(f"✅ {self.NAME} index v{self._version} built for {len(system)} items")
+
+
+class CandidateRegistry(RecommendationRegistry):
+    """Keep one CandidateRecommendationSystem (the resume pool) per worker.
+
+    Employers' job descriptions are matched against this index. It has its
+    own change log and artifact stores, and borrows the job registry's
+    encoder so the model is loaded once per process.
+    """
+
+    NAME = 'Candidate'
+    CHANGES_NAME = 'candidates.changes'
+    EMBEDDINGS_DIR = 'resume_embeddings'
+    TFIDF_DIR = 'resume_tfidf'
+
+    def get_encoder(self):
+        return recommendation_registry.get_encoder()
+
+    def resume_changed(self, resume_id):
+        """Queue a resume for an incremental index update once its transaction commits"""
+        self.job_changed(resume_id)
+
+    def _queryset(self):
+        from resume_service.models import Resume
+        # Anonymous uploads with extracted text make up the candidate pool
+        return (Resume.objects.filter(user__isnull=True, is_active=True)
+                .exclude(extracted_text__isnull=True).exclude(extracted_text=''))
+
+    def _system_class(self):
+        from .models import CandidateRecommendationSystem
+        return CandidateRecommendationSystem
+
+
+recommendation_registry = RecommendationRegistry()
+candidate_registry = CandidateRegistry()
@@ -0,0 +1,236 @@
+"""Job vector index partitioned into one sub-index per working mode / region"""
+import logging
+import threading
+
+import numpy as np
+
+from .conf import get_setting
+from .executors import LazyExecutor
+from .index import JobVectorIndex
+from .topk import top_k
+
+logger = logging.getLogger(__name__)
+
+PARTITION_FIELDS = ('working_mode', 'region')
+
+
+def normalize_region(location):
+    """Coarse region of a free-text location: 'remote', the part after the
+    last comma ('New York, NY' -> 'ny'), or '' when unknown"""
+    location = (location or '').strip().lower()
+    if 'remote' in location:
+        return 'remote'
+    return location.rsplit(',', 1)[-1].strip()
+
+
+def partition_key(job, fields):
+    """Shard key of a job for the configured partition ``fields``"""
+    return tuple(
+        normalize_region(job.location) if field == 'region' else (job.working_mode or '')
+        for field in fields
+    )
+
+
+class _Shard:
+    def __init__(self, index, members):
+        self.index = index
+        self.members = set(members)
+        # Size at the last (re)build, and entries added or removed since
+        self.built_size = len(self.members)
+        self.changes = 0
+
+
+class ShardedJobIndex:
+    """JobVectorIndex-compatible index with one sub-index per partition key.
+
+    Each shard is a JobVectorIndex built with the configured backend (small
+    shards use exact search). A search only visits shards holding at least
+    one allowed job: a shard entirely inside ``allowed_ids`` is searched
+    without a selector, others with the allowed subset, and several shards
+    are searched in parallel threads. The per-shard top-k lists are then
+    merged into one top-k.
+
+    Shards are maintained independently: once a shard's entries changed by
+    more than SHARD_REBUILD_RATIO of its size, only that shard is rebuilt
+    (retrained, or switched between exact and approximate search as it
+    crosses EXACT_SEARCH_THRESHOLD).
+
+    Mutations and shard routing share a lock; each shard's own lock guards
+    its FAISS index, so searches run without holding the shard map.
+    """
+
+    def __init__(self, dim, backend=None, rerank=None):
+        self.dim = dim
+        self.backend = backend or get_setting('INDEX_BACKEND')
+        self.rerank = rerank
+        self._lock = threading.RLock()
+        self._shards = {}
+        self._key_of = {}
+        # Sorted ids and their shard numbers, rebuilt after changes
+        self._routing = None
+
+    @classmethod
+    def build(cls, ids, vectors, keys, backend=None, rerank=None):
+        """Create one sub-index per distinct key in ``keys`` (aligned with ``ids``)"""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        ids = np.asarray(ids, dtype=np.int64)
+        sharded = cls(vectors.shape[1], backend, rerank)
+        rows_by_key = {}
+        for row, key in enumerate(keys):
+            rows_by_key.setdefault(key, []).append(row)
+        for key, rows in rows_by_key.items():
+            sharded._build_shard(key, ids[rows], vectors[rows])
+        logger.info(f"✅ Built sharded job index: {len(ids)} vectors in {len(sharded._shards)} shards")
+        return sharded
+
+    def _build_shard(self, key, ids, vectors):
+        index = JobVectorIndex.build(ids, vectors, backend=self.backend, rerank=self.rerank)
+        self._shards[key] = _Shard(index, ids.tolist())
+        self._key_of.update((job_id, key) for job_id in ids.tolist())
+        self._routing = None
+
+    def __len__(self):
+        return len(self._key_of)
+
+    def shard_sizes(self):
+        return {key: len(shard.members) for key, shard in self._shards.items()}
+
+    def bytes_per_vector(self):
+        total = sum(shard.index.bytes_per_vector() * len(shard.index) for shard in self._shards.values())
+        return total / len(self) if len(self) else 0.0
+
+    def add(self, ids, vectors, keys):
+        """Insert vectors for ``ids`` into the shards of ``keys``, moving jobs whose key changed"""
+        ids = np.asarray(ids, dtype=np.int64)
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        with self._lock:
+            self.remove([job_id for job_id, key in zip(ids.tolist(), keys) if self._key_of.get(job_id) != key])
+
+            rows_by_key = {}
+            for row, key in enumerate(keys):
+                rows_by_key.setdefault(key, []).append(row)
+            for key, rows in rows_by_key.items():
+                shard = self._shards.get(key)
+                if shard is None:
+                    self._build_shard(key, ids[rows], vectors[rows])
+                    continue
+                shard.index.add(ids[rows], vectors[rows])
+                shard.members.update(ids[rows].tolist())
+                shard.changes += len(rows)
+                self._key_of.update((job_id, key) for job_id in ids[rows].tolist())
+                self._maybe_rebuild(key)
+            self._routing = None
+
+    def remove(self, ids):
+        """Remove the entries for ``ids`` (unknown ids are ignored)"""
+        with self._lock:
+            ids_by_key = {}
+            for job_id in ids:
+                key = self._key_of.pop(int(job_id), None)
+                if key is not None:
+                    ids_by_key.setdefault(key, []).append(int(job_id))
+            for key, key_ids in ids_by_key.items():
+                shard = self._shards[key]
+                shard.index.remove(key_ids)
+                shard.members.difference_update(key_ids)
+                shard.changes += len(key_ids)
+                if not shard.members:
+                    del self._shards[key]
+                else:
+                    self._maybe_rebuild(key)
+            if ids_by_key:
+                self._routing = None
+
+    def _maybe_rebuild(self, key):
+        """Rebuild one shard whose content drifted from what it was built on"""
+        shard = self._shards[key]
+        if shard.changes <= get_setting('SHARD_REBUILD_RATIO') * max(shard.built_size, 1):
+            return
+        target = self.backend if len(shard.members) >= get_setting('EXACT_SEARCH_THRESHOLD') else 'flat'
+        if target == 'flat' and shard.index.backend == 'flat':
+            # Exact search needs no training; nothing to refresh
+            shard.built_size, shard.changes = len(shard.members), 0
+            return
+        ids = np.fromiter(sorted(shard.members), dtype=np.int64, count=len(shard.members))
+        if self.rerank is not None:
+            vectors = np.asarray(self.rerank(ids.tolist()), dtype=np.float32)
+        else:
+            vectors = shard.index.reconstruct(ids)
+        self._build_shard(key, ids, vectors)
+        logger.info(f"✅ Rebuilt job index shard {key} ({len(ids)} vectors)")
+
+    def reconstruct(self, ids):
+        ids = np.asarray(ids, dtype=np.int64)
+        vectors = np.empty((len(ids), self.dim), dtype=np.float32)
+        with self._lock:
+            rows_by_key = {}
+            for row, job_id in enumerate(ids.tolist()):
+                rows_by_key.setdefault(self._key_of[job_id], []).append(row)
+            # One batched reconstruct per shard
+            for key, rows in rows_by_key.items():
+                vectors[rows] = self._shards[key].index.reconstruct(ids[rows])
+        return vectors
+
+    def _route(self, allowed_ids):
+        """(shard, allowed ids or None) pairs for the shards a search must visit"""
+        if allowed_ids is None:
+            return [(shard, None) for shard in self._shards.values()]
+
+        if self._routing is None:
+            keys = list(self._shards)
+            code_of = {key: code for code, key in enumerate(keys)}
+            ids = np.fromiter(self._key_of, dtype=np.int64, count=len(self._key_of))
+            codes = np.fromiter((code_of[key] for key in self._key_of.values()), dtype=np.int64, count=len(ids))
+            order = np.argsort(ids)
+            self._routing = (keys, ids[order], codes[order])
+        keys, ids, codes = self._routing
+
+        allowed_ids = np.asarray(allowed_ids, dtype=np.int64)
+        positions = np.clip(np.searchsorted(ids, allowed_ids), 0, max(len(ids) - 1, 0))
+        present = (ids[positions] == allowed_ids) if len(ids) else np.zeros(len(allowed_ids), dtype=bool)
+        allowed_ids, allowed_codes = allowed_ids[present], codes[positions[present]]
+
+        routes = []
+        for code in np.unique(allowed_codes).tolist():
+            shard = self._shards[keys[code]]
+            subset = allowed_ids[allowed_codes == code]
+            # A shard wholly inside the filter needs no selector
+            routes.append((shard, None if len(subset) == len(shard.members) else subset))
+        return routes
+
+    def search(self, queries, k, allowed_ids=None):
+        """Return (scores, job_ids) of the ``k`` best matches across the relevant shards"""
+        queries = np.ascontiguousarray(queries, dtype=np.float32)
+        with self._lock:
+            routes = self._route(allowed_ids)
+        if not routes:
+            return (np.empty((len(queries), 0), dtype=np.float32),
+                    np.empty((len(queries), 0), dtype=np.int64))
+
+        def search_shard(route):
+            shard, subset = route
+            return shard.index.search(queries, k, subset)
+
+        if len(routes) == 1:
+            results = [search_shard(routes[0])]
+        else:
+            results = list(_shard_executor().map(search_shard, routes))
+        return merge_top_k(results, k)
+
+
+def merge_top_k(results, k):
+    """Merge per-shard (scores, ids) lists, each sorted best first, into one top-k.
+
+    Rows are padded with id -1 when fewer than ``k`` matches exist.
+    """
+    width = min(k, sum(scores.shape[1] for scores, _ in results))
+    scores = np.concatenate([scores for scores, _ in results], axis=1)
+    ids = np.concatenate([ids for _, ids in results], axis=1)
+    scores = np.where(ids >= 0, scores, -np.inf)
+    top = top_k(scores, width)
+    scores, ids = np.take_along_axis(scores, top, axis=1), np.take_along_axis(ids, top, axis=1)
+    return np.where(ids >= 0, scores, 0).astype(np.float32), ids
+
+
+# Thread pool searching several shards at once (FAISS releases the GIL)
+_shard_executor = LazyExecutor('ml-shard', lambda: get_setting('SHARD_SEARCH_THREADS'))
@@ -0,0 +1,158 @@
+"""Inverted index from canonical skill ids to the active jobs mentioning them"""
+import logging
+import threading
+
+import numpy as np
+from django.db import transaction
+
+from .registry import recommendation_registry
+from .skills import get_skill_taxonomy
+from .topk import top_k
+
+logger = logging.getLogger(__name__)
+
+# Job fields skills are extracted from
+SKILL_FIELDS = ('requisite_skill', 'job_role_and_duties')
+# Jobs per DELETE / bulk_create / lookup query
+BATCH_SIZE = 1000
+
+
+def job_skill_ids(job):
+    """Distinct skill ids mentioned in a job's skill and duty fields"""
+    taxonomy = get_skill_taxonomy()
+    skill_ids = {}
+    for field in SKILL_FIELDS:
+        # Fields are matched separately so no phrase spans two of them
+        skill_ids.update(dict.fromkeys(taxonomy.extract(getattr(job, field) or '')))
+    return list(skill_ids)
+
+
+def sync_job_skills(jobs, skill_ids=None):
+    """Replace the stored JobSkill rows of ``jobs``.
+
+    ``skill_ids`` (one list per job) skips extraction when the caller
+    already has them, e.g. from an importer's parse workers.
+    """
+    from job_service.models import JobSkill
+
+    jobs = list(jobs)
+    if skill_ids is None:
+        skill_ids = [job_skill_ids(job) for job in jobs]
+    with transaction.atomic():
+        for start in range(0, len(jobs), BATCH_SIZE):
+            batch = jobs[start:start + BATCH_SIZE]
+            JobSkill.objects.filter(job_id__in=[job.pk for job in batch]).delete()
+            JobSkill.objects.bulk_create([
+                JobSkill(job_id=job.pk, skill_id=skill_id)
+                for job, job_skills in zip(batch, skill_ids[start:start + BATCH_SIZE])
+                for skill_id in job_skills
+            ])
+
+
+class JobSkillIndex:
+    """In-memory mirror of the JobSkill rows of active jobs.
+
+    Each skill maps to a sorted array of job ids. The mirror follows the
+    registry's job change log: before answering it reloads the rows of
+    jobs changed since it last looked (or everything, after a full
+    rebuild). Posting arrays are replaced, never modified, so readers need
+    no lock.
+    """
+
+    def __init__(self, registry):
+        self.registry = registry
+        self._lock = threading.Lock()
+        self._postings = None
+        self._skills_of = {}
+        self._position = (None, 0)
+
+    def refresh(self):
+        """Apply job changes published since the last refresh"""
+        if self._postings is not None and self.registry.log_position() == self._position:
+            return
+        with self._lock:
+            if self._postings is None:
+                self._load()
+                return
+            position, job_ids = self.registry.changes_since(self._position)
+            if job_ids is None or len(job_ids) > self.registry.REBUILD_RATIO * len(self._skills_of):
+                self._load()
+                return
+            if job_ids:
+                self._apply_changes(job_ids)
+            self._position = position
+
+    def reload(self):
+        """Reread every row, e.g. after writes that published no job changes"""
+        with self._lock:
+            self._load()
+
+    def _load(self):
+        from job_service.models import JobSkill
+
+        # Record the log position first so changes made during the load are replayed
+        position = self.registry.log_position()
+        skills_of, jobs_of = {}, {}
+        rows = JobSkill.objects.filter(job__is_active=True).values_list('job_id', 'skill_id')
+        for job_id, skill_id in rows.iterator(chunk_size=10000):
+            skills_of.setdefault(job_id, []).append(skill_id)
+            jobs_of.setdefault(skill_id, []).append(job_id)
+
+        self._skills_of = {job_id: tuple(skill_ids) for job_id, skill_ids in skills_of.items()}
+        self._postings = {skill_id: np.unique(np.asarray(job_ids, dtype=np.int64))
+                          for skill_id, job_ids in jobs_of.items()}
+        self._position = position
+        logger.info(f"✅ Job skill index loaded: {len(self._postings)} skills over {len(self._skills_of)} jobs")
+
+    def _apply_changes(self, job_ids):
+        from job_service.models import JobSkill
+
+        job_ids = list(job_ids)
+        new_skills = {}
+        for start in range(0, len(job_ids), BATCH_SIZE):
+            rows = JobSkill.objects.filter(
+                job_id__in=job_ids[start:start + BATCH_SIZE], job__is_active=True
+            ).values_list('job_id', 'skill_id')
+            for job_id, skill_id in rows:
+                new_skills.setdefault(job_id, []).append(skill_id)
+
+        affected = set()
+        for job_id in job_ids:
+            affected.update(self._skills_of.pop(job_id, ()))
+        for job_id, skill_ids in new_skills.items():
+            self._skills_of[job_id] = tuple(skill_ids)
+            affected.update(skill_ids)
+
+        changed = np.asarray(job_ids, dtype=np.int64)
+        postings = dict(self._postings)
+        for skill_id in affected:
+            current = postings.get(skill_id, np.empty(0, dtype=np.int64))
+            added = [job_id for job_id, skill_ids in new_skills.items() if skill_id in skill_ids]
+            updated = np.union1d(current[~np.isin(current, changed)], np.asarray(added, dtype=np.int64))
+            if len(updated):
+                postings[skill_id] = updated
+            else:
+                postings.pop(skill_id, None)
+        self._postings = postings
+
+    def top_jobs(self, skill_ids, top_n=20):
+        """(job_id, shared skill count) of the ``top_n`` active jobs sharing most
+        of ``skill_ids``, newest (highest id) first among equal counts"""
+        self.refresh()
+        postings = self._postings
+        lists = [postings[skill_id] for skill_id in set(skill_ids) if skill_id in postings]
+        if not lists or top_n <= 0:
+            return []
+
+        # Each list is sorted, so the stable (merge) sort mostly combines runs
+        merged = np.sort(np.concatenate(lists), kind='stable')
+        starts = np.flatnonzero(np.concatenate(([True], merged[1:] != merged[:-1])))
+        job_ids = merged[starts]
+        counts = np.diff(np.append(starts, len(merged)))
+
+        # One sortable key per job: more shared skills first, then newer jobs
+        top = top_k(counts * (int(job_ids[-1]) + 1) + job_ids, top_n)
+        return list(zip(job_ids[top].tolist(), counts[top].tolist()))
+
+
+job_skill_index = JobSkillIndex(recommendation_registry)
@@ -0,0 +1,123 @@
+"""Skill extraction against a taxonomy of canonical skills and their synonyms"""
+import json
+import logging
+import os
+import re
+import threading
+from collections import namedtuple
+
+from .conf import get_setting
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TAXONOMY = os.path.join(os.path.dirname(__file__), 'data', 'skills.json')
+
+Skill = namedtuple('Skill', 'id name category')
+# ``start``/``end`` are character offsets of ``text`` in the original string
+SkillMatch = namedtuple('SkillMatch', 'skill_id start end text')
+
+# Words keep the punctuation that belongs to skill names (c++, c#, node.js,
+# .net, r&d); '/' and '-' are tokens of their own, so 'ci/cd' and
+# 'scikit-learn' match as phrases while 'python/django' yields both skills
+TOKEN_PATTERN = re.compile(r"(?<![\w.])\.?[\w+#&]+(?:\.[\w+#&]+)*|[/-]")
+
+# Trie key marking the end of a term; never a token
+_END = ''
+
+
+def tokenize(text):
+    """(lowercased token, start, end) for every token of ``text``"""
+    return [(match.group().lower(), match.start(), match.end()) for match in TOKEN_PATTERN.finditer(text)]
+
+
+class SkillTaxonomy:
+    """Canonical skills compiled into a token trie of all their names and synonyms.
+
+    Matching walks the trie from each token of the text, keeping the
+    longest term found and resuming after it, so terms only match whole
+    tokens ('ai' does not match inside 'maintain') and the cost grows with
+    the text and the longest term, not with the size of the taxonomy.
+    """
+
+    def __init__(self, skills, terms):
+        self.skills = skills
+        self._trie = {}
+        for term, skill_id in terms:
+            node = self._trie
+            for token, _, _ in tokenize(term):
+                node = node.setdefault(token, {})
+            # The first skill listing a term keeps it
+            node.setdefault(_END, skill_id)
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build from ``{"skills": [{"id", "name", "category", "aliases"}, ...]}``.
+
+        An entry's name is matched too unless it sets ``"match_name": false``
+        (for names like 'Go' that are also common words).
+        """
+        skills, terms = {}, []
+        for entry in data['skills']:
+            skill_id = entry['id']
+            if skill_id in skills:
+                raise ValueError(f"Duplicate skill id in taxonomy: {skill_id}")
+            skills[skill_id] = Skill(skill_id, entry['name'], entry.get('category', ''))
+            if entry.get('match_name', True):
+                terms.append((entry['name'], skill_id))
+            terms.extend((alias, skill_id) for alias in entry.get('aliases', ()))
+        return cls(skills, terms)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding='utf-8') as f:
+            taxonomy = cls.from_dict(json.load(f))
+        logger.info(f"✅ Loaded skill taxonomy with {len(taxonomy.skills)} skills from {path}")
+        return taxonomy
+
+    def __len__(self):
+        return len(self.skills)
+
+    def match(self, text):
+        """Every non-overlapping skill mention in ``text``, leftmost-longest first"""
+        tokens = tokenize(text or '')
+        matches = []
+        i = 0
+        while i < len(tokens):
+            node, found = self._trie, None
+            for j in range(i, len(tokens)):
+                node = node.get(tokens[j][0])
+                if node is None:
+                    break
+                if _END in node:
+                    found = (node[_END], j)
+            if found is None:
+                i += 1
+                continue
+            skill_id, j = found
+            start, end = tokens[i][1], tokens[j][2]
+            matches.append(SkillMatch(skill_id, start, end, text[start:end]))
+            i = j + 1
+        return matches
+
+    def extract(self, text):
+        """Distinct skill ids mentioned in ``text``, in order of first mention"""
+        return list(dict.fromkeys(match.skill_id for match in self.match(text)))
+
+    def names(self, skill_ids):
+        return [self.skills[skill_id].name for skill_id in skill_ids]
+
+
+_taxonomies = {}
+_taxonomies_lock = threading.Lock()
+
+
+def get_skill_taxonomy():
+    """The configured taxonomy (ML_SERVICE['SKILL_TAXONOMY']), loaded once per process"""
+    path = get_setting('SKILL_TAXONOMY') or DEFAULT_TAXONOMY
+    taxonomy = _taxonomies.get(path)
+    if taxonomy is None:
+        with _taxonomies_lock:
+            taxonomy = _taxonomies.get(path)
+            if taxonomy is None:
+                taxonomy = _taxonomies[path] = SkillTaxonomy.load(path)
+    return taxonomy
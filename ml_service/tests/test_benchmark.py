@@ -0,0 +1,22 @@
+from django.test import SimpleTestCase
+
+from ml_service.benchmark import SyntheticCorpus
+from ml_service.skills import get_skill_taxonomy
+
+
+class SyntheticCorpusTests(SimpleTestCase):
+    def test_skill_overlap_follows_the_relevance_grades(self):
+        corpus = SyntheticCorpus.generate(120, 10, seed=3)
+        taxonomy = get_skill_taxonomy()
+        job_skills = {
+            job.pk: set(taxonomy.extract(f"{job.job_role_and_duties} {job.requisite_skill}")) for job in corpus.jobs
+        }
+        self.assertTrue(all(len(skills) == 2 for skills in job_skills.values()))
+        for index, text in enumerate(corpus.resume_texts):
+            resume_skills = set(taxonomy.extract(text))
+            for job_id, skills in job_skills.items():
+                grade = int(corpus.grades(index, [job_id])[0])
+                if grade == 2:
+                    self.assertTrue(skills <= resume_skills)
+                elif grade == 1:
+                    self.assertTrue(skills & resume_skills)
@@ -0,0 +1,68 @@
+import numpy as np
+from django.test import SimpleTestCase, override_settings
+
+from ml_service.cache import QueryEmbeddingCache, RecommendationCache
+from ml_service.filters import JobFilters
+
+CACHE_SETTINGS = {
+    'CACHES': {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'ml-cache-tests'}},
+    'ML_SERVICE': {'CACHE_ALIAS': 'default'},
+}
+
+
+class Encoder:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts):
+        self.calls.append(list(texts))
+        return np.array([[len(text), 1.0] for text in texts], dtype=np.float32)
+
+
+@override_settings(**CACHE_SETTINGS)
+class QueryEmbeddingCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.cache = QueryEmbeddingCache()
+        self.cache.backend.clear()
+        self.encode = Encoder()
+
+    def test_only_misses_are_encoded(self):
+        first = self.cache.encode(['ab', 'c', 'ab'], self.encode, 'model')
+        np.testing.assert_array_equal(first[:, 0], [2, 1, 2])
+        second = self.cache.encode(['c', 'ab', 'dddd'], self.encode, 'model')
+        np.testing.assert_array_equal(second[:, 0], [1, 2, 4])
+        # A repeated text is encoded once, a cached one never again
+        self.assertEqual(self.encode.calls, [['ab', 'c'], ['dddd']])
+        self.assertEqual(self.cache.stats.as_dict()['hits'], 2)
+
+    def test_model_key_separates_entries(self):
+        self.cache.encode(['ab'], self.encode, 'model-a')
+        self.cache.encode(['ab'], self.encode, 'model-b')
+        self.assertEqual(self.encode.calls, [['ab'], ['ab']])
+
+
+class RecommendationCacheKeyTests(SimpleTestCase):
+    def setUp(self):
+        self.cache = RecommendationCache()
+
+    def key(self, text='python developer', method='hybrid', top_n=20, filters=None, version='1-10'):
+        return self.cache.key(text, method, top_n, filters, version)
+
+    def test_equal_requests_share_a_key(self):
+        self.assertEqual(self.key(filters=JobFilters(working_mode='remote')),
+                         self.key(filters=JobFilters(working_mode='remote')))
+        # No filters and empty filters are the same request
+        self.assertEqual(self.key(), self.key(filters=JobFilters()))
+
+    def test_key_changes_with_every_input(self):
+        base = self.key()
+        for changed in (
+            self.key(text='java developer'),
+            self.key(method='tfidf'),
+            self.key(top_n=10),
+            self.key(filters=JobFilters(working_mode='remote')),
+            self.key(filters=JobFilters(min_salary=50000.0)),
+            self.key(version='1-11'),
+            self.key(version='2-10'),
+        ):
+            self.assertNotEqual(changed, base)
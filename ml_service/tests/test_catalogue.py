@@ -0,0 +1,82 @@
+from decimal import Decimal
+
+from django.test import TestCase
+
+from job_service.models import Job
+from ml_service.catalogue import CandidateCatalogue, JobCatalogue
+from ml_service.models import AdvancedJobRecommendationSystem, CandidateRecommendationSystem
+from resume_service.models import Resume
+
+
+def orm_job_payload(job, score, method):
+    """The payload recommendations were built with from Job instances"""
+    return {
+        'job_id': job.pk,
+        'position': job.position,
+        'workplace': job.workplace,
+        'working_mode': job.working_mode,
+        'job_role_and_duties': job.job_role_and_duties,
+        'requisite_skill': job.requisite_skill,
+        'salary_min': float(job.salary_min) if job.salary_min else None,
+        'salary_max': float(job.salary_max) if job.salary_max else None,
+        'location': job.location,
+        'similarity_score': round(float(score), 1),
+        'ai_ranked': True,
+        'method': method,
+    }
+
+
+class JobCatalogueTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        salaries = [
+            (None, None), (0, 0), (Decimal('0.00'), Decimal('85000.00')), (Decimal('40000.00'), None),
+            (Decimal('12345.67'), Decimal('23456.78')), (Decimal('1234567.89'), Decimal('99999999.99')),
+        ]
+        for i, (salary_min, salary_max) in enumerate(salaries):
+            Job.objects.create(
+                position=f'Développeur {i} 🚀', workplace='Acme', working_mode='remote' if i % 2 else 'full_time',
+                job_role_and_duties='' if i == 1 else f'Duties {i}\nwith ünïcode', requisite_skill='Python',
+                salary_min=salary_min, salary_max=salary_max, location='' if i == 2 else 'Austin, TX',
+            )
+
+    def payloads(self, catalogue, system_class):
+        jobs = list(Job.objects.all())
+        ids = [job.pk for job in reversed(jobs)]
+        system = system_class.__new__(system_class)
+        return [
+            system._job_to_dict(record, 87.25, 'test') for record in catalogue.records(ids)
+        ], [orm_job_payload(job, 87.25, 'test') for job in reversed(jobs)]
+
+    def test_records_match_the_orm_rows(self):
+        catalogue = JobCatalogue.from_objects(Job.objects.iterator())
+        payloads, expected = self.payloads(catalogue, AdvancedJobRecommendationSystem)
+        self.assertEqual(payloads, expected)
+
+    def test_changed_rows_match_the_orm_rows(self):
+        jobs = list(Job.objects.all())
+        catalogue = JobCatalogue.from_objects(jobs[:3])
+        Job.objects.filter(pk=jobs[0].pk).update(salary_max=Decimal('70000.50'), position='Renamed')
+        catalogue = catalogue.apply_changes(Job.objects.filter(pk__in=[job.pk for job in jobs]), set())
+        payloads, expected = self.payloads(catalogue, AdvancedJobRecommendationSystem)
+        self.assertEqual(payloads, expected)
+
+        catalogue = catalogue.apply_changes([], {jobs[0].pk})
+        self.assertNotIn(jobs[0].pk, catalogue.ids.tolist())
+        with self.assertRaises(KeyError):
+            catalogue.records([jobs[0].pk])
+
+
+class CandidateCatalogueTests(TestCase):
+    def test_records_match_the_orm_rows(self):
+        for i, title in enumerate(['Backend résumé', 'Data', '']):
+            Resume.objects.create(title=title, file=f'resumes/anonymous/cv-{i}.pdf', extracted_text='text')
+        resumes = list(Resume.objects.all())
+        catalogue = CandidateCatalogue.from_objects(resumes)
+        system = CandidateRecommendationSystem.__new__(CandidateRecommendationSystem)
+        payloads = [system._job_to_dict(record, 50, 'test') for record in catalogue.records([r.pk for r in resumes])]
+        self.assertEqual(payloads, [
+            {'resume_id': resume.pk, 'title': resume.title, 'filename': resume.filename(),
+             'uploaded_at': resume.uploaded_at, 'similarity_score': 50.0, 'ai_ranked': True, 'method': 'test'}
+            for resume in resumes
+        ])
@@ -0,0 +1,94 @@
+import numpy as np
+from django.test import SimpleTestCase, override_settings
+
+from ml_service.benchmark import HashingEncoder
+from ml_service.chunking import encode_chunked, pool, split_windows
+from ml_service.models import AdvancedJobRecommendationSystem
+
+
+def words(n):
+    return ' '.join(f'w{i}' for i in range(n))
+
+
+class SplitWindowsTests(SimpleTestCase):
+    def test_short_text_is_one_window(self):
+        self.assertEqual(split_windows('  a  b c ', 3, 1, 8), ['  a  b c '])
+        self.assertEqual(split_windows(words(50), 0, 0, 8), [words(50)])
+
+    def test_windows_overlap_and_cover_the_end(self):
+        self.assertEqual(split_windows(words(10), 4, 2, 8),
+                         ['w0 w1 w2 w3', 'w2 w3 w4 w5', 'w4 w5 w6 w7', 'w6 w7 w8 w9'])
+        # One word past the window adds a final window ending at the last word
+        self.assertEqual(split_windows(words(5), 4, 1, 8), ['w0 w1 w2 w3', 'w1 w2 w3 w4'])
+
+    def test_max_chunks_spreads_windows_over_the_document(self):
+        windows = split_windows(words(100), 10, 0, 3)
+        self.assertEqual(windows, [words(10), ' '.join(f'w{i}' for i in range(45, 55)),
+                                   ' '.join(f'w{i}' for i in range(90, 100))])
+        self.assertEqual(len(split_windows(words(1000), 96, 24, 8)), 8)
+
+
+class RecordingEncoder:
+    """One-hot vector per window, on the dimension of the window's first word number"""
+
+    def __init__(self, dim=100):
+        self.dim = dim
+        self.calls = []
+
+    def __call__(self, texts):
+        self.calls.append(list(texts))
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            vectors[i, int(text.split()[0][1:]) % self.dim] = 2.0
+        return vectors
+
+
+class EncodeChunkedTests(SimpleTestCase):
+    def test_short_texts_are_encoded_directly(self):
+        encode = RecordingEncoder()
+        encode_chunked(['w1 w2', 'w3'], encode, 4, 1, 8)
+        self.assertEqual(encode.calls, [['w1 w2', 'w3']])
+
+    def test_windows_are_pooled_per_text(self):
+        encode = RecordingEncoder()
+        texts = ['w7 w8', words(10), 'w3']
+        vectors = encode_chunked(texts, encode, 4, 2, 8)
+        self.assertEqual(vectors.shape, (3, 100))
+        self.assertEqual(vectors.dtype, np.float32)
+        np.testing.assert_allclose(np.linalg.norm(vectors, axis=1), 1.0, rtol=1e-6)
+        # Mean of the one-hot windows starting at w0, w2, w4, w6, renormalised
+        expected = np.zeros(100)
+        expected[[0, 2, 4, 6]] = 0.5
+        np.testing.assert_allclose(vectors[1], expected, atol=1e-6)
+        np.testing.assert_allclose(vectors[0, 7], 1.0)
+        np.testing.assert_allclose(vectors[2, 3], 1.0)
+        # Every window goes to the encoder in one call
+        self.assertEqual(len(encode.calls), 1)
+        self.assertEqual(len(encode.calls[0]), 6)
+
+    def test_pooling_methods(self):
+        vectors = np.array([[3.0, 0.0], [1.0, 4.0]], dtype=np.float32)
+        np.testing.assert_allclose(pool(vectors, 'mean'), [0.5 ** 0.5, 0.5 ** 0.5], rtol=1e-6)
+        np.testing.assert_allclose(pool(vectors, 'max'), [0.6, 0.8], rtol=1e-6)
+        np.testing.assert_array_equal(pool(np.zeros((2, 2)), 'mean'), [0.0, 0.0])
+        with self.assertRaises(ValueError):
+            pool(vectors, 'sum')
+
+
+@override_settings(ML_SERVICE={'CHUNK_WORDS': 10, 'CHUNK_OVERLAP': 2, 'MAX_CHUNKS': 3, 'CHUNK_POOLING': 'mean'})
+class EncodeWithTests(SimpleTestCase):
+    def test_long_texts_are_truncated_to_max_chunks(self):
+        encoder = HashingEncoder(dim=32)
+        calls = []
+        original = encoder.encode
+
+        def encode(sentences, **kwargs):
+            calls.append(list(sentences))
+            return original(sentences, **kwargs)
+
+        encoder.encode = encode
+        vectors = AdvancedJobRecommendationSystem.encode_with(encoder, [words(500), 'short text'])
+        self.assertEqual(vectors.shape, (2, 32))
+        np.testing.assert_allclose(np.linalg.norm(vectors, axis=1), 1.0, rtol=1e-5)
+        self.assertEqual(len(calls[0]), 3 + 1)
+        self.assertIn('chunks-10-2-3-mean', AdvancedJobRecommendationSystem.embedding_key())
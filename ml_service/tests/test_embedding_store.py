@@ -0,0 +1,62 @@
+import os
+import shutil
+import tempfile
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from ml_service.embedding_store import JobEmbeddingStore
+
+
+class Encoder:
+    """Records the texts it encodes; each vector is the text's length"""
+
+    def __init__(self):
+        self.encoded = []
+
+    def __call__(self, texts):
+        self.encoded.extend(texts)
+        return np.array([[len(text), 1.0] for text in texts], dtype=np.float32)
+
+
+class EmbeddingStoreTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.encode = Encoder()
+
+    def store(self):
+        return JobEmbeddingStore(self.directory, 'test-model')
+
+    def vector_files(self):
+        return [name for name in os.listdir(self.directory) if name.startswith('vectors-')]
+
+    def test_sync_encodes_only_new_or_changed_texts(self):
+        store = self.store()
+        store.sync([1, 2], ['a', 'bb'], self.encode)
+        vectors = store.sync([1, 2, 3], ['a', 'bbbb', 'ccc'], self.encode)
+        self.assertEqual(self.encode.encoded, ['a', 'bb', 'bbbb', 'ccc'])
+        np.testing.assert_array_equal(vectors[:, 0], [1, 4, 3])
+
+    def test_sync_to_no_ids_empties_the_store(self):
+        store = self.store()
+        store.sync([1, 2, 3], ['a', 'b', 'c'], self.encode)
+        vectors = store.sync([], [], self.encode)
+        self.assertEqual(vectors.shape, (0, 2))
+        self.assertEqual(len(store), 0)
+        self.assertEqual(self.vector_files(), [])
+
+        # Another process sees the empty store, and it fills up again
+        reopened = self.store()
+        reopened.load()
+        self.assertEqual(len(reopened), 0)
+        vectors = reopened.sync([4], ['dddd'], self.encode)
+        np.testing.assert_array_equal(vectors, [[4, 1]])
+        self.assertEqual(len(self.vector_files()), 1)
+
+    def test_removed_ids_are_dropped(self):
+        store = self.store()
+        store.sync([1, 2, 3], ['a', 'b', 'c'], self.encode)
+        store.remove([2])
+        self.assertEqual(store.ids.tolist(), [1, 3])
+        np.testing.assert_array_equal(store.get([3, 1])[:, 0], [1, 1])
@@ -0,0 +1,95 @@
+import os
+import shutil
+import tempfile
+import threading
+from unittest import mock
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from ml_service.benchmark import HashingEncoder
+from ml_service.encoder_server import EncoderServer, RemoteEncoder, connect_encoder
+
+AUTHKEY = b'test-key'
+
+
+class EncoderServerTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.address = os.path.join(directory, 'encoder.sock')
+        self.encoder = HashingEncoder(dim=16)
+
+    def start_server(self):
+        server = EncoderServer(self.encoder, self.address, AUTHKEY, max_wait=0.001)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(server.close)
+        for _ in range(200):
+            if server._listener is not None:
+                break
+            threading.Event().wait(0.01)
+        return server
+
+    def test_round_trip(self):
+        server = self.start_server()
+        client = connect_encoder(self.address, AUTHKEY)
+        texts = ['python developer', 'java developer', 'python developer django']
+        np.testing.assert_allclose(client.encode(texts), self.encoder.encode(texts))
+        np.testing.assert_allclose(client.encode(texts, normalize_embeddings=True),
+                                   self.encoder.encode(texts, normalize_embeddings=True), rtol=1e-6)
+        np.testing.assert_allclose(client.encode('python'), self.encoder.encode(['python'])[0])
+        self.assertEqual(client.encode([]).shape, (0, 0))
+        self.assertEqual(server.stats()['texts'], 7)
+
+    def test_concurrent_clients_get_their_own_rows(self):
+        self.start_server()
+        client = connect_encoder(self.address, AUTHKEY)
+        results, errors = {}, []
+
+        def encode(i):
+            try:
+                results[i] = client.encode([f'text {i}', f'other {i} words'])
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=encode, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        for i, vectors in results.items():
+            np.testing.assert_allclose(vectors, self.encoder.encode([f'text {i}', f'other {i} words']))
+
+    def test_unreachable_or_unauthenticated_server(self):
+        self.assertIsNone(connect_encoder(self.address, AUTHKEY))
+        self.start_server()
+        self.assertIsNone(connect_encoder(self.address, b'wrong-key'))
+
+    def test_falls_back_to_the_local_encoder_when_the_server_dies(self):
+        server = self.start_server()
+        fallback = mock.Mock(return_value=HashingEncoder(dim=16))
+        client = connect_encoder(self.address, AUTHKEY, fallback=fallback)
+        client.encode(['before'])
+
+        server.close()
+        client._local.connection.close()
+        with self.assertLogs('ml_service.encoder_server', 'WARNING'):
+            vectors = client.encode(['after the server died'])
+        np.testing.assert_allclose(vectors, self.encoder.encode(['after the server died']))
+        client.encode(['still local'])
+        fallback.assert_called_once_with()
+
+        # A restarted server is used again once the retry interval has passed
+        server = self.start_server()
+        with mock.patch.object(RemoteEncoder, 'RETRY_INTERVAL', 0):
+            client._retry_at = 0
+            client.encode(['back on the server'])
+        self.assertEqual(server.stats()['texts'], 1)
+        self.assertIsNone(client._retry_at)
+
+    def test_without_a_fallback_errors_propagate(self):
+        client = RemoteEncoder(self.address, AUTHKEY)
+        with self.assertRaises(OSError):
+            client.encode(['text'])
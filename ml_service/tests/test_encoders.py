@@ -0,0 +1,59 @@
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from ml_service.encoders import ONNX_MODEL_NAME, OnnxSentenceEncoder, load_onnx_encoder
+
+
+class OnnxSentenceEncoderTests(SimpleTestCase):
+    def encoder(self):
+        encoder = OnnxSentenceEncoder.__new__(OnnxSentenceEncoder)
+        self.batches = []
+
+        def encode_batch(sentences):
+            self.batches.append(list(sentences))
+            # Each row identifies its sentence: (length, first character)
+            return np.array([[len(sentence), ord(sentence[0])] for sentence in sentences], dtype=np.float32)
+
+        encoder._encode_batch = encode_batch
+        return encoder
+
+    def test_length_sorting_restores_input_order(self):
+        sentences = ['bb', 'a', 'dddd', 'ccc', 'eeeee', 'f', 'gg']
+        embeddings = self.encoder().encode(sentences, batch_size=3)
+        np.testing.assert_array_equal(embeddings, [[len(s), ord(s[0])] for s in sentences])
+        # Batches are filled longest first, so each pads to a similar length
+        self.assertEqual(self.batches, [['eeeee', 'dddd', 'ccc'], ['bb', 'gg', 'a'], ['f']])
+
+    def test_single_sentence_and_normalisation(self):
+        encoder = self.encoder()
+        np.testing.assert_array_equal(encoder.encode('abc'), [3, ord('a')])
+        embeddings = encoder.encode(['abc', 'de'], normalize_embeddings=True)
+        np.testing.assert_allclose(np.linalg.norm(embeddings, axis=1), 1.0, rtol=1e-6)
+
+
+class LoadOnnxEncoderTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def fake_export(self, model_name, directory):
+        open(os.path.join(directory, ONNX_MODEL_NAME), 'wb').close()
+
+    @mock.patch('ml_service.encoders.OnnxSentenceEncoder')
+    @mock.patch('ml_service.encoders.export_onnx')
+    def test_requests_never_export(self, export, encoder_class):
+        export.side_effect = self.fake_export
+        with self.assertLogs('ml_service.encoders', 'WARNING'):
+            self.assertIsNone(load_onnx_encoder('model', self.directory))
+        export.assert_not_called()
+
+        self.assertIs(load_onnx_encoder('model', self.directory, export=True), encoder_class.return_value)
+        export.assert_called_once_with('model', self.directory)
+        # Once exported, a plain load finds it
+        self.assertIs(load_onnx_encoder('model', self.directory), encoder_class.return_value)
+        export.assert_called_once()
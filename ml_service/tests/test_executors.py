@@ -0,0 +1,45 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from ml_service.executors import LazyExecutor
+
+
+class LazyExecutorTests(SimpleTestCase):
+    def test_concurrent_first_calls_share_one_pool(self):
+        def slow_pool(**kwargs):
+            # Widen the window between the None check and the assignment
+            time.sleep(0.05)
+            return ThreadPoolExecutor(**kwargs)
+
+        lazy = LazyExecutor('test-pool', 2)
+        barrier = threading.Barrier(8)
+        executors = []
+
+        def first_call():
+            barrier.wait()
+            executors.append(lazy())
+
+        with mock.patch('ml_service.executors.ThreadPoolExecutor', side_effect=slow_pool) as pool:
+            threads = [threading.Thread(target=first_call) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(pool.call_count, 1)
+        self.assertEqual(len({id(executor) for executor in executors}), 1)
+        self.assertIs(lazy(), executors[0])
+        executors[0].shutdown()
+
+    def test_max_workers_is_read_on_first_use(self):
+        max_workers = mock.Mock(return_value=3)
+        lazy = LazyExecutor('test-pool', max_workers)
+        max_workers.assert_not_called()
+        executor = lazy()
+        self.assertEqual(executor._max_workers, 3)
+        lazy()
+        max_workers.assert_called_once_with()
+        executor.shutdown()
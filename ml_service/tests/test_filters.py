@@ -0,0 +1,86 @@
+from decimal import Decimal
+
+from django.test import SimpleTestCase, TestCase
+
+from job_service.models import Job
+from ml_service.catalogue import JobCatalogue
+from ml_service.filters import JobFilters
+
+
+class JobFiltersParsingTests(SimpleTestCase):
+    def test_valid_filters(self):
+        filters = JobFilters.from_dict({'working_mode': 'remote', 'location': ' Austin ',
+                                        'min_salary': '50000', 'max_salary': 90000})
+        self.assertEqual(filters.key(), ('remote', 'austin', 50000.0, 90000.0))
+        self.assertFalse(JobFilters.from_dict(None))
+        self.assertFalse(JobFilters.from_dict({'min_salary': '', 'location': '  '}))
+
+    def test_malformed_filters_are_rejected(self):
+        for data in (
+            ['remote'],
+            {'salary': 10},
+            {'working_mode': 3},
+            {'min_salary': 'lots'},
+            {'min_salary': [1]},
+            {'min_salary': True},
+            {'max_salary': False},
+            {'min_salary': 'nan'},
+            {'max_salary': 'inf'},
+            {'min_salary': float('-inf')},
+            {'min_salary': 90000, 'max_salary': 50000},
+        ):
+            with self.subTest(data=data):
+                with self.assertRaises(ValueError):
+                    JobFilters.from_dict(data)
+
+    def test_equal_bounds_are_allowed(self):
+        self.assertEqual(JobFilters.from_dict({'min_salary': 5, 'max_salary': 5}).key()[2:], (5.0, 5.0))
+
+
+class JobCatalogueMaskTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        jobs = [
+            # (working_mode, location, salary_min, salary_max)
+            ('full_time', 'Austin, TX', 40000, 60000),
+            ('full_time', 'Denver, CO', 70000, None),
+            ('remote', 'Remote', None, 55000),
+            ('remote', 'austin, tx', None, None),
+            ('contract', 'Austin, TX', 0, 0),
+            ('contract', 'Seattle, WA', 0, 80000),
+            ('part_time', 'Seattle, WA', 30000, 0),
+            ('full_time', 'New York, NY', Decimal('65000.50'), Decimal('65000.50')),
+        ]
+        cls.ids = [
+            Job.objects.create(position=f'Job {i}', workplace='Acme', working_mode=mode, location=location,
+                               job_role_and_duties='', requisite_skill='',
+                               salary_min=salary_min, salary_max=salary_max).pk
+            for i, (mode, location, salary_min, salary_max) in enumerate(jobs)
+        ]
+
+    def matching(self, **filters):
+        """Indices of the jobs matching on the indexed path, checked against the ORM path"""
+        filters = JobFilters(**filters)
+        indexed = JobCatalogue.from_objects(Job.objects.all()).allowed_ids(filters).tolist()
+        orm = sorted(filters.filter_queryset(Job.objects.all()).values_list('pk', flat=True))
+        self.assertEqual(indexed, orm)
+        return [self.ids.index(pk) for pk in indexed]
+
+    def test_no_filters_match_everything(self):
+        self.assertEqual(self.matching(), list(range(8)))
+
+    def test_working_mode_and_location(self):
+        self.assertEqual(self.matching(working_mode='remote'), [2, 3])
+        self.assertEqual(self.matching(location='austin'), [0, 3, 4])
+        self.assertEqual(self.matching(working_mode='contract', location='Seattle'), [5])
+
+    def test_salary_ranges_with_a_missing_bound(self):
+        # A missing (or zero) maximum falls back to the minimum and vice versa
+        self.assertEqual(self.matching(min_salary=56000), [0, 1, 5, 7])
+        self.assertEqual(self.matching(max_salary=50000), [0, 6])
+        self.assertEqual(self.matching(min_salary=50000, max_salary=65000), [0, 2])
+        self.assertEqual(self.matching(min_salary=65000.5, max_salary=65000.5), [7])
+
+    def test_jobs_without_salary_never_match_a_salary_filter(self):
+        self.assertEqual(self.matching(min_salary=0), [0, 1, 2, 5, 6, 7])
+        self.assertEqual(self.matching(max_salary=10 ** 9), [0, 1, 2, 5, 6, 7])
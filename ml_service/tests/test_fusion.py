@@ -0,0 +1,81 @@
+from unittest import mock
+
+import numpy as np
+from django.test import SimpleTestCase, override_settings
+
+from ml_service.benchmark import HashingEncoder, SyntheticCorpus, SyntheticJob, build_system
+from ml_service.fusion import fuse_scores, reciprocal_rank_fusion, weighted_fusion
+
+
+class FuseScoresTests(SimpleTestCase):
+    def test_weighted_fusion_normalises_each_ranker(self):
+        # Same order on very different scales: each column contributes 0-1
+        fused = weighted_fusion([[0.2, 0.4, 0.3], [10.0, 50.0, 30.0]], [1.0, 1.0])
+        np.testing.assert_allclose(fused, [0.0, 1.0, 0.5], atol=1e-6)
+
+    def test_weighted_fusion_respects_weights(self):
+        fused = weighted_fusion([[1.0, 0.0], [0.0, 1.0]], [3.0, 1.0])
+        np.testing.assert_allclose(fused, [0.75, 0.25], atol=1e-6)
+
+    def test_constant_column_counts_fully_only_when_positive(self):
+        np.testing.assert_allclose(weighted_fusion([[0.5, 0.5]], [1.0]), [1.0, 1.0])
+        np.testing.assert_allclose(weighted_fusion([[0.0, 0.0]], [1.0]), [0.0, 0.0])
+
+    def test_rrf_uses_only_rank_order(self):
+        fused = reciprocal_rank_fusion([[0.9, 0.1, 0.5], [100.0, 1.0, 2.0]], k=60)
+        expected = np.array([2 / 61, 2 / 63, 2 / 62]) * 61 / 2
+        np.testing.assert_allclose(fused, expected, rtol=1e-6)
+        self.assertAlmostEqual(float(fused[0]), 1.0, places=6)
+
+    def test_rrf_ties_keep_candidate_order(self):
+        fused = reciprocal_rank_fusion([[1.0, 1.0]], k=0)
+        np.testing.assert_allclose(fused, [1.0, 0.5], rtol=1e-6)
+
+    def test_default_weights_and_unknown_method(self):
+        np.testing.assert_allclose(fuse_scores([[0.0, 1.0], [1.0, 0.0]]), [0.5, 0.5], atol=1e-6)
+        with self.assertRaises(ValueError):
+            fuse_scores([[1.0]], method='max')
+
+
+@override_settings(ML_SERVICE={'HYBRID_WEIGHTS': {'tfidf': 0.5, 'semantic': 0.5}})
+class HybridFusionTests(SimpleTestCase):
+    def setUp(self):
+        self.corpus = SyntheticCorpus.generate(40, 3, seed=4)
+        template = self.corpus.jobs[0]
+        # Same title at the same company, as two separate postings
+        self.twins = [
+            SyntheticJob(pk, template.position, template.workplace, template.working_mode,
+                         template.job_role_and_duties, template.requisite_skill,
+                         template.salary_min, template.salary_max, location)
+            for pk, location in ((1001, 'Austin, TX'), (1002, 'Denver, CO'))
+        ]
+        self.system = build_system(self.corpus, HashingEncoder(dim=32))
+        self.system.apply_changes(self.twins, set())
+        self.query = template.job_text
+
+    def test_jobs_sharing_title_and_company_are_both_returned(self):
+        for fusion in ('weighted', 'rrf'):
+            with self.subTest(fusion=fusion):
+                results = self.system.get_hybrid_recommendations(self.query, top_n=10, fusion=fusion)
+                job_ids = [item['job_id'] for item in results]
+                self.assertEqual(len(job_ids), len(set(job_ids)))
+                self.assertTrue({1001, 1002} <= set(job_ids))
+
+    def test_jobs_found_by_one_ranker_are_scored_by_both(self):
+        tfidf_only, semantic_only = self.corpus.jobs[5].pk, self.corpus.jobs[9].pk
+        with mock.patch.object(self.system, '_tfidf_rank', return_value=[(np.array([tfidf_only]), None)]), \
+                mock.patch.object(self.system, '_semantic_rank', return_value=[(np.array([semantic_only]), None)]):
+            results = self.system.get_hybrid_recommendations(self.query, top_n=10, fusion='weighted')
+        self.assertEqual({item['job_id'] for item in results}, {tfidf_only, semantic_only})
+
+        job_ids = np.array(sorted((tfidf_only, semantic_only)))
+        clean = self.system._clean_text(self.query)
+        columns = [
+            self.system._tfidf_scores_for(self.system._tfidf_vectorize([clean])[0], job_ids),
+            self.system._semantic_scores_for(self.system._encode_queries([clean])[0], job_ids),
+        ]
+        # Neither job gets a zero from the ranker that missed it
+        self.assertTrue(all((column > 0).all() for column in columns))
+        expected = dict(zip(job_ids.tolist(), fuse_scores(columns, 'weighted', [0.5, 0.5]) * 100))
+        for item in results:
+            self.assertAlmostEqual(item['similarity_score'], round(float(expected[item['job_id']]), 1))
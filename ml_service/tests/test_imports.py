@@ -0,0 +1,61 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+import ml_service
+from job_service.management.commands.check_import_budget import Command as CheckImportBudget
+
+# The light modules every worker imports; none may pull in a heavy library
+PROBE = """
+import json, sys
+import django
+django.setup()
+import ml_service
+from ml_service import cache, conf, filters, registry, skills, timing
+ml_service.JobFilters, ml_service.recommendation_registry, ml_service.recommendation_cache
+print(json.dumps(sorted(sys.modules)))
+"""
+
+IMPORTTIME_SAMPLE = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _io
+import time:       300 |        450 |     encodings.aliases
+import time:       800 |       1250 |   encodings
+import time:        90 |         90 | zipimport
+import time:      1000 |       5000 | django
+import time:        40 |         40 |     django.utils.version
+import time:       500 |        500 |   django.utils
+import time:       700 |       2700 | numpy
+some unrelated warning line
+import time:       200 |        300 | numpy
+"""
+
+
+class LazyImportTests(SimpleTestCase):
+    def test_importing_ml_service_loads_no_heavy_module(self):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=settings.SETTINGS_MODULE)
+        result = subprocess.run([sys.executable, '-c', PROBE], capture_output=True, text=True,
+                                env=env, cwd=settings.BASE_DIR)
+        self.assertEqual(result.returncode, 0, result.stderr[-2000:])
+        loaded = set(json.loads(result.stdout.strip().splitlines()[-1]))
+        self.assertEqual(sorted(name for name in ml_service.HEAVY_MODULES if name in loaded), [])
+
+    def test_lazy_attributes(self):
+        from ml_service.filters import JobFilters
+
+        self.assertIs(ml_service.JobFilters, JobFilters)
+        self.assertIn('AdvancedJobRecommendationSystem', dir(ml_service))
+        with self.assertRaises(AttributeError):
+            ml_service.NoSuchThing
+
+
+class TopLevelImportsTests(SimpleTestCase):
+    def test_parses_importtime_output(self):
+        timings = CheckImportBudget().top_level_imports(IMPORTTIME_SAMPLE)
+        # Only unindented (top-level) imports count, with their cumulative time;
+        # a module imported twice is summed
+        self.assertEqual(timings, {'zipimport': 90, 'django': 5000, 'numpy': 3000})
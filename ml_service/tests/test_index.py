@@ -0,0 +1,100 @@
+from unittest import mock
+
+import numpy as np
+from django.test import SimpleTestCase, override_settings
+
+from ml_service import index as index_module
+from ml_service.index import BACKENDS, JobVectorIndex
+from ml_service.shards import ShardedJobIndex
+
+# Small codebooks and lists, so 1000 training vectors are plenty
+SMALL_INDEX_SETTINGS = {'PQ_M': 8, 'PQ_NBITS': 4, 'IVF_NLIST': 8, 'IVF_NPROBE': 8, 'EXACT_SEARCH_THRESHOLD': 0}
+
+
+def unit_vectors(n, dim=32, seed=0):
+    vectors = np.random.default_rng(seed).standard_normal((n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+@override_settings(ML_SERVICE=SMALL_INDEX_SETTINGS)
+class ExactFallbackTests(SimpleTestCase):
+    def setUp(self):
+        self.vectors = unit_vectors(1000)
+        self.ids = np.arange(1, 1001, dtype=np.int64) * 3
+        self.queries = self.vectors[:4]
+
+    def brute_force(self, allowed, k):
+        rows = np.searchsorted(self.ids, allowed)
+        similarities = self.queries @ self.vectors[rows].T
+        return allowed[np.argsort(-similarities, axis=1, kind='stable')[:, :k]]
+
+    def test_exact_search_merges_blocks(self):
+        index = JobVectorIndex.build(self.ids, self.vectors, backend='flat')
+        allowed = self.ids[::3]
+        with mock.patch.object(index_module, 'EXACT_SEARCH_BLOCK', 7):
+            scores, labels = index._exact_search(self.queries, 10, allowed)
+        np.testing.assert_array_equal(labels, self.brute_force(allowed, 10))
+        self.assertTrue((np.diff(scores, axis=1) <= 0).all())
+
+    def test_exact_search_decodes_in_batches(self):
+        index = JobVectorIndex.build(self.ids, self.vectors, backend='flat')
+        with mock.patch.object(index.index, 'reconstruct', side_effect=AssertionError('per-key reconstruct')):
+            index._exact_search(self.queries, 5, self.ids)
+
+    def test_reconstruct_matches_stored_vectors(self):
+        for backend in ('flat', 'hnsw'):
+            with self.subTest(backend=backend):
+                index = JobVectorIndex.build(self.ids, self.vectors, backend=backend)
+                np.testing.assert_allclose(index.reconstruct(self.ids[[5, 2, 900]]), self.vectors[[5, 2, 900]])
+                self.assertEqual(index.reconstruct([]).shape, (0, 32))
+
+    def test_sharded_reconstruct_keeps_input_order(self):
+        keys = [('remote',) if i % 2 else ('onsite',) for i in range(len(self.ids))]
+        index = ShardedJobIndex.build(self.ids, self.vectors, keys, backend='flat')
+        rows = [7, 2, 3, 500]
+        np.testing.assert_allclose(index.reconstruct(self.ids[rows]), self.vectors[rows])
+
+
+@override_settings(ML_SERVICE=SMALL_INDEX_SETTINGS)
+class FilteredSearchTests(SimpleTestCase):
+    def setUp(self):
+        self.vectors = unit_vectors(1000)
+        self.ids = np.arange(1, 1001, dtype=np.int64) * 3
+        self.allowed = self.ids[::7]
+        self.queries = self.vectors[:4]
+
+    def test_every_backend_honours_the_filter(self):
+        for backend in BACKENDS:
+            with self.subTest(backend=backend):
+                index = JobVectorIndex.build(self.ids, self.vectors, backend=backend)
+                scores, labels = index.search(self.queries, 5, allowed_ids=self.allowed)
+                self.assertEqual(labels.shape, (4, 5))
+                self.assertTrue(set(labels.ravel().tolist()) <= set(self.allowed.tolist()))
+                # The first query's own vector is allowed, so it ranks first
+                self.assertEqual(labels[0, 0], self.ids[0])
+
+    def test_every_backend_honours_the_filter_in_shards(self):
+        keys = [('remote',) if i % 2 else ('onsite',) for i in range(len(self.ids))]
+        for backend in BACKENDS:
+            with self.subTest(backend=backend):
+                index = ShardedJobIndex.build(self.ids, self.vectors, keys, backend=backend)
+                scores, labels = index.search(self.queries, 5, allowed_ids=self.allowed)
+                self.assertEqual(labels.shape, (4, 5))
+                self.assertTrue(set(labels.ravel().tolist()) <= set(self.allowed.tolist()))
+
+    def test_narrow_filter_returns_every_allowed_job(self):
+        allowed = self.ids[[10, 500, 990]]
+        for backend in BACKENDS:
+            with self.subTest(backend=backend):
+                index = JobVectorIndex.build(self.ids, self.vectors, backend=backend)
+                scores, labels = index.search(self.queries[:1], 5, allowed_ids=allowed)
+                self.assertEqual(sorted(labels[0].tolist()), sorted(allowed.tolist()))
+
+    def test_filtered_pq_scores_match_the_pq_scan(self):
+        index = JobVectorIndex.build(self.ids, self.vectors, backend='pq')
+        scores, labels = index.search(self.queries, len(self.ids))
+        filtered_scores, filtered_labels = index.search(self.queries, 5, allowed_ids=self.allowed)
+        for row in range(len(self.queries)):
+            score_of = dict(zip(labels[row].tolist(), scores[row].tolist()))
+            expected = [score_of[job_id] for job_id in filtered_labels[row].tolist()]
+            np.testing.assert_allclose(filtered_scores[row], expected, rtol=1e-5)
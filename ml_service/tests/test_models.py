@@ -0,0 +1,55 @@
+import threading
+
+from django.test import SimpleTestCase
+
+from ml_service.benchmark import HashingEncoder, SyntheticCorpus, build_system
+
+
+class ApplyChangesTests(SimpleTestCase):
+    def setUp(self):
+        self.corpus = SyntheticCorpus.generate(300, 20, seed=1)
+        self.system = build_system(self.corpus, HashingEncoder(dim=64))
+
+    def test_changes_wait_for_running_requests(self):
+        removed = {job.pk for job in self.corpus.jobs[:50]}
+        old_catalogue = self.system.catalogue
+        with self.system._state_lock.read():
+            worker = threading.Thread(target=self.system.apply_changes, args=([], removed))
+            worker.start()
+            worker.join(timeout=0.2)
+            # The new state is built but not swapped in while a request reads
+            self.assertTrue(worker.is_alive())
+            self.assertIs(self.system.catalogue, old_catalogue)
+        worker.join()
+        self.assertEqual(len(self.system), 250)
+        self.assertFalse(removed & set(self.system.tfidf_ids.tolist()))
+
+    def test_requests_during_changes_only_see_consistent_state(self):
+        errors, stop = [], threading.Event()
+        queries = self.corpus.resume_texts[:5]
+
+        def serve():
+            while not stop.is_set():
+                for method in ('tfidf', 'semantic', 'hybrid'):
+                    try:
+                        for recommendations in self.system.recommend_many(queries, method, 10):
+                            for item in recommendations:
+                                # Every returned job is in the catalogue the request saw
+                                self.assertIsNotNone(item['position'])
+                    except Exception as e:
+                        errors.append(e)
+
+        threads = [threading.Thread(target=serve) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        try:
+            jobs = self.corpus.jobs
+            for start in range(0, 200, 20):
+                self.system.apply_changes([], {job.pk for job in jobs[start:start + 20]})
+                self.system.apply_changes(jobs[start:start + 10], set())
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(len(self.system), 200)
@@ -0,0 +1,42 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from ml_service.registry import RecommendationRegistry
+
+
+class ChangeLogTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        settings = override_settings(ML_SERVICE={'ARTIFACT_DIR': directory})
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.registry = RecommendationRegistry()
+        self.registry._system = mock.Mock()
+        self.registry._log_position = self.registry.log_position()
+
+    def test_failed_apply_is_retried(self):
+        self.registry.notify_changed([1, 2])
+        with mock.patch.object(self.registry, '_apply_job_changes', side_effect=[RuntimeError('encoder'), None]) as apply:
+            with self.assertRaises(RuntimeError):
+                self.registry.get_system()
+            self.registry.get_system()
+            self.assertEqual([call.args[0] for call in apply.call_args_list], [{1, 2}, {1, 2}])
+
+            # Applied now: the next request does not see the changes again
+            self.registry.get_system()
+            self.assertEqual(apply.call_count, 2)
+        self.assertEqual(self.registry._log_position, self.registry.log_position())
+
+    def test_changes_are_applied_once(self):
+        with mock.patch.object(self.registry, '_apply_job_changes') as apply:
+            self.registry.notify_changed([3])
+            self.registry.get_system()
+            self.registry.notify_changed([4, 5])
+            self.registry.get_system()
+            self.registry.get_system()
+        self.assertEqual([call.args[0] for call in apply.call_args_list], [{3}, {4, 5}])
@@ -0,0 +1,46 @@
+from django.test import SimpleTestCase
+
+from ml_service.skills import DEFAULT_TAXONOMY, SkillTaxonomy, tokenize
+
+
+class TokenizeTests(SimpleTestCase):
+    def test_skill_punctuation_stays_in_the_token(self):
+        self.assertEqual(
+            [token for token, _, _ in tokenize('C++, C#, Node.js and .NET.')],
+            ['c++', 'c#', 'node.js', 'and', '.net'],
+        )
+
+    def test_slash_and_hyphen_are_tokens_of_their_own(self):
+        self.assertEqual(tokenize('CI/CD'), [('ci', 0, 2), ('/', 2, 3), ('cd', 3, 5)])
+        self.assertEqual([token for token, _, _ in tokenize('scikit-learn')], ['scikit', '-', 'learn'])
+
+
+class SkillTaxonomyTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.taxonomy = SkillTaxonomy.load(DEFAULT_TAXONOMY)
+
+    def test_short_skills_do_not_match_inside_words(self):
+        text = 'Senior manager to maintain our retail accounts; a legitimate, digital-first remit.'
+        skill_ids = set(self.taxonomy.extract(text))
+        self.assertFalse(skill_ids & {'r', 'artificial_intelligence', 'git'})
+
+    def test_short_skills_match_as_whole_words(self):
+        self.assertEqual(self.taxonomy.extract('R, AI and Git.'), ['r', 'artificial_intelligence', 'git'])
+
+    def test_punctuated_skills_match_with_offsets(self):
+        text = 'C++, C# and Node.js with a CI/CD pipeline'
+        matches = self.taxonomy.match(text)
+        self.assertEqual([match.skill_id for match in matches], ['cpp', 'csharp', 'nodejs', 'ci_cd'])
+        for match in matches:
+            self.assertEqual(text[match.start:match.end], match.text)
+        self.assertEqual(matches[-1].text, 'CI/CD')
+
+    def test_longer_tokens_are_not_truncated_to_a_skill(self):
+        # 'c++11' and 'node.jsx' are different tokens, not C++ / Node.js
+        self.assertEqual(self.taxonomy.extract('c++11, node.jsx'), [])
+
+    def test_longest_term_wins(self):
+        self.assertEqual(self.taxonomy.extract('Objective-C and python/django'), ['objective_c', 'python', 'django'])
+        self.assertEqual([match.text for match in self.taxonomy.match('.NET core')], ['.NET core'])
@@ -0,0 +1,53 @@
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from ml_service.benchmark import HashingEncoder, SyntheticCorpus
+from ml_service.models import AdvancedJobRecommendationSystem
+from ml_service.tfidf_store import TfidfArtifactStore
+
+
+class TfidfArtifactStoreTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.store = TfidfArtifactStore(directory)
+        self.jobs = SyntheticCorpus.generate(50, 5, seed=2).jobs
+
+    def build(self):
+        system = AdvancedJobRecommendationSystem(
+            self.jobs, sentence_model=HashingEncoder(dim=16), tfidf_store=self.store
+        )
+        system._build_tfidf_features()
+        return system
+
+    def vectorizer_path(self):
+        return os.path.join(self.store.directory, f'v{self.store._current_version()}', 'vectorizer.joblib')
+
+    def test_saved_model_is_reused(self):
+        self.build()
+        with mock.patch.object(AdvancedJobRecommendationSystem, '_fit_tfidf_features') as fit:
+            system = self.build()
+        fit.assert_not_called()
+        self.assertEqual(system.tfidf_matrix.shape[0], len(self.jobs))
+
+    def test_truncated_vectorizer_is_refitted(self):
+        self.build()
+        with open(self.vectorizer_path(), 'r+b') as f:
+            f.truncate(10)
+        self.assertIsNone(self.store.load())
+        system = self.build()
+        self.assertIsNotNone(system.tfidf_vectorizer)
+        self.assertEqual(self.store._current_version(), 2)
+
+    def test_unpickling_errors_are_treated_as_missing(self):
+        self.build()
+        for error in (AttributeError('no attribute'), ModuleNotFoundError('sklearn.old'), EOFError()):
+            with self.subTest(error=type(error).__name__):
+                with mock.patch('ml_service.tfidf_store.joblib.load', side_effect=error):
+                    self.assertIsNone(self.store.load())
+                    system = self.build()
+                self.assertIsNotNone(system.tfidf_vectorizer)
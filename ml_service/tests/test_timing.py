@@ -0,0 +1,76 @@
+from django.http import Http404, HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from ml_service.timing import Histogram, ServerTimingMiddleware, metrics, timed
+
+
+class HistogramTests(SimpleTestCase):
+    def test_exposition_format(self):
+        histogram = Histogram('test_seconds', 'Test durations.', 'stage', buckets=(0.1, 1.0))
+        for seconds in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe('encode', seconds)
+        histogram.observe('a "quoted"\nstage', 0.2)
+        self.assertEqual(histogram.render(), [
+            '# HELP test_seconds Test durations.',
+            '# TYPE test_seconds histogram',
+            'test_seconds_bucket{stage="a \\"quoted\\"\\nstage",le="0.1"} 0',
+            'test_seconds_bucket{stage="a \\"quoted\\"\\nstage",le="1.0"} 1',
+            'test_seconds_bucket{stage="a \\"quoted\\"\\nstage",le="+Inf"} 1',
+            'test_seconds_count{stage="a \\"quoted\\"\\nstage"} 1',
+            'test_seconds_sum{stage="a \\"quoted\\"\\nstage"} 0.200000',
+            # Buckets are cumulative and a bound is inclusive
+            'test_seconds_bucket{stage="encode",le="0.1"} 2',
+            'test_seconds_bucket{stage="encode",le="1.0"} 3',
+            'test_seconds_bucket{stage="encode",le="+Inf"} 4',
+            'test_seconds_count{stage="encode"} 4',
+            'test_seconds_sum{stage="encode"} 3.650000',
+        ])
+
+
+class ServerTimingMiddlewareTests(SimpleTestCase):
+    def get_response(self, request):
+        with timed('encode'):
+            pass
+        with timed('faiss'):
+            pass
+        return HttpResponse('ok')
+
+    @override_settings(ML_SERVICE={'TIMING_ENABLED': True})
+    def test_stages_are_reported(self):
+        with self.assertLogs('ml_service.timing', 'INFO') as logs:
+            response = ServerTimingMiddleware(self.get_response)(RequestFactory().get('/'))
+        entries = [entry.split(';dur=') for entry in response['Server-Timing'].split(', ')]
+        self.assertEqual([stage for stage, _ in entries], ['encode', 'faiss', 'total'])
+        for _, duration in entries:
+            self.assertGreaterEqual(float(duration), 0)
+        self.assertIn('"event": "request_timing"', logs.output[0])
+
+    @override_settings(ML_SERVICE={'TIMING_ENABLED': False})
+    def test_disabled_timing_adds_no_header(self):
+        response = ServerTimingMiddleware(self.get_response)(RequestFactory().get('/'))
+        self.assertFalse(response.has_header('Server-Timing'))
+
+
+class MetricsViewTests(SimpleTestCase):
+    def scrape(self, remote_addr='127.0.0.1', **headers):
+        return metrics(RequestFactory().get('/metrics/', REMOTE_ADDR=remote_addr, **headers))
+
+    def test_disabled_by_default(self):
+        with self.assertRaises(Http404):
+            self.scrape()
+
+    @override_settings(ML_SERVICE={'METRICS_ENABLED': True})
+    def test_local_scrape(self):
+        response = self.scrape()
+        self.assertIn(b'# TYPE ml_stage_duration_seconds histogram', response.content)
+        self.assertIn(b'ml_cache_hits_total{cache="recommendations"}', response.content)
+        with self.assertRaises(Http404):
+            self.scrape('203.0.113.7')
+
+    @override_settings(ML_SERVICE={'METRICS_ENABLED': True, 'METRICS_TOKEN': 's3cret', 'METRICS_ALLOWED_IPS': None})
+    def test_token_is_required(self):
+        self.assertEqual(self.scrape('203.0.113.7', HTTP_AUTHORIZATION='Bearer s3cret').status_code, 200)
+        for headers in ({}, {'HTTP_AUTHORIZATION': 'Bearer wrong'}, {'HTTP_AUTHORIZATION': 's3cret'}):
+            with self.subTest(headers=headers):
+                with self.assertRaises(Http404):
+                    self.scrape(**headers)
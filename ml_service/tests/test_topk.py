@@ -0,0 +1,40 @@
+import numpy as np
+from django.test import SimpleTestCase
+
+from ml_service.topk import top_k
+
+
+def reference(scores, k):
+    return np.argsort(-np.asarray(scores), kind='stable')[..., :max(k, 0)]
+
+
+class TopKTests(SimpleTestCase):
+    def test_ties_keep_index_order(self):
+        scores = np.array([0.5, 0.9, 0.5, 0.9, 0.1, 0.5])
+        self.assertEqual(top_k(scores, 2).tolist(), [1, 3])
+        # The tie at the cut goes to the lowest indices
+        self.assertEqual(top_k(scores, 4).tolist(), [1, 3, 0, 2])
+        self.assertEqual(top_k(np.zeros(5), 3).tolist(), [0, 1, 2])
+
+    def test_k_at_least_n_returns_everything_sorted(self):
+        scores = np.array([0.2, 0.7, 0.2, 0.4])
+        for k in (4, 5, 100):
+            with self.subTest(k=k):
+                self.assertEqual(top_k(scores, k).tolist(), [1, 3, 0, 2])
+
+    def test_non_positive_k_returns_nothing(self):
+        for k in (0, -1):
+            with self.subTest(k=k):
+                top = top_k(np.array([0.3, 0.1]), k)
+                self.assertEqual(top.shape, (0,))
+                self.assertEqual(top_k(np.ones((3, 4)), k).shape, (3, 0))
+        self.assertEqual(top_k(np.array([]), 5).shape, (0,))
+
+    def test_matches_a_stable_argsort(self):
+        rng = np.random.default_rng(0)
+        # Few distinct values, so most cuts fall inside a run of ties
+        scores = rng.integers(0, 5, size=(20, 50)).astype(np.float32)
+        for k in (1, 7, 49, 50, 60):
+            with self.subTest(k=k):
+                np.testing.assert_array_equal(top_k(scores, k), reference(scores, k))
+                np.testing.assert_array_equal(top_k(scores[3], k), reference(scores[3], k))
@@ -0,0 +1,108 @@
+"""Versioned on-disk TF-IDF vectorizer and sparse job matrix"""
+import json
+import logging
+import os
+import shutil
+
+import joblib
+import numpy as np
+from filelock import FileLock
+from scipy import sparse
+
+logger = logging.getLogger(__name__)
+
+
+class TfidfArtifacts:
+    """One saved version: fitted vectorizer, CSR job matrix and its row keys"""
+
+    def __init__(self, version, vectorizer, matrix, ids, hashes, drift):
+        self.version = version
+        self.vectorizer = vectorizer
+        self.matrix = matrix
+        self.ids = ids
+        self.hashes = hashes
+        # Rows added, changed or removed since the vectorizer was last fitted
+        self.drift = drift
+
+
+class TfidfArtifactStore:
+    """Keep numbered versions of the TF-IDF model under one directory.
+
+    Each version lives in ``v<N>/`` (vectorizer.joblib, matrix.npz, ids.npy,
+    hashes.npy, meta.json) and ``CURRENT`` names the live one, so readers
+    never see a half-written version. Only the newest KEEP_VERSIONS are kept.
+    """
+
+    CURRENT_NAME = 'CURRENT'
+    KEEP_VERSIONS = 2
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._file_lock = FileLock(os.path.join(directory, 'tfidf.lock'))
+
+    def _current_version(self):
+        try:
+            with open(os.path.join(self.directory, self.CURRENT_NAME)) as f:
+                return int(f.read().strip())
+        except (OSError, ValueError):
+            return None
+
+    def load(self):
+        """Return the current TfidfArtifacts, or None when nothing is saved"""
+        version = self._current_version()
+        if version is None:
+            return None
+
+        path = os.path.join(self.directory, f"v{version}")
+        try:
+            with open(os.path.join(path, 'meta.json')) as f:
+                meta = json.load(f)
+            artifacts = TfidfArtifacts(
+                version,
+                joblib.load(os.path.join(path, 'vectorizer.joblib')),
+                sparse.load_npz(os.path.join(path, 'matrix.npz')).tocsr(),
+                np.load(os.path.join(path, 'ids.npy')),
+                np.load(os.path.join(path, 'hashes.npy')),
+                meta['drift'],
+            )
+            if not artifacts.matrix.shape[0] == len(artifacts.ids) == len(artifacts.hashes):
+                raise ValueError("matrix rows do not match the saved ids")
+            return artifacts
+        except Exception as e:
+            # Unpickling can fail in many ways (a truncated file, classes moved by a
+            # library upgrade); any unreadable version is treated as missing and refitted
+            logger.error(f"❌ Error loading TF-IDF artifacts v{version}: {str(e)}")
+            return None
+
+    def save(self, vectorizer, matrix, ids, hashes, drift):
+        """Write a new version and make it current; returns its number"""
+        with self._file_lock:
+            version = (self._current_version() or 0) + 1
+            path = os.path.join(self.directory, f"v{version}")
+            tmp_path = path + '.tmp'
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            os.makedirs(tmp_path)
+
+            joblib.dump(vectorizer, os.path.join(tmp_path, 'vectorizer.joblib'))
+            sparse.save_npz(os.path.join(tmp_path, 'matrix.npz'), matrix.tocsr())
+            np.save(os.path.join(tmp_path, 'ids.npy'), np.asarray(ids, dtype=np.int64))
+            np.save(os.path.join(tmp_path, 'hashes.npy'), np.asarray(hashes, dtype=np.uint64))
+            with open(os.path.join(tmp_path, 'meta.json'), 'w') as f:
+                json.dump({'drift': int(drift), 'rows': int(matrix.shape[0])}, f)
+            os.replace(tmp_path, path)
+
+            current_tmp = os.path.join(self.directory, self.CURRENT_NAME + '.tmp')
+            with open(current_tmp, 'w') as f:
+                f.write(str(version))
+            os.replace(current_tmp, os.path.join(self.directory, self.CURRENT_NAME))
+
+            self._prune(version)
+            logger.info(f"✅ Saved TF-IDF artifacts v{version} ({matrix.shape[0]} jobs)")
+            return version
+
+    def _prune(self, current):
+        for name in os.listdir(self.directory):
+            if name.startswith('v') and name[1:].isdigit():
+                if int(name[1:]) <= current - self.KEEP_VERSIONS:
+                    shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
@@ -0,0 +1,219 @@
+"""Per-stage timing of recommendation requests.
+
+Code on the request path wraps its stages in ``timed('encode')`` and so on.
+While a request is being timed (see ``ServerTimingMiddleware``) each stage
+is added to that request's timings and to a process-wide histogram; the
+middleware then reports the timings in a ``Server-Timing`` header and one
+structured log line, and ``metrics`` serves the histograms in Prometheus
+text format. When timing is disabled no request is timed and ``timed()``
+returns a shared no-op context manager.
+"""
+import bisect
+import contextlib
+import contextvars
+import hmac
+import json
+import logging
+import threading
+import time
+
+from .conf import get_setting
+
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds, in seconds
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_current = contextvars.ContextVar('ml_request_timings', default=None)
+_NOOP = contextlib.nullcontext()
+
+
+class Histogram:
+    """Cumulative-bucket histogram of durations, one series per label value"""
+
+    def __init__(self, name, help_text, label, buckets=BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def observe(self, label_value, seconds):
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(label_value)
+            if series is None:
+                # Bucket counts (the last one is +Inf), count, sum
+                series = self._series[label_value] = [[0] * (len(self.buckets) + 1), 0, 0.0]
+            series[0][index] += 1
+            series[1] += 1
+            series[2] += seconds
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((value, [list(counts), count, total]) for value, (counts, count, total)
+                            in self._series.items())
+        for value, (counts, count, total) in series:
+            label = f'{self.label}="{_escape(value)}"'
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{{{label},le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_count{{{label}}} {count}')
+            lines.append(f'{self.name}_sum{{{label}}} {total:.6f}')
+        return lines
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+
+stage_histogram = Histogram(
+    'ml_stage_duration_seconds', 'Time spent in each recommendation pipeline stage.', 'stage'
+)
+request_histogram = Histogram(
+    'ml_request_duration_seconds', 'Duration of timed requests by view.', 'view'
+)
+
+
+class RequestTimings:
+    """Total milliseconds and call count per stage for one request"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stages = {}
+
+    def add(self, stage, seconds):
+        with self._lock:
+            total, count = self.stages.get(stage, (0.0, 0))
+            self.stages[stage] = (total + seconds * 1000, count + 1)
+
+    def server_timing(self, total_ms=None):
+        """``Server-Timing`` header value"""
+        entries = [f"{stage};dur={ms:.1f}" for stage, (ms, count) in self.stages.items()]
+        if total_ms is not None:
+            entries.append(f"total;dur={total_ms:.1f}")
+        return ', '.join(entries)
+
+    def as_dict(self):
+        return {stage: round(ms, 3) for stage, (ms, count) in self.stages.items()}
+
+
+class _Stage:
+    __slots__ = ('timings', 'stage', 'start')
+
+    def __init__(self, timings, stage):
+        self.timings = timings
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self.start
+        self.timings.add(self.stage, seconds)
+        stage_histogram.observe(self.stage, seconds)
+        return False
+
+
+def timed(stage):
+    """Context manager timing one stage of the current request, if it is timed"""
+    timings = _current.get()
+    if timings is None:
+        return _NOOP
+    return _Stage(timings, stage)
+
+
+@contextlib.contextmanager
+def collect_timings():
+    """Time the stages run inside the block, e.g. from a management command.
+
+    Work handed to other threads is only timed when submitted with
+    ``contextvars.copy_context().run``.
+    """
+    timings = RequestTimings()
+    token = _current.set(timings)
+    try:
+        yield timings
+    finally:
+        _current.reset(token)
+
+
+def timing_enabled():
+    return bool(get_setting('TIMING_ENABLED'))
+
+
+class ServerTimingMiddleware:
+    """Time each request's stages and report them in a Server-Timing header"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not timing_enabled():
+            return self.get_response(request)
+
+        start = time.perf_counter()
+        with collect_timings() as timings:
+            response = self.get_response(request)
+        seconds = time.perf_counter() - start
+
+        match = getattr(request, 'resolver_match', None)
+        view = (match.view_name if match else None) or 'unresolved'
+        request_histogram.observe(view, seconds)
+        response['Server-Timing'] = timings.server_timing(seconds * 1000)
+        if timings.stages:
+            # Only requests that ran recommendation stages are logged
+            logger.info(json.dumps({
+                'event': 'request_timing',
+                'view': view,
+                'method': request.method,
+                'status': response.status_code,
+                'total_ms': round(seconds * 1000, 3),
+                'stages': timings.as_dict(),
+            }))
+        return response
+
+
+def render_metrics():
+    """Stage and request histograms plus cache counters in Prometheus text format"""
+    from .cache import query_embedding_cache, recommendation_cache
+
+    lines = stage_histogram.render() + request_histogram.render()
+    for metric, help_text in (('hits', 'Cache lookups answered from the cache.'),
+                              ('misses', 'Cache lookups that missed.')):
+        name = f"ml_cache_{metric}_total"
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+        for cache_name, cache in (('query_embeddings', query_embedding_cache),
+                                  ('recommendations', recommendation_cache)):
+            lines.append(f'{name}{{cache="{cache_name}"}} {cache.stats.as_dict()[metric]}')
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_allowed(request):
+    """Whether ``request`` may scrape the metrics endpoint (see the METRICS_* settings)"""
+    if not get_setting('METRICS_ENABLED'):
+        return False
+    token = get_setting('METRICS_TOKEN')
+    if token and not hmac.compare_digest(
+        request.META.get('HTTP_AUTHORIZATION', '').encode('utf-8'), f'Bearer {token}'.encode('utf-8')
+    ):
+        return False
+    allowed_ips = get_setting('METRICS_ALLOWED_IPS')
+    return allowed_ips is None or request.META.get('REMOTE_ADDR') in allowed_ips
+
+
+def metrics(request):
+    """Prometheus scrape endpoint; a 404 unless enabled and the scraper is allowed"""
+    from django.http import Http404, HttpResponse
+
+    if not metrics_allowed(request):
+        raise Http404
+    return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
@@ -1,7 +1,11 @@
 from django.db import models
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 from django.contrib.auth.models import User
 import os
 
+from ml_service.registry import candidate_registry
+
 def resume_upload_path(instance, filename):
     """Generate upload path for resume files"""
     user_id = instance.user.id if instance.user else 'anonymous'
@@ -24,3 +28,10 @@ class Resume(models.Model):
     
     def filename(self):
         return os.path.basename(self.file.name)
+
+
+@receiver(post_save, sender=Resume)
+@receiver(post_delete, sender=Resume)
+def update_candidate_index(sender, instance, **kwargs):
+    """Queue the resume for an incremental update of the shared candidate index"""
+    candidate_registry.resume_changed(instance.pk)
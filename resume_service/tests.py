@@ -1,3 +1,81 @@
-from django.test import TestCase
+import json
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from ml_service.filters import JobFilters
+from resume_service.views import MAX_TOP_N, get_advanced_recommendations, get_advanced_recommendations_many
+
+
+class BatchRecommendationsApiTests(TestCase):
+    def post(self, **data):
+        data.setdefault('resume_texts', ['python developer'])
+        return self.client.post(
+            reverse('resume_service:api_batch_recommendations'), json.dumps(data), content_type='application/json'
+        )
+
+    def test_invalid_top_n_is_rejected(self):
+        for top_n in ('ten', '20', 2.5, None, True, 0, -3, MAX_TOP_N + 1):
+            with self.subTest(top_n=top_n):
+                response = self.post(top_n=top_n)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('top_n', response.json()['error'])
+
+    @mock.patch('resume_service.views.get_simple_recommendations', return_value=[])
+    @mock.patch('resume_service.views.get_advanced_recommendations_many', return_value=[[]])
+    def test_top_n_reaches_both_rankers(self, advanced, simple):
+        response = self.post(top_n=MAX_TOP_N)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(advanced.call_args.args[2], MAX_TOP_N)
+        self.assertEqual(simple.call_args.args[2], MAX_TOP_N)
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'resume-tests'}},
+    ML_SERVICE={'CACHE_ALIAS': 'default'},
+)
+class RecommendationCachingTests(SimpleTestCase):
+    def setUp(self):
+        from django.core.cache import caches
+
+        caches['default'].clear()
+        registry = mock.patch('resume_service.views.recommendation_registry').start()
+        self.addCleanup(mock.patch.stopall)
+        registry.catalogue_version = '1-0'
+        self.registry = registry
+        self.system = registry.get_system.return_value
+        self.system.__len__.return_value = 10
+        self.system._clean_text.side_effect = str.lower
+        self.system.get_hybrid_recommendations.side_effect = lambda text, filters=None: [{'job_id': len(text)}]
+        self.system.recommend_many.side_effect = lambda texts, *args, **kwargs: [[{'job_id': len(t)}] for t in texts]
+
+    def test_repeated_request_is_served_from_the_cache(self):
+        first = get_advanced_recommendations('Python developer')
+        second = get_advanced_recommendations('python DEVELOPER')
+        self.assertEqual(first, second)
+        self.assertEqual(self.system.get_hybrid_recommendations.call_count, 1)
+
+        batch = get_advanced_recommendations_many(['Python developer', 'java developer'])
+        self.assertEqual(batch[0], first)
+        self.assertEqual(self.system.recommend_many.call_args.args[0], ['java developer'])
+
+    def test_catalogue_changes_and_filters_miss_the_cache(self):
+        get_advanced_recommendations('python developer')
+        get_advanced_recommendations('python developer', filters=JobFilters(working_mode='remote'))
+        self.registry.catalogue_version = '1-25'
+        get_advanced_recommendations('python developer')
+        self.assertEqual(self.system.get_hybrid_recommendations.call_count, 3)
+
+    def test_empty_results_are_not_cached(self):
+        self.system.get_hybrid_recommendations.side_effect = None
+        self.system.get_hybrid_recommendations.return_value = []
+        self.assertEqual(get_advanced_recommendations('python developer'), [])
+        self.assertEqual(get_advanced_recommendations('python developer'), [])
+        self.assertEqual(self.system.get_hybrid_recommendations.call_count, 2)
+
+        self.system.recommend_many.side_effect = None
+        self.system.recommend_many.return_value = [[]]
+        get_advanced_recommendations_many(['java developer'])
+        get_advanced_recommendations_many(['java developer'])
+        self.assertEqual(self.system.recommend_many.call_count, 2)
@@ -7,4 +7,5 @@ urlpatterns = [
     path('upload/', views.upload_resume, name='upload_resume'),
     path('recommendations/<int:resume_id>/', views.get_recommendations, name='get_recommendations'),
     path('api/recommendations/', views.api_get_recommendations, name='api_recommendations'),
+    path('api/recommendations/batch/', views.api_get_batch_recommendations, name='api_batch_recommendations'),
 ] 
\ No newline at end of file
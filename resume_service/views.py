@@ -3,6 +3,7 @@ from django.contrib import messages
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
+from django.db.models import Count
 import fitz  # PyMuPDF
 import os
 import json
@@ -15,8 +16,18 @@ logger = logging.getLogger(__name__)
 from .models import Resume
 from .forms import ResumeUploadForm
 
-# Import advanced ML system
-from ml_service.models import AdvancedJobRecommendationSystem
+# Shared, prebuilt ML recommendation system
+from ml_service.cache import recommendation_cache
+from ml_service.filters import JobFilters
+from ml_service.registry import recommendation_registry
+from ml_service.skill_index import job_skill_index
+from ml_service.skills import get_skill_taxonomy
+from ml_service.timing import timed
+
+# Upper bound on resumes accepted by the batch recommendations API
+MAX_BATCH_RESUMES = 5000
+# Upper bound on recommendations per resume accepted by the batch API
+MAX_TOP_N = 100
 
 def upload_resume(request):
     """Handle resume upload and text extraction - No login required"""
@@ -48,86 +59,132 @@ def upload_resume(request):
     return render(request, 'resume_service/upload_resume.html', {'form': form})
 
 def extract_skills_from_resume(resume_text):
-    """Extract skills from resume text using pattern matching"""
-    skills = []
-    
-    # Common technical skills
-    technical_skills = [
-        'python', 'java', 'javascript', 'react', 'angular', 'vue', 'node.js', 'express',
-        'sql', 'mysql', 'postgresql', 'mongodb', 'aws', 'azure', 'docker', 'kubernetes',
-        'git', 'github', 'html', 'css', 'bootstrap', 'jquery', 'php', 'c#', 'c++',
-        'machine learning', 'ai', 'artificial intelligence', 'data science', 'analytics',
-        'excel', 'powerbi', 'tableau', 'r', 'matlab', 'tensorflow', 'pytorch',
-        'scikit-learn', 'pandas', 'numpy', 'matplotlib', 'seaborn', 'jupyter'
-    ]
-    
-    # Common soft skills
-    soft_skills = [
-        'leadership', 'communication', 'teamwork', 'problem solving', 'project management',
-        'agile', 'scrum', 'kanban', 'customer service', 'sales', 'marketing',
-        'research', 'analysis', 'planning', 'organization', 'time management'
-    ]
-    
-    resume_lower = resume_text.lower()
-    
-    # Extract technical skills
-    for skill in technical_skills:
-        if skill in resume_lower:
-            skills.append(skill)
-    
-    # Extract soft skills
-    for skill in soft_skills:
-        if skill in resume_lower:
-            skills.append(skill)
-    
-    return skills
+    """Extract skill names from resume text using the skill taxonomy"""
+    taxonomy = get_skill_taxonomy()
+    return taxonomy.names(taxonomy.extract(resume_text))
 
-def get_advanced_recommendations(resume_text, method='hybrid'):
-    """Get advanced ML-powered job recommendations"""
+def get_advanced_recommendations(resume_text, method='hybrid', filters=None):
+    """Get advanced ML-powered job recommendations, optionally restricted by JobFilters"""
     try:
-        # Import Job model from job_service
-        from job_service.models import Job
-        
-        # Get all active jobs from database
-        jobs = Job.objects.filter(is_active=True)
+        # Reuse the process-wide system; only the query is encoded per request
+        ml_system = recommendation_registry.get_system()
         
-        if jobs.count() == 0:
+        if len(ml_system) == 0:
             logger.warning("No jobs found in database")
             return []
         
-        # Initialize advanced ML system
-        ml_system = AdvancedJobRecommendationSystem(jobs)
+        # The same resume is often submitted again; serve it from the result cache
+        cache_key = _recommendation_cache_key(ml_system, resume_text, method, 20, filters)
+        with timed('cache'):
+            cached = recommendation_cache.get_many([cache_key])
+        if cache_key in cached:
+            return cached[cache_key]
         
         # Get recommendations based on method
         if method == 'tfidf':
-            recommendations = ml_system.get_tfidf_recommendations(resume_text)
+            recommendations = ml_system.get_tfidf_recommendations(resume_text, filters=filters)
         elif method == 'semantic':
-            recommendations = ml_system.get_semantic_recommendations(resume_text)
+            recommendations = ml_system.get_semantic_recommendations(resume_text, filters=filters)
         else:  # hybrid
-            recommendations = ml_system.get_hybrid_recommendations(resume_text)
+            recommendations = ml_system.get_hybrid_recommendations(resume_text, filters=filters)
         
+        if recommendations:
+            recommendation_cache.set_many({cache_key: recommendations})
         logger.info(f"Advanced ML recommendations: {len(recommendations)} jobs using {method} method")
         return recommendations
         
     except Exception as e:
         logger.error(f"Error in advanced recommendations: {str(e)}")
         # Fallback to simple method
-        return get_simple_recommendations(resume_text)
+        return get_simple_recommendations(resume_text, filters)
 
-def get_simple_recommendations(resume_text):
-    """Fallback to simple keyword-based recommendations"""
+def get_advanced_recommendations_many(resume_texts, method='hybrid', top_n=20, filters=None):
+    """Get advanced ML-powered job recommendations for many resumes in one pass"""
+    try:
+        ml_system = recommendation_registry.get_system()
+        
+        if len(ml_system) == 0:
+            logger.warning("No jobs found in database")
+            return [[] for _ in resume_texts]
+        
+        keys = [_recommendation_cache_key(ml_system, text, method, top_n, filters) for text in resume_texts]
+        with timed('cache'):
+            cached = recommendation_cache.get_many(list(set(keys)))
+        
+        # Only resumes without a cached result go through the ML pipeline
+        missing = [i for i, key in enumerate(keys) if key not in cached]
+        if missing:
+            computed = ml_system.recommend_many(
+                [resume_texts[i] for i in missing], method, top_n, filters=filters
+            )
+            fresh = {keys[i]: recommendations for i, recommendations in zip(missing, computed) if recommendations}
+            recommendation_cache.set_many(fresh)
+            cached.update(fresh)
+            for i, recommendations in zip(missing, computed):
+                cached.setdefault(keys[i], recommendations)
+        
+        results = [cached[key] for key in keys]
+        logger.info(f"Advanced ML batch recommendations for {len(resume_texts)} resumes using {method} method")
+        return results
+        
+    except Exception as e:
+        logger.error(f"Error in advanced batch recommendations: {str(e)}")
+        # Fallback to simple method
+        return [get_simple_recommendations(resume_text, filters) for resume_text in resume_texts]
+
+def _recommendation_cache_key(ml_system, resume_text, method, top_n, filters):
+    """Result cache key; changes whenever the job catalogue does"""
+    method = method if method in ('tfidf', 'semantic') else 'hybrid'
+    return recommendation_cache.key(
+        ml_system._clean_text(resume_text), method, top_n, filters,
+        recommendation_registry.catalogue_version
+    )
+
+def get_simple_recommendations(resume_text, filters=None, top_n=20):
+    """Fallback to simple keyword-based recommendations.
+
+    Jobs are ranked by the skills they share with the resume, read from the
+    precomputed job skill index instead of scanning every job.
+    """
     try:
         from job_service.models import Job
         
+        resume_skills = get_skill_taxonomy().extract(resume_text)
         jobs = Job.objects.filter(is_active=True)
-        if jobs.count() == 0:
-            return []
+        with timed('skill_index'):
+            if filters:
+                # Filtered requests let the database join and count the JobSkill rows
+                jobs = filters.filter_queryset(jobs)
+                ranked = list(
+                    jobs.filter(skills__skill_id__in=resume_skills)
+                    .annotate(matches=Count('skills')).order_by('-matches', '-pk')
+                    .values_list('pk', 'matches')[:top_n]
+                ) if resume_skills else []
+            else:
+                ranked = job_skill_index.top_jobs(resume_skills, top_n)
         
-        resume_skills = extract_skills_from_resume(resume_text)
-        job_similarities = []
+        with timed('orm'):
+            if len(ranked) < top_n:
+                # Jobs sharing no skill fill the remaining places, newest first
+                matched_ids = [job_id for job_id, _ in ranked]
+                ranked += [(job_id, 0) for job_id in jobs.exclude(pk__in=matched_ids)
+                           .values_list('pk', flat=True)[:top_n - len(ranked)]]
+            jobs_by_id = Job.objects.filter(is_active=True).in_bulk([job_id for job_id, _ in ranked])
         
-        for job in jobs:
-            job_dict = {
+        job_similarities = []
+        for job_id, skill_matches in ranked:
+            job = jobs_by_id.get(job_id)
+            if job is None:
+                # Deactivated since the skill index was read
+                continue
+            
+            if len(resume_skills) > 0:
+                similarity_score = min(95, (skill_matches / len(resume_skills)) * 100 + 20)
+            else:
+                similarity_score = 50
+            
+            job_similarities.append({
+                'job_id': job.pk,
                 'position': job.position,
                 'workplace': job.workplace,
                 'working_mode': job.working_mode,
@@ -137,26 +194,12 @@ def get_simple_recommendations(resume_text):
                 'salary_max': float(job.salary_max) if job.salary_max else None,
                 'location': job.location,
                 'created_at': job.created_at,
-            }
-            
-            # Simple skill matching
-            job_text = f"{job_dict.get('position', '')} {job_dict.get('job_role_and_duties', '')} {job_dict.get('requisite_skill', '')}".lower()
-            skill_matches = sum(1 for skill in resume_skills if skill in job_text)
-            
-            if len(resume_skills) > 0:
-                similarity_score = min(95, (skill_matches / len(resume_skills)) * 100 + 20)
-            else:
-                similarity_score = 50
-            
-            job_dict['similarity_score'] = round(similarity_score, 1)
-            job_dict['skill_matches'] = skill_matches
-            job_dict['ai_ranked'] = True
-            job_dict['method'] = 'Simple Keyword Matching'
-            job_similarities.append(job_dict)
-        
-        # Sort by similarity score
-        job_similarities.sort(key=lambda x: x['similarity_score'], reverse=True)
-        return job_similarities[:20]
+                'similarity_score': round(similarity_score, 1),
+                'skill_matches': skill_matches,
+                'ai_ranked': True,
+                'method': 'Simple Keyword Matching',
+            })
+        return job_similarities
         
     except Exception as e:
         logger.error(f"Error in simple recommendations: {str(e)}")
@@ -164,7 +207,8 @@ def get_simple_recommendations(resume_text):
 
 def get_recommendations(request, resume_id):
     """Get advanced AI-powered job recommendations based on CV content"""
-    resume = get_object_or_404(Resume, id=resume_id, user__isnull=True)
+    with timed('orm'):
+        resume = get_object_or_404(Resume, id=resume_id, user__isnull=True)
     
     if not resume.extracted_text:
         messages.error(request, 'No text extracted from resume. Please re-upload.')
@@ -187,14 +231,15 @@ def get_recommendations(request, resume_id):
         # Delete the resume after processing
         resume.delete()
         
-        return render(request, 'resume_service/recommendations.html', {
-            'resume': resume,
-            'recommendations': recommended_jobs,
-            'ai_powered': True,
-            'total_jobs_analyzed': len(recommended_jobs),
-            'resume_skills': resume_skills,
-            'ml_method': ml_method
-        })
+        with timed('render'):
+            return render(request, 'resume_service/recommendations.html', {
+                'resume': resume,
+                'recommendations': recommended_jobs,
+                'ai_powered': True,
+                'total_jobs_analyzed': len(recommended_jobs),
+                'resume_skills': resume_skills,
+                'ml_method': ml_method
+            })
         
     except Exception as e:
         logger.error(f"Error in recommendations: {str(e)}")
@@ -212,14 +257,53 @@ def api_get_recommendations(request):
         
         if not resume_text:
             return JsonResponse({'error': 'Resume text is required'}, status=400)
+        try:
+            filters = JobFilters.from_dict(data.get('filters'))
+        except ValueError as e:
+            return JsonResponse({'error': str(e)}, status=400)
         
         # Get advanced recommendations
-        recommended_jobs = get_advanced_recommendations(resume_text, ml_method)
+        recommended_jobs = get_advanced_recommendations(resume_text, ml_method, filters)
         
         if not recommended_jobs:
-            recommended_jobs = get_simple_recommendations(resume_text)
+            recommended_jobs = get_simple_recommendations(resume_text, filters)
         
         return JsonResponse({'recommended_jobs': recommended_jobs})
         
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def api_get_batch_recommendations(request):
+    """API endpoint for job recommendations for many resumes in one request"""
+    try:
+        data = json.loads(request.body)
+        resume_texts = data.get('resume_texts', [])
+        ml_method = data.get('method', 'hybrid')
+        top_n = data.get('top_n', 20)
+        
+        if isinstance(top_n, bool) or not isinstance(top_n, int) or not 1 <= top_n <= MAX_TOP_N:
+            return JsonResponse({'error': f'top_n must be an integer from 1 to {MAX_TOP_N}'}, status=400)
+        if not isinstance(resume_texts, list) or not resume_texts:
+            return JsonResponse({'error': 'resume_texts must be a non-empty list'}, status=400)
+        if not all(isinstance(text, str) and text for text in resume_texts):
+            return JsonResponse({'error': 'Every resume text must be a non-empty string'}, status=400)
+        if len(resume_texts) > MAX_BATCH_RESUMES:
+            return JsonResponse({'error': f'At most {MAX_BATCH_RESUMES} resumes per request'}, status=400)
+        try:
+            filters = JobFilters.from_dict(data.get('filters'))
+        except ValueError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        
+        # Get advanced recommendations for the whole batch
+        results = get_advanced_recommendations_many(resume_texts, ml_method, top_n, filters)
+        
+        for i, recommended_jobs in enumerate(results):
+            if not recommended_jobs:
+                results[i] = get_simple_recommendations(resume_texts[i], filters, top_n)
+        
+        return JsonResponse({'results': [{'recommended_jobs': jobs} for jobs in results]})
+        
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)